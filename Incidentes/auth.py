@@ -0,0 +1,204 @@
+import os
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+from alerta_common.clients import table
+from alerta_common.revocation import RevocationList
+from alerta_common.signed_tokens import es_token_firmado, verificar
+
+# Caché de token -> usuario en el contenedor caliente. Es también cuánto
+# puede seguir valiendo un token uuid después del logout (ver TokenCache)
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_NEGATIVE_TTL_SECONDS = float(
+    os.environ.get("AUTH_CACHE_NEGATIVE_TTL_SECONDS", "10")
+)
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", "1024"))
+REVOKED_TOKENS_TABLE = os.environ.get("REVOKED_TOKENS_TABLE")
+
+ERROR_TOKEN_INVALIDO = "Token inválido o expirado"
+ERROR_TOKEN_SIN_EMAIL = "Token inválido (sin email)"
+ERROR_USUARIO_NO_ENCONTRADO = "Usuario asociado al token no encontrado"
+ERROR_LEYENDO_TOKENS = "Error interno leyendo tokens"
+ERROR_LEYENDO_USUARIOS = "Error interno leyendo usuarios"
+ERROR_LEYENDO_REVOCADOS = "Error interno leyendo tokens revocados"
+
+# Rutas que además de un token válido exigen un rol (lo revisa el autorizador)
+ROLES_POR_RUTA = {
+    "DELETE /incidentes/{id}": {"administrativo"},
+}
+
+ERRORES_INTERNOS = {
+    ERROR_LEYENDO_TOKENS,
+    ERROR_LEYENDO_USUARIOS,
+    ERROR_LEYENDO_REVOCADOS,
+}
+
+
+class TokenCache:
+    """
+    LRU con TTL de (user_info, error) por token.
+
+    Los tokens válidos se guardan `ttl` segundos y los inválidos
+    `negative_ttl` (caché negativa, para que un token malo repetido no pegue
+    a DynamoDB en cada request). Los errores internos no se cachean.
+
+    logout_usuario borra el token uuid de tokens_acceso, pero los
+    contenedores calientes que ya lo tienen en caché lo siguen aceptando
+    hasta `ttl` segundos más (AUTH_CACHE_TTL_SECONDS). Es la misma ventana
+    que tienen los tokens firmados con REVOCATION_REFRESH_SECONDS (ver
+    alerta_common.revocation); con 0 el logout se ve en el acto.
+    """
+
+    def __init__(
+        self,
+        ttl=AUTH_CACHE_TTL_SECONDS,
+        negative_ttl=AUTH_CACHE_NEGATIVE_TTL_SECONDS,
+        max_entries=AUTH_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # token -> (expira, user_info, error)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        entry = self._items.get(token)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._items[token]
+            self.misses += 1
+            return None
+        self._items.move_to_end(token)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, token, user_info, error):
+        ttl = self.negative_ttl if error else self.ttl
+        if ttl <= 0:
+            return
+        self._items[token] = (time.monotonic() + ttl, user_info, error)
+        self._items.move_to_end(token)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def invalidate(self, token):
+        self._items.pop(token, None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
+
+
+token_cache = TokenCache()
+
+_revocation_list = None
+
+
+def _get_revocation_list():
+    global _revocation_list
+    if _revocation_list is None and REVOKED_TOKENS_TABLE:
+        _revocation_list = RevocationList(
+            table(REVOKED_TOKENS_TABLE)
+        )
+    return _revocation_list
+
+
+def _verificar_token_firmado(token):
+    """Token firmado: todo se resuelve en memoria, sin GetItem."""
+    claims, error = verificar(token)
+    if error:
+        return None, ERROR_TOKEN_INVALIDO
+
+    revocados = _get_revocation_list()
+    try:
+        if revocados and revocados.is_revoked(claims.get("jti")):
+            return None, ERROR_TOKEN_INVALIDO
+    except Exception as e:
+        print("Error leyendo tokens_revocados:", e)
+        return None, ERROR_LEYENDO_REVOCADOS
+
+    user_info = {
+        "email": claims["email"],
+        "rol": claims.get("rol"),
+        "area": claims.get("area"),
+        "jti": claims.get("jti"),
+        "exp": claims.get("exp"),
+    }
+    return user_info, None
+
+
+def _resolver_token(token, tokens_table, usuarios_table):
+    try:
+        res_token = tokens_table.get_item(Key={"token": token})
+    except ClientError as e:
+        print("Error leyendo tokens_acceso:", e)
+        return None, ERROR_LEYENDO_TOKENS
+
+    token_item = res_token.get("Item")
+    if not token_item:
+        return None, ERROR_TOKEN_INVALIDO
+
+    email = token_item.get("email")
+    if not email:
+        return None, ERROR_TOKEN_SIN_EMAIL
+
+    try:
+        res_user = usuarios_table.get_item(Key={"email": email})
+    except ClientError as e:
+        print("Error leyendo tabla_usuarios:", e)
+        return None, ERROR_LEYENDO_USUARIOS
+
+    user = res_user.get("Item")
+    user_info = {
+        "email": email,
+        "rol": (user or {}).get("rol") or token_item.get("rol"),
+        "area": (user or {}).get("area"),
+    }
+    if not user:
+        # validarToken igual responde con lo que trae el token
+        return user_info, ERROR_USUARIO_NO_ENCONTRADO
+
+    return user_info, None
+
+
+def validar_token_y_obtener_usuario(token, tokens_table, usuarios_table):
+    """
+    Devuelve (user_info, error). Los tokens firmados se verifican en
+    memoria; los uuid viejos van a DynamoDB, pero si ya se resolvieron hace
+    poco en este contenedor sale de la caché.
+    """
+    if es_token_firmado(token):
+        return _verificar_token_firmado(token)
+
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    user_info, error = _resolver_token(token, tokens_table, usuarios_table)
+    if error not in ERRORES_INTERNOS:
+        token_cache.put(token, user_info, error)
+
+    print("Auth cache:", token_cache.stats())
+    return user_info, error
+
+
+def rol_permitido(route_key, rol):
+    roles = ROLES_POR_RUTA.get(route_key)
+    return roles is None or (rol or "").lower() in roles
+
+
+def identidad_desde_autorizador(event):
+    """
+    user_info que dejó el autorizador HTTP API en el request context
+    (respuestas simples, payload 2.0). None si la ruta no tiene autorizador.
+    """
+    ctx = ((event.get("requestContext") or {}).get("authorizer") or {}).get("lambda")
+    if not ctx or not ctx.get("email"):
+        return None
+    return {
+        "email": ctx.get("email"),
+        "rol": ctx.get("rol"),
+        "area": ctx.get("area"),
+    }
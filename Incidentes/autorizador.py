@@ -0,0 +1,62 @@
+import os
+import traceback
+
+from alerta_common.clients import table
+from alerta_common.signed_tokens import extract_token_from_headers
+from auth import (
+    rol_permitido,
+    validar_token_y_obtener_usuario,
+)
+
+USUARIOS_TABLE = os.environ["USUARIOS_TABLE"]
+TOKENS_TABLE = os.environ["TOKENS_TABLE"]
+
+usuarios_table = table(USUARIOS_TABLE)
+tokens_table = table(TOKENS_TABLE)
+
+
+def _denegar():
+    return {"isAuthorized": False}
+
+
+def lambda_handler(event, context):
+    """
+    Autorizador Lambda de HTTP API (payload 2.0, respuestas simples).
+
+    API Gateway cachea la respuesta por (Authorization, routeKey) durante
+    resultTtlInSeconds, así que en ese tiempo los handlers ni siquiera
+    invocan este Lambda. Los handlers leen email/rol/area de
+    requestContext.authorizer.lambda.
+    """
+    route_key = event.get("routeKey")
+    print("Event autorizador:", route_key)
+
+    try:
+        token = extract_token_from_headers(event.get("headers"))
+        if not token:
+            return _denegar()
+
+        user_info, error = validar_token_y_obtener_usuario(
+            token, tokens_table, usuarios_table
+        )
+        if error:
+            print("Token rechazado:", error)
+            return _denegar()
+
+        if not rol_permitido(route_key, user_info.get("rol")):
+            print(f"Rol {user_info.get('rol')} sin permiso para {route_key}")
+            return _denegar()
+
+        return {
+            "isAuthorized": True,
+            "context": {
+                "email": user_info.get("email") or "",
+                "rol": user_info.get("rol") or "",
+                "area": user_info.get("area") or "",
+            },
+        }
+
+    except Exception as e:
+        print("ERROR NO CONTROLADO en autorizador:", str(e))
+        print(traceback.format_exc())
+        return _denegar()
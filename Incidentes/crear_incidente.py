@@ -1,11 +1,19 @@
 import json
 import os
 import uuid
-import boto3
 import traceback
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+from alerta_common.clients import table
+from alerta_common.dynamo_json import dumps
+from alerta_common.prioridad import atributos_de_prioridad
+from alerta_common.signed_tokens import extract_token_from_headers
+from auth import (
+    identidad_desde_autorizador,
+    validar_token_y_obtener_usuario,
+)
+
 
 def _response(status_code, body):
     return {
@@ -16,7 +24,7 @@ def _response(status_code, body):
             "Access-Control-Allow-Headers": "*",
             "Access-Control-Allow-Methods": "OPTIONS,POST,DELETE",
         },
-        "body": json.dumps(body),
+        "body": dumps(body),
     }
 
 
@@ -33,81 +41,40 @@ def _get_dynamodb_tables():
             f"TOKENS_TABLE={tokens_table_name}"
         )
 
-    dynamodb = boto3.resource("dynamodb")
+    # Tablas cacheadas por contenedor: las invocaciones calientes reutilizan
+    # la sesión y las conexiones del pool
     return (
-        dynamodb.Table(incidentes_table_name),
-        dynamodb.Table(usuarios_table_name),
-        dynamodb.Table(tokens_table_name),
+        table(incidentes_table_name),
+        table(usuarios_table_name),
+        table(tokens_table_name),
     )
 
 
-def _extract_token_from_headers(headers: dict | None):
-    if not headers:
-        return None
-
-    # En HTTP API los headers suelen venir en minúsculas
-    auth = headers.get("authorization") or headers.get("Authorization")
-    if not auth:
-        return None
-
-    if auth.lower().startswith("bearer "):
-        return auth[7:]
-    return auth
-
-
-def _validar_token_y_obtener_usuario(token, tokens_table, usuarios_table):
-    try:
-        res_token = tokens_table.get_item(Key={"token": token})
-    except ClientError as e:
-        print("Error leyendo tokens_acceso:", e)
-        return None, "Error interno leyendo tokens"
-
-    token_item = res_token.get("Item")
-    if not token_item:
-        return None, "Token inválido o expirado"
-
-    email = token_item.get("email")
-    if not email:
-        return None, "Token inválido (sin email)"
-
-    try:
-        res_user = usuarios_table.get_item(Key={"email": email})
-    except ClientError as e:
-        print("Error leyendo tabla_usuarios:", e)
-        return None, "Error interno leyendo usuarios"
-
-    user = res_user.get("Item")
-    if not user:
-        return None, "Usuario asociado al token no encontrado"
-
-    user_info = {
-        "email": email,
-        "rol": user.get("rol") or token_item.get("rol"),
-        "area": user.get("area"),
-    }
-    return user_info, None
-
-
 def lambda_handler(event, context):
     print("Event crearIncidente:", json.dumps(event))
 
     try:
         incidentes_table, usuarios_table, tokens_table = _get_dynamodb_tables()
 
-        # Token desde el header
-        token = _extract_token_from_headers(event.get("headers"))
-        if not token:
-            return _response(
-                401,
-                {"message": "Falta header Authorization con el token"},
+        # Identidad que ya resolvió el autorizador de API Gateway; si la ruta
+        # no lo tiene (p.ej. invocación directa) se valida el token aquí
+        user_info = identidad_desde_autorizador(event)
+
+        if user_info is None:
+            # Token desde el header
+            token = extract_token_from_headers(event.get("headers"))
+            if not token:
+                return _response(
+                    401,
+                    {"message": "Falta header Authorization con el token"},
+                )
+
+            # Validar token + obtener usuario
+            user_info, error = validar_token_y_obtener_usuario(
+                token, tokens_table, usuarios_table
             )
-
-        # Validar token + obtener usuario
-        user_info, error = _validar_token_y_obtener_usuario(
-            token, tokens_table, usuarios_table
-        )
-        if error:
-            return _response(401, {"message": error})
+            if error:
+                return _response(401, {"message": error})
 
         # Body con datos del incidente
         try:
@@ -118,7 +85,8 @@ def lambda_handler(event, context):
         estado = body.get("estado")
         nivel = body.get("nivelDeGravedad")
 
-        if not estado or not nivel:
+        # Son claves de GSI: tienen que ser strings no vacíos
+        if not (isinstance(estado, str) and estado and isinstance(nivel, str) and nivel):
             return _response(
                 400,
                 {
@@ -142,10 +110,18 @@ def lambda_handler(event, context):
             "ubicacion": ubicacion,
             "piso": piso,
             "categoria": categoria,
-            "areaResponsable": user_info.get("area") or "",
             "createdAt": now,
+            # Un alta también es un cambio: entra al índice
+            # abiertos-actualizados-index del DAG de Airflow
+            "updatedAt": now,
             "createdByEmail": user_info.get("email"),
         }
+        # DynamoDB no acepta "" en una clave de GSI: sin área el incidente
+        # simplemente no entra en areaResponsable-createdAt-index
+        if user_info.get("area"):
+            item["areaResponsable"] = user_info["area"]
+        # prioridadKey / abierto para el top-N del panel admin
+        item.update(atributos_de_prioridad(item))
 
         try:
             incidentes_table.put_item(Item=item)
@@ -1,8 +1,15 @@
 import json
 import os
-import boto3
 import traceback
-from botocore.exceptions import ClientError
+
+from alerta_common.clients import table
+from alerta_common.dynamo_json import dumps
+from alerta_common.signed_tokens import extract_token_from_headers
+from auth import (
+    ERROR_USUARIO_NO_ENCONTRADO,
+    ERRORES_INTERNOS,
+    validar_token_y_obtener_usuario,
+)
 
 
 def _response(status_code, body):
@@ -14,7 +21,7 @@ def _response(status_code, body):
             "Access-Control-Allow-Headers": "*",
             "Access-Control-Allow-Methods": "OPTIONS,POST,DELETE",
         },
-        "body": json.dumps(body),
+        "body": dumps(body),
     }
 
 
@@ -29,67 +36,40 @@ def _get_dynamodb_tables():
             f"TOKENS_TABLE={tokens_table_name}"
         )
 
-    dynamodb = boto3.resource("dynamodb")
     return (
-        dynamodb.Table(usuarios_table_name),
-        dynamodb.Table(tokens_table_name),
+        table(usuarios_table_name),
+        table(tokens_table_name),
     )
 
 
-def _extract_token_from_headers(headers: dict | None):
-    if not headers:
-        return None
-
-    auth = headers.get("authorization") or headers.get("Authorization")
-    if not auth:
-        return None
-
-    if auth.lower().startswith("bearer "):
-        return auth[7:]
-    return auth
-
-
 def lambda_handler(event, context):
     print("Event validarToken:", json.dumps(event))
 
     try:
         usuarios_table, tokens_table = _get_dynamodb_tables()
 
-        token = _extract_token_from_headers(event.get("headers"))
+        token = extract_token_from_headers(event.get("headers"))
         if not token:
             return _response(
                 400,
                 {"message": "Falta header Authorization con el token"},
             )
 
-        try:
-            res_token = tokens_table.get_item(Key={"token": token})
-        except ClientError as e:
-            print("Error leyendo tokens_acceso:", e)
-            return _response(500, {"message": "Error interno leyendo tokens"})
-
-        token_item = res_token.get("Item")
-        if not token_item:
+        user_info, error = validar_token_y_obtener_usuario(
+            token, tokens_table, usuarios_table
+        )
+        if error in ERRORES_INTERNOS:
+            return _response(500, {"message": error})
+        if error and error != ERROR_USUARIO_NO_ENCONTRADO:
             return _response(200, {"valido": False})
 
-        email = token_item.get("email")
-        rol_token = token_item.get("rol")
-
-        try:
-            res_user = usuarios_table.get_item(Key={"email": email})
-        except ClientError as e:
-            print("Error leyendo tabla_usuarios:", e)
-            return _response(500, {"message": "Error interno leyendo usuarios"})
-
-        user = res_user.get("Item") or {}
-
         return _response(
             200,
             {
                 "valido": True,
-                "email": email,
-                "rol": user.get("rol") or rol_token,
-                "area": user.get("area"),
+                "email": user_info.get("email"),
+                "rol": user_info.get("rol"),
+                "area": user_info.get("area"),
             },
         )
 
@@ -3,31 +3,134 @@ import os
 import json
 import requests
 import boto3
+from boto3.dynamodb.conditions import Key
 
 from airflow import DAG
+from airflow.models import Variable
 from airflow.operators.python import PythonOperator
 
 # Estas URLs las puedes poner como Variables de Airflow o como env vars luego.
 API_BASE = os.environ.get("INCIDENTES_API_BASE")  # p.ej. https://<id>.execute-api.us-east-1.amazonaws.com
-ADMIN_API_BASE = os.environ.get("ADMIN_API_BASE")  # p.ej. https://<id>.execute-api.us-east-1.amazonaws.com
+# Token de un usuario de servicio: PUT /incidentes/{id}/estado pasa por el autorizador
+API_TOKEN = os.environ.get("INCIDENTES_API_TOKEN")
 
 AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
 
 dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
 INCIDENTES_TABLE_NAME = os.environ.get("INCIDENTES_TABLE_NAME", "Incidentes")
+incidentes_table = dynamodb.Table(INCIDENTES_TABLE_NAME)
+
+# Índices dispersos de abiertos (abierto="1"), ver Incidentes/serverless.yml
+INDICE_ACTUALIZADOS = "abiertos-actualizados-index"   # (abierto, updatedAt)
+INDICE_ABIERTOS = "abiertos-prioridad-index"          # (abierto, prioridadKey)
+ABIERTO = "1"
+
+# Marca de agua: el updatedAt más nuevo que ya se procesó. Se guarda en una
+# Variable de Airflow, o en un archivo si se define INCIDENTES_ESTADO_PATH
+ESTADO_VARIABLE = os.environ.get("INCIDENTES_ESTADO_VARIABLE", "incidentes_dag_estado")
+ESTADO_PATH = os.environ.get("INCIDENTES_ESTADO_PATH")
+# Cuánto antes de la marca se vuelve a leer: un cambio escrito con un
+# updatedAt apenas anterior puede llegar al GSI después de la corrida
+SOLAPE = timedelta(minutes=int(os.environ.get("INCIDENTES_SOLAPE_MINUTOS", "5")))
+# Cada cuánto se recorren todos los abiertos: recupera lo que se le haya
+# escapado al incremental y los incidentes creados antes de que el alta
+# guardara updatedAt (no están en el índice de actualizados)
+RECONCILIACION = timedelta(hours=int(os.environ.get("INCIDENTES_RECONCILIACION_HORAS", "24")))
+
+
+def _leer_estado():
+    if ESTADO_PATH:
+        try:
+            with open(ESTADO_PATH) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+    return Variable.get(ESTADO_VARIABLE, default_var={}, deserialize_json=True)
+
+
+def _guardar_estado(estado):
+    if ESTADO_PATH:
+        with open(ESTADO_PATH, "w") as f:
+            json.dump(estado, f)
+        return
+    Variable.set(ESTADO_VARIABLE, estado, serialize_json=True)
+
+
+def _marca(inc):
+    # Incidentes anteriores a updatedAt en el alta solo tienen createdAt
+    return inc.get("updatedAt") or inc.get("createdAt") or ""
+
+
+def _query_abiertos(indice, desde=None):
+    kwargs = {"IndexName": indice, "KeyConditionExpression": Key("abierto").eq(ABIERTO)}
+    if desde:
+        kwargs["KeyConditionExpression"] &= Key("updatedAt").gt(desde)
+    items = []
+    while True:
+        resp = incidentes_table.query(**kwargs)
+        items.extend(resp.get("Items", []))
+        if "LastEvaluatedKey" not in resp:
+            return items
+        kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _a_json(valor):
+    # Decimal de DynamoDB -> int/float para XCom
+    return json.loads(json.dumps(valor, default=lambda d: int(d) if d == int(d) else float(d)))
 
 
 def fetch_open_incidents(**context):
     """
-    Llama a tu endpoint de admin para traer incidentes activos (no cerrados).
-    GET /admin/incidentes
+    Trae los incidentes abiertos que cambiaron desde la última corrida
+    exitosa (Query por updatedAt > marca - SOLAPE), o todos los abiertos
+    si toca reconciliación completa (cada RECONCILIACION, la primera vez o
+    con {"completa": true} en la conf del dag_run).
+
+    Cada incidente va con "_nuevo": si es un cambio que ninguna corrida
+    anterior vio (solo esos se notifican). El estado candidato queda en
+    XCom ("estado") y commit_watermark lo guarda si todo el DAG termina bien.
     """
-    url = f"{ADMIN_API_BASE}/admin/incidentes"
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
+    estado = _leer_estado()
+    marca = estado.get("watermark")
+    vistos = estado.get("vistos", {})
+    ahora = datetime.utcnow()
+
+    ultima_completa = estado.get("ultimaCompleta")
+    conf = (context.get("dag_run") and context["dag_run"].conf) or {}
+    completa = (
+        not marca
+        or not ultima_completa
+        or ahora - datetime.fromisoformat(ultima_completa) >= RECONCILIACION
+        or bool(conf.get("completa"))
+    )
+
+    corte = (datetime.fromisoformat(marca) - SOLAPE).isoformat() if marca else None
+    if completa:
+        items = _query_abiertos(INDICE_ABIERTOS)
+    else:
+        items = _query_abiertos(INDICE_ACTUALIZADOS, desde=corte)
+
+    incidentes = []
+    for inc in items:
+        # Ya procesado en el solape (o es el eco de nuestro propio PUT)
+        if vistos.get(inc["id"]) == _marca(inc):
+            continue
+        inc["_nuevo"] = corte is None or _marca(inc) > corte
+        incidentes.append(inc)
+
+    nueva_marca = max([marca or ""] + [_marca(i) for i in incidentes])
+    context["ti"].xcom_push(key="estado", value={
+        "watermark": nueva_marca or None,
+        "vistos": dict(vistos, **{i["id"]: _marca(i) for i in incidentes}),
+        "ultimaCompleta": ahora.isoformat() if completa else ultima_completa,
+    })
+    print(
+        f"{'Reconciliación completa' if completa else f'Incremental desde {corte}'}: "
+        f"{len(items)} leídos, {len(incidentes)} a procesar, "
+        f"{sum(i['_nuevo'] for i in incidentes)} cambios nuevos"
+    )
     # Guardamos en XCom para las siguientes tareas
-    return data.get("items", [])
+    return _a_json(incidentes)
 
 
 def auto_classify(incidentes, **context):
@@ -58,7 +161,12 @@ def update_incidents_in_api(incidentes, **context):
     Llama a tu endpoint de actualizar estado/nivel para aplicar la clasificación.
     PUT /incidentes/{id}/estado
     Solo actualizamos si el nivel sugerido es diferente.
+
+    Cada PUT cambia updatedAt, así que devuelve [id, updatedAt] de lo que
+    escribió: commit_watermark los marca como vistos para que la próxima
+    corrida no los tome como cambios nuevos.
     """
+    propios = []
     for inc in incidentes:
         incidente_id = inc.get("id")
         actual = inc.get("nivelDeGravedad")
@@ -78,9 +186,16 @@ def update_incidents_in_api(incidentes, **context):
             "categoria": inc.get("categoria", ""),
         }
         print(f"Actualizando incidente {incidente_id} -> {sugerido}")
-        resp = requests.put(url, json=body, timeout=10)
+        headers = {"Authorization": f"Bearer {API_TOKEN}"} if API_TOKEN else {}
+        resp = requests.put(url, json=body, headers=headers, timeout=10)
         if resp.status_code >= 300:
             print(f"Error actualizando incidente {incidente_id}: {resp.status_code} {resp.text}")
+            continue
+        actualizado = (resp.json().get("incidente") or {}).get("updatedAt")
+        if actualizado:
+            propios.append([incidente_id, actualizado])
+
+    return propios
 
 
 def send_high_severity_notifications(incidentes, **context):
@@ -88,7 +203,12 @@ def send_high_severity_notifications(incidentes, **context):
     Ejemplo: para incidentes con nivel Alta, podrías mandar correo o SMS.
     Aquí solo esqueleto: en la práctica llamarías SES/SNS o una Lambda tuya.
     """
-    altos = [i for i in incidentes if i.get("nivelDeGravedad_sugerido") == "Alta"]
+    # Solo cambios que ninguna corrida anterior vio: en la reconciliación
+    # completa no se vuelve a avisar por lo que ya se notificó
+    altos = [
+        i for i in incidentes
+        if i.get("nivelDeGravedad_sugerido") == "Alta" and i.get("_nuevo", True)
+    ]
     if not altos:
         print("No hay incidentes de alta gravedad para notificar.")
         return
@@ -102,6 +222,28 @@ def send_high_severity_notifications(incidentes, **context):
         # De momento, solo dejamos el print para el hackathon.
 
 
+def commit_watermark(**context):
+    """
+    Guarda la marca de agua que calculó fetch_open_incidents. Corre solo si
+    todas las tareas anteriores terminaron bien; si algo falla, la próxima
+    corrida vuelve a leer desde la marca anterior.
+    """
+    ti = context["ti"]
+    estado = ti.xcom_pull(task_ids="fetch_open_incidents", key="estado")
+    propios = ti.xcom_pull(task_ids="update_incidents_in_api") or []
+
+    vistos = dict(estado["vistos"], **dict(propios))
+    # Lo que ya quedó antes del solape no se vuelve a leer: no hace falta
+    # recordarlo
+    if estado["watermark"]:
+        corte = (datetime.fromisoformat(estado["watermark"]) - SOLAPE).isoformat()
+        vistos = {i: marca for i, marca in vistos.items() if marca > corte}
+    estado["vistos"] = vistos
+
+    _guardar_estado(estado)
+    print(f"Marca de agua: {estado['watermark']} ({len(vistos)} vistos en el solape)")
+
+
 default_args = {
     "owner": "alerta-utec",
     "depends_on_past": False,
@@ -116,6 +258,10 @@ with DAG(
     schedule_interval="*/10 * * * *",  # cada 10 minutos (ajusta según quieras)
     start_date=datetime(2025, 11, 16),
     catchup=False,
+    # Los xcom_pull de op_kwargs llegan como listas, no como su str()
+    render_template_as_native_obj=True,
+    # Dos corridas a la vez leerían y guardarían la misma marca
+    max_active_runs=1,
     tags=["incidentes", "alerta-utec"],
 ) as dag:
 
@@ -142,4 +288,9 @@ with DAG(
         op_kwargs={"incidentes": "{{ ti.xcom_pull(task_ids='auto_classify_incidents') }}"},
     )
 
-    tarea_fetch >> tarea_clasificar >> [tarea_actualizar, tarea_notificar]
+    tarea_marca = PythonOperator(
+        task_id="commit_watermark",
+        python_callable=commit_watermark,
+    )
+
+    tarea_fetch >> tarea_clasificar >> [tarea_actualizar, tarea_notificar] >> tarea_marca
@@ -0,0 +1,6 @@
+"""
+Código compartido entre los servicios de Alerta UTEC.
+
+Se despliega como Lambda layer (cada serverless.yml lo declara con
+`path: ../alerta-common`), así que en Lambda se importa como `alerta_common`.
+"""
@@ -0,0 +1,155 @@
+"""
+Contadores de /admin/incidentes/resumen mantenidos desde el stream.
+
+Se guardan en un solo ítem de la tabla de agregados (clave="resumen") con
+un atributo numérico por valor: "total", "estado#<valor>",
+"nivelDeGravedad#<valor>" y "areaResponsable#<valor>". Cada batch del
+stream se reduce a sus deltas netos y se aplica con un único UpdateItem
+con ADD, así que el endpoint lee todo con un GetItem.
+
+El mismo ítem lleva "version": cuántos cambios de Incidentes pasaron por el
+sink (se suma en ese mismo UpdateItem, aunque el batch no mueva ningún
+contador). Si no cambió, la tabla Incidentes tampoco; el panel admin la usa
+para el ETag de /admin/incidentes y /admin/incidentes/resumen.
+
+Los escribe el sink "resumen" del lector del stream (ver stream_pipeline);
+el panel admin y reconciliar_agregados.py lo usan para leerlos. Para que
+un reintento del stream no sume dos veces, el sink guarda una marca por
+incidente (clave="aplicado#<id>", ver alerta_common.idempotencia).
+"""
+from alerta_common.idempotencia import AplicadorIdempotente, update_add
+from alerta_common.stream_pipeline import Sink
+
+CLAVE_RESUMEN = "resumen"
+PREFIJO_MARCA = "aplicado#"
+VERSION = "version"
+DESCONOCIDO = "DESCONOCIDO"
+CONTADORES_POR_UPDATE = 100
+
+# atributo del incidente -> campo de la respuesta de /resumen
+DIMENSIONES = {
+    "estado": "porEstado",
+    "nivelDeGravedad": "porNivelDeGravedad",
+    "areaResponsable": "porAreaResponsable",
+}
+
+
+def _sumar(deltas, item, signo):
+    deltas["total"] = deltas.get("total", 0) + signo
+    for dimension in DIMENSIONES:
+        valor = item.get(dimension) or DESCONOCIDO
+        contador = f"{dimension}#{valor}"
+        deltas[contador] = deltas.get(contador, 0) + signo
+
+
+def deltas_de_cambios(cambios):
+    """
+    Deltas netos de un batch de stream_pipeline.Cambio: resta la imagen
+    vieja y suma la nueva (un MODIFY que no cambió ninguna dimensión se
+    cancela).
+    """
+    deltas = {}
+    for cambio in cambios:
+        if cambio.viejo:
+            _sumar(deltas, cambio.viejo, -1)
+        if cambio.nuevo:
+            _sumar(deltas, cambio.nuevo, +1)
+    return {contador: n for contador, n in deltas.items() if n}
+
+
+def contar(items, conteos=None):
+    """
+    Contadores absolutos de un conjunto de incidentes (para reconciliar).
+    Con `conteos` acumula sobre un dict existente.
+    """
+    conteos = {} if conteos is None else conteos
+    for item in items:
+        _sumar(conteos, item, +1)
+    return conteos
+
+
+def aplicar(table, deltas, clave=CLAVE_RESUMEN, cambios=0):
+    """
+    UpdateItem con ADD atómico de los contadores que cambiaron. Normalmente
+    es uno solo; se parte cada CONTADORES_POR_UPDATE para no pasar el límite
+    de 4 KB de la expresión cuando un batch toca muchas áreas. `cambios` se
+    suma a la versión en el primero.
+    """
+    pendientes = sorted(deltas.items())
+    if cambios:
+        pendientes.insert(0, (VERSION, cambios))
+    for inicio in range(0, len(pendientes), CONTADORES_POR_UPDATE):
+        nombres = {}
+        valores = {}
+        partes = []
+        for i, (contador, n) in enumerate(pendientes[inicio:inicio + CONTADORES_POR_UPDATE]):
+            nombres[f"#c{i}"] = contador
+            valores[f":v{i}"] = n
+            partes.append(f"#c{i} :v{i}")
+        table.update_item(
+            Key={"clave": clave},
+            UpdateExpression="ADD " + ", ".join(partes),
+            ExpressionAttributeNames=nombres,
+            ExpressionAttributeValues=valores,
+        )
+
+
+def contadores_de_item(item):
+    """Ítem de la tabla de agregados -> {contador: int}, sin ceros."""
+    return {
+        k: int(v)
+        for k, v in (item or {}).items()
+        if (k == "total" or "#" in k) and int(v) != 0
+    }
+
+
+def version_de_item(item):
+    """Versión del ítem de agregados, o None si el sink todavía no la escribió."""
+    version = (item or {}).get(VERSION)
+    return None if version is None else int(version)
+
+
+def conteos_por_dimension(contadores):
+    """{contador: int} -> {atributo: {valor: int}}, p.ej. para elegir índice."""
+    conteos = {dimension: {} for dimension in DIMENSIONES}
+    for contador, n in contadores.items():
+        dimension, _, valor = contador.partition("#")
+        if dimension in conteos:
+            conteos[dimension][valor] = n
+    return conteos
+
+
+def resumen_desde_contadores(contadores):
+    resumen = {"total": contadores.get("total", 0)}
+    for campo in DIMENSIONES.values():
+        resumen[campo] = {}
+    for contador, n in contadores.items():
+        dimension, _, valor = contador.partition("#")
+        if dimension in DIMENSIONES:
+            resumen[DIMENSIONES[dimension]][valor] = n
+    return resumen
+
+
+def _clave_marca(incidente_id):
+    return {"clave": PREFIJO_MARCA + incidente_id}
+
+
+class ResumenSink(Sink):
+    """
+    Aplica los deltas netos de los cambios que todavía no sumó y sube la
+    versión en la misma transacción que las marcas de esos incidentes. Un
+    batch reentregado no mueve los contadores ni la versión.
+    """
+
+    nombre = "resumen"
+
+    def __init__(self, table):
+        self.table = table
+        self._aplicador = AplicadorIdempotente(table, _clave_marca, self._updates)
+
+    def _updates(self, cambios):
+        contadores = dict(deltas_de_cambios(cambios), **{VERSION: len(cambios)})
+        return [update_add(self.table.name, {"clave": CLAVE_RESUMEN}, contadores)]
+
+    def procesar(self, cambios):
+        self._aplicador.aplicar(cambios)
@@ -0,0 +1,109 @@
+"""
+Escrituras en lote con BatchWriteItem que informan qué falló.
+
+table.batch_writer() reintenta los UnprocessedItems pero no dice cuáles
+se quedaron sin escribir, y eso es justo lo que necesita un consumidor de
+stream para devolver batchItemFailures. Aquí cada PutRequest lleva una
+etiqueta (p.ej. el SequenceNumber del record que lo generó) y el resultado
+son las etiquetas que no se pudieron escribir después de reintentar con
+backoff exponencial.
+
+    fallidos = escribir(client, "t_historial", [(seq, item), ...], ["incidenteId", "changedAt"])
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeSerializer
+
+ITEMS_POR_LOTE = 25  # límite de BatchWriteItem
+MAX_INTENTOS = 6
+BACKOFF_BASE_S = 0.05
+BACKOFF_MAX_S = 2.0
+
+_serializer = TypeSerializer()
+
+
+def _clave(item, atributos_clave):
+    return tuple(item[a] for a in atributos_clave)
+
+
+def _lotes(pendientes, atributos_clave):
+    """
+    Lotes de hasta 25 sin claves repetidas (BatchWriteItem rechaza el lote
+    entero si dos requests tocan el mismo ítem).
+    """
+    lote, claves = [], set()
+    for etiqueta, item in pendientes:
+        clave = _clave(item, atributos_clave)
+        if len(lote) == ITEMS_POR_LOTE or clave in claves:
+            yield lote
+            lote, claves = [], set()
+        lote.append((etiqueta, item))
+        claves.add(clave)
+    if lote:
+        yield lote
+
+
+def _esperar(intento):
+    # Full jitter: entre 0 y base * 2^intento, con tope
+    time.sleep(random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** intento)))
+
+
+def _escribir_lote(client, table_name, lote, atributos_clave, max_intentos):
+    """Escribe un lote; devuelve las etiquetas que quedaron sin escribir."""
+    por_clave = {_clave(item, atributos_clave): etiqueta for etiqueta, item in lote}
+    requests = [
+        {"PutRequest": {"Item": {k: _serializer.serialize(v) for k, v in item.items()}}}
+        for _, item in lote
+    ]
+    for intento in range(max_intentos):
+        if intento:
+            _esperar(intento)
+        try:
+            resp = client.batch_write_item(RequestItems={table_name: requests})
+        except ClientError as e:
+            # botocore ya reintentó los throttles; lo que llega aquí
+            # (validación, permisos, ...) no se arregla reintentando
+            print(f"BatchWriteItem en {table_name} falló:", e)
+            return list(por_clave.values())
+        requests = resp.get("UnprocessedItems", {}).get(table_name, [])
+        if not requests:
+            return []
+
+    fallidos = []
+    for request in requests:
+        item = request["PutRequest"]["Item"]
+        clave = tuple(item[a][next(iter(item[a]))] for a in atributos_clave)
+        fallidos.append(por_clave.get(clave))
+    print(f"{len(fallidos)} ítems sin escribir en {table_name} tras {max_intentos} intentos")
+    return fallidos
+
+
+def escribir(client, table_name, pendientes, atributos_clave, max_intentos=MAX_INTENTOS, concurrencia=1):
+    """
+    Escribe [(etiqueta, item), ...] en `table_name` con BatchWriteItem y
+    devuelve las etiquetas que no se pudieron escribir, en el orden de
+    `pendientes`. Los lotes se mandan de a `concurrencia` a la vez.
+    """
+    pendientes = list(pendientes)
+    lotes = list(_lotes(pendientes, atributos_clave))
+    if not lotes:
+        return []
+
+    if concurrencia > 1 and len(lotes) > 1:
+        with ThreadPoolExecutor(max_workers=min(concurrencia, len(lotes))) as pool:
+            resultados = list(
+                pool.map(
+                    lambda lote: _escribir_lote(client, table_name, lote, atributos_clave, max_intentos),
+                    lotes,
+                )
+            )
+    else:
+        resultados = [
+            _escribir_lote(client, table_name, lote, atributos_clave, max_intentos) for lote in lotes
+        ]
+
+    fallidos = {etiqueta for resultado in resultados for etiqueta in resultado}
+    return [etiqueta for etiqueta, _ in pendientes if etiqueta in fallidos]
@@ -0,0 +1,134 @@
+"""
+DynamoDB JSON ({"S": "..."}, {"N": "12"}, ...) a valores de Python, y un
+json.dumps que entiende Decimal.
+
+TypeDeserializer resuelve cada atributo con getattr por tipo y pasa todos
+los números por un contexto Decimal; con imágenes del stream de cientos de
+records eso es lo que más CPU gasta al decodificar. a_python() resuelve los
+tipos comunes (S, N) con una o dos comparaciones y convierte los números
+como se le pida:
+
+- NUMEROS_DECIMAL: Decimal, sets como set y binarios como Binary; el
+  resultado es el mismo que el de TypeDeserializer y se puede volver a
+  escribir en DynamoDB (el pipeline del stream usa este).
+- NUMEROS_NATIVOS: int si el número es entero, si no float; sets como
+  listas y binarios en base64. Sale listo para json.dumps (respuestas HTTP).
+- NUMEROS_TEXTO: el número tal cual viene ("12.50"), sin perder precisión.
+
+dumps() usa el encoder en C de json y solo pasa a Python para lo que json
+no conoce (Decimal, set, bytes), así que los _response pueden recibir ítems
+leídos con boto3.resource sin convertirlos antes.
+"""
+import base64
+import json
+from decimal import Decimal
+
+from boto3.dynamodb.types import DYNAMODB_CONTEXT, Binary
+
+NUMEROS_DECIMAL = "decimal"
+NUMEROS_NATIVOS = "nativo"
+NUMEROS_TEXTO = "texto"
+
+
+def _numero_nativo(texto):
+    # Casi todos los números de Incidentes son enteros
+    try:
+        return int(texto)
+    except ValueError:
+        numero = float(texto)
+        return int(numero) if numero.is_integer() else numero
+
+
+def _binario_texto(valor):
+    # En los eventos del stream ya viene en base64; el cliente de boto3 da bytes
+    return valor if isinstance(valor, str) else base64.b64encode(valor).decode("ascii")
+
+
+def _convertidor(numeros):
+    if numeros == NUMEROS_DECIMAL:
+        numero = DYNAMODB_CONTEXT.create_decimal
+        binario = Binary
+        conjunto = set
+    elif numeros == NUMEROS_NATIVOS:
+        numero = _numero_nativo
+        binario = _binario_texto
+        conjunto = list
+    elif numeros == NUMEROS_TEXTO:
+        numero = str
+        binario = _binario_texto
+        conjunto = list
+    else:
+        raise ValueError(f"numeros debe ser {NUMEROS_DECIMAL}, {NUMEROS_NATIVOS} o {NUMEROS_TEXTO}")
+
+    def valor(atributo):
+        (tipo, v), = atributo.items()
+        if tipo == "S":
+            return v
+        if tipo == "N":
+            return numero(v)
+        if tipo == "BOOL":
+            return v
+        if tipo == "M":
+            return {k: valor(x) for k, x in v.items()}
+        if tipo == "L":
+            return [valor(x) for x in v]
+        if tipo == "NULL":
+            return None
+        if tipo == "SS":
+            return conjunto(v)
+        if tipo == "NS":
+            return conjunto(numero(x) for x in v)
+        if tipo == "B":
+            return binario(v)
+        if tipo == "BS":
+            return conjunto(binario(x) for x in v)
+        raise TypeError(f"Tipo de DynamoDB desconocido: {tipo}")
+
+    return valor
+
+
+_convertidores = {
+    NUMEROS_DECIMAL: _convertidor(NUMEROS_DECIMAL),
+    NUMEROS_NATIVOS: _convertidor(NUMEROS_NATIVOS),
+    NUMEROS_TEXTO: _convertidor(NUMEROS_TEXTO),
+}
+
+
+def a_python(imagen, numeros=NUMEROS_NATIVOS, campos=None):
+    """
+    Ítem en DynamoDB JSON ({atributo: {"S": ...}}) a dict. Con `campos`
+    solo se convierten esos atributos (los que no vienen se omiten).
+    Devuelve None si la imagen es None o vacía.
+    """
+    if not imagen:
+        return None
+    try:
+        valor = _convertidores[numeros]
+    except KeyError:
+        raise ValueError(f"numeros debe ser {NUMEROS_DECIMAL}, {NUMEROS_NATIVOS} o {NUMEROS_TEXTO}")
+    if campos is None:
+        return {k: valor(v) for k, v in imagen.items()}
+    return {k: valor(imagen[k]) for k in campos if k in imagen}
+
+
+def _por_defecto(valor):
+    if isinstance(valor, Decimal):
+        if valor == valor.to_integral_value():
+            return int(valor)
+        return float(valor)
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    if isinstance(valor, Binary):
+        valor = valor.value
+    if isinstance(valor, (bytes, bytearray)):
+        return base64.b64encode(valor).decode("ascii")
+    raise TypeError(f"{type(valor).__name__} no se puede pasar a JSON")
+
+
+_encoder = json.JSONEncoder(default=_por_defecto)
+_encoder_compacto = json.JSONEncoder(default=_por_defecto, separators=(",", ":"))
+
+
+def dumps(valor, compacto=False):
+    """json.dumps que acepta Decimal, set y binarios (ítems de boto3)."""
+    return (_encoder_compacto if compacto else _encoder).encode(valor)
@@ -0,0 +1,123 @@
+"""
+Filas de t_historial a partir del stream de Incidentes (sink "historial").
+
+Una fila por alta, cambio de estado o baja de un incidente:
+
+    incidenteId  (PK)
+    changedAt    (SK) "<ApproximateCreationDateTime ISO>#<SequenceNumber con padding>"
+    evento, motivo, seq, estado, estadoAnterior, actor, + CAMPOS_COPIADOS
+
+La clave sale del record, así que reprocesar un cambio reescribe la misma
+fila con el mismo contenido en vez de agregar otra. BatchWriteItem no
+acepta condiciones; un PutItem condicional que falla consume la misma
+capacidad que esta reescritura idéntica, así que no hay nada que ganar
+partiendo el lote en puts sueltos.
+"""
+import os
+from datetime import datetime
+
+from alerta_common.batch_write import escribir
+from alerta_common.stream_pipeline import Sink
+
+# Lotes de BatchWriteItem que se mandan a la vez (ráfagas de Airflow)
+ESCRITURAS_CONCURRENTES = int(os.environ.get("HISTORIAL_ESCRITURAS_CONCURRENTES", "4"))
+
+# Atributos del incidente que se copian en cada fila de historial
+CAMPOS_COPIADOS = ["nivelDeGravedad", "areaResponsable", "categoria", "piso", "createdAt"]
+
+SEQ_DIGITOS = 40
+
+
+def changed_at(cambio, item):
+    """
+    Sort key determinística: cuándo se hizo el cambio (según el stream) +
+    SequenceNumber con ceros a la izquierda, así dos cambios del mismo
+    segundo no se pisan y quedan en orden.
+    """
+    if cambio.fecha is not None:
+        fecha = datetime.utcfromtimestamp(float(cambio.fecha)).isoformat(timespec="milliseconds")
+    else:
+        # Eventos armados a mano (pruebas): lo más cercano al cambio real
+        fecha = item.get("updatedAt") or item["createdAt"]
+    return f"{fecha}#{str(cambio.seq).zfill(SEQ_DIGITOS)}"
+
+
+def fila_historial(cambio):
+    """Fila de t_historial para un Cambio, o None si no corresponde registrarlo."""
+    if cambio.evento == "INSERT":
+        # Log inicial del incidente
+        return _fila(cambio, motivo="CREADO")
+
+    if cambio.evento == "MODIFY":
+        # Solo registramos si cambió el estado
+        if (cambio.nuevo or {}).get("estado") != (cambio.viejo or {}).get("estado"):
+            return _fila(cambio, motivo="CAMBIO_ESTADO")
+        return None
+
+    if cambio.evento == "REMOVE":
+        return _fila(cambio, motivo="ELIMINADO")
+
+    return None
+
+
+def _fila(cambio, motivo):
+    item = cambio.imagen
+    if not item:
+        return None
+
+    # Item acorde a la tabla t_historial: PK + SK. Lleva todo lo que
+    # necesitan los jobs de abajo para no releer Incidentes
+    fila = {
+        "incidenteId": item.get("id"),           # Partition key
+        "changedAt": changed_at(cambio, item),   # Sort key
+        "evento": cambio.evento,
+        "motivo": motivo,
+        "seq": cambio.seq,
+        "estado": item.get("estado"),
+    }
+    if cambio.viejo and cambio.nuevo:
+        fila["estadoAnterior"] = cambio.viejo.get("estado")
+
+    # Quién: el creador en INSERT, el último que lo actualizó en MODIFY.
+    # Un REMOVE no trae quién borró (la imagen es la de antes del borrado)
+    if motivo == "CREADO":
+        fila["actor"] = item.get("createdByEmail")
+    elif motivo == "CAMBIO_ESTADO":
+        fila["actor"] = item.get("updatedBy")
+
+    for atributo in CAMPOS_COPIADOS:
+        fila[atributo] = item.get(atributo)
+
+    # Los que no vienen en la imagen no se guardan
+    return {k: v for k, v in fila.items() if v is not None}
+
+
+class HistorialSink(Sink):
+    """
+    Escribe las filas del batch con BatchWriteItem (25 por request,
+    reintentando los UnprocessedItems con backoff) y devuelve los seq de
+    las que no se pudieron escribir.
+    """
+
+    nombre = "historial"
+
+    def __init__(self, client, table_name, concurrencia=ESCRITURAS_CONCURRENTES):
+        self.client = client
+        self.table_name = table_name
+        self.concurrencia = concurrencia
+
+    def procesar(self, cambios):
+        filas = []
+        for cambio in cambios:
+            fila = fila_historial(cambio)
+            if fila:
+                filas.append((cambio.seq, fila))
+        if not filas:
+            return []
+        return escribir(
+            self.client,
+            self.table_name,
+            filas,
+            ["incidenteId", "changedAt"],
+            concurrencia=self.concurrencia,
+        )
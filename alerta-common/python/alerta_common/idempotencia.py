@@ -0,0 +1,179 @@
+"""
+Contadores con ADD que no suman dos veces un cambio reentregado.
+
+Cuando un sink falla, Lambda reintenta desde ese record y el batch vuelve a
+pasar por TODOS los sinks (ver stream_pipeline), así que un sink de
+contadores ve otra vez cambios que ya sumó. Para no contarlos dos veces se
+guarda, en la misma tabla que los contadores, una "marca" por incidente
+con el último SequenceNumber aplicado:
+
+- antes de sumar se leen las marcas (BatchGetItem) y se descartan los
+  cambios con seq <= marca;
+- los ADD y las marcas nuevas van en una sola TransactWriteItems, así que
+  o se aplican juntos o no se aplica nada. Cada marca lleva la condición
+  "no existe o es menor", por si otro reintento se adelantó.
+
+Los cambios de un incidente van siempre por el mismo shard del stream y su
+SequenceNumber crece, así que basta una marca por incidente; el orden
+entre incidentes no importa. Las marcas expiran por TTL (expiraEn) cuando
+el stream ya no puede reentregar esos records.
+"""
+import random
+import time
+
+from botocore.exceptions import ClientError
+
+# Retención del stream (24 h) con margen
+MARCA_TTL_SECONDS = 2 * 86400
+SEQ_DIGITOS = 40
+# Límites de TransactWriteItems y de BatchGetItem
+ITEMS_POR_TRANSACCION = 100
+CLAVES_POR_LECTURA = 100
+# El mismo tope que agregados/tendencias.CONTADORES_POR_UPDATE
+CONTADORES_POR_UPDATE = 100
+INTENTOS = 4
+
+# Motivos de cancelación que se arreglan reintentando
+_REINTENTABLES = {"TransactionConflict", "ThrottlingError", "ProvisionedThroughputExceeded"}
+
+
+def seq_ordenable(seq):
+    """SequenceNumber con padding: así se compara bien como string."""
+    return str(seq).zfill(SEQ_DIGITOS)
+
+
+def update_add(table_name, key, contadores, extra_set=None, extra_valores=None):
+    """
+    Update de TransactWriteItems con ADD de {atributo: n}. `extra_set` se
+    agrega como SET (con sus valores en `extra_valores`).
+    """
+    nombres = {}
+    valores = dict(extra_valores or {})
+    partes = []
+    for i, (atributo, n) in enumerate(sorted(contadores.items())):
+        nombres[f"#c{i}"] = atributo
+        valores[f":v{i}"] = n
+        partes.append(f"#c{i} :v{i}")
+    expresion = "ADD " + ", ".join(partes)
+    if extra_set:
+        expresion += " SET " + extra_set
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": key,
+            "UpdateExpression": expresion,
+            "ExpressionAttributeNames": nombres,
+            "ExpressionAttributeValues": valores,
+        }
+    }
+
+
+class AplicadorIdempotente:
+    """
+    Aplica los cambios de un batch una sola vez por incidente.
+
+    `clave_marca(incidente_id)` da la Key del ítem de la marca y
+    `updates(cambios)` arma los Update de TransactWriteItems (con
+    update_add) para un grupo de cambios: a lo más uno por ítem, porque una
+    transacción no puede tocar dos veces el mismo.
+    """
+
+    def __init__(self, table, clave_marca, updates, ttl_seconds=MARCA_TTL_SECONDS):
+        self.table = table
+        self.client = table.meta.client
+        self.clave_marca = clave_marca
+        self.updates = updates
+        self.ttl_seconds = ttl_seconds
+
+    def _marcas(self, ids):
+        """{incidente_id: seq ya aplicado} de los que tienen marca."""
+        marcas = {}
+        claves = {_clave_hashable(self.clave_marca(i)): i for i in ids}
+        pendientes = [dict(clave) for clave in claves]
+        while pendientes:
+            lote, pendientes = pendientes[:CLAVES_POR_LECTURA], pendientes[CLAVES_POR_LECTURA:]
+            pedido = {self.table.name: {"Keys": lote, "ConsistentRead": True}}
+            while pedido:
+                resp = self.client.batch_get_item(RequestItems=pedido)
+                for item in resp.get("Responses", {}).get(self.table.name, []):
+                    clave = _clave_hashable({k: item[k] for k in lote[0]})
+                    marcas[claves[clave]] = item.get("seq")
+                pedido = resp.get("UnprocessedKeys") or None
+        return marcas
+
+    def _frescos(self, cambios):
+        """[(incidente_id, [cambios no aplicados])] en el orden del batch."""
+        grupos = {}
+        for cambio in cambios:
+            grupos.setdefault(cambio.incidente_id, []).append(cambio)
+        marcas = self._marcas([i for i in grupos if i is not None])
+        frescos = []
+        for incidente_id, grupo in grupos.items():
+            marca = marcas.get(incidente_id)
+            if marca is not None:
+                grupo = [c for c in grupo if c.seq is None or seq_ordenable(c.seq) > marca]
+            if grupo:
+                frescos.append((incidente_id, grupo))
+        return frescos
+
+    def _put_marca(self, incidente_id, grupo, expira_en):
+        seqs = [seq_ordenable(c.seq) for c in grupo if c.seq is not None]
+        if incidente_id is None or not seqs:
+            # Sin id o sin seq no hay con qué deduplicar: se aplica tal cual
+            return None
+        seq = max(seqs)
+        return {
+            "Put": {
+                "TableName": self.table.name,
+                "Item": dict(self.clave_marca(incidente_id), seq=seq, expiraEn=expira_en),
+                "ConditionExpression": "attribute_not_exists(seq) OR seq < :s",
+                "ExpressionAttributeValues": {":s": seq},
+            }
+        }
+
+    def aplicar(self, cambios):
+        """Devuelve cuántos cambios se aplicaron (los demás ya estaban)."""
+        expira_en = int(time.time()) + self.ttl_seconds
+        pendientes = [self._frescos(cambios)]
+        aplicados = 0
+        while pendientes:
+            parte = pendientes.pop()
+            if not parte:
+                continue
+            grupo_cambios = [c for _, grupo in parte for c in grupo]
+            updates = self.updates(grupo_cambios)
+            marcas = [self._put_marca(i, grupo, expira_en) for i, grupo in parte]
+            marcas = [m for m in marcas if m]
+            demasiado = len(updates) + len(marcas) > ITEMS_POR_TRANSACCION or any(
+                len(u["Update"]["ExpressionAttributeNames"]) > CONTADORES_POR_UPDATE
+                for u in updates
+            )
+            if demasiado and len(parte) > 1:
+                # Se parte por incidentes: cada mitad con sus marcas
+                mitad = len(parte) // 2
+                pendientes += [parte[mitad:], parte[:mitad]]
+                continue
+            if updates:
+                self._transaccion(updates + marcas)
+            aplicados += len(grupo_cambios)
+        return aplicados
+
+    def _transaccion(self, items):
+        for intento in range(INTENTOS):
+            try:
+                self.client.transact_write_items(TransactItems=items)
+                return
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+                motivos = {r.get("Code") for r in e.response.get("CancellationReasons", [])}
+                if not motivos & _REINTENTABLES or intento == INTENTOS - 1:
+                    # ConditionalCheckFailed: otra invocación ya aplicó una
+                    # marca más nueva. Se falla el batch y el reintento
+                    # vuelve a leer las marcas
+                    raise
+                time.sleep(0.05 * 2 ** intento * (1 + random.random()))
+
+
+def _clave_hashable(key):
+    return tuple(sorted(key.items()))
@@ -0,0 +1,226 @@
+"""
+Scan paralelo por segmentos para trabajos que recorren una tabla entera
+(reconciliaciones, backfills, exportaciones).
+
+La tabla se parte con Segment/TotalSegments y cada segmento lo lee un
+hilo; los ítems se entregan por un generador a medida que llegan. Los
+hilos pasan páginas enteras por una cola acotada (como mucho
+PAGINAS_EN_COLA_POR_SEGMENTO páginas de 1 MB por segmento), así que la
+memoria no depende del tamaño de la tabla. Se puede limitar el consumo de
+RCU por segundo y retomar desde un checkpoint.
+
+    for item in escanear(table, segmentos=8, proyeccion=["id", "estado"]):
+        ...
+"""
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from alerta_common.clients import dynamodb_resource_propio
+
+SEGMENTOS_POR_DEFECTO = 8
+PAGINAS_EN_COLA_POR_SEGMENTO = 2
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+_FIN_SEGMENTO = "fin"
+
+
+class Checkpoint:
+    """
+    Hasta dónde se consumió cada segmento: {segmento: ExclusiveStartKey} o
+    "fin" si ya terminó. Solo avanza cuando el consumidor ya recibió todos
+    los ítems de la página, así que retomar puede repetir como mucho una
+    página por segmento, nunca saltarse ítems.
+    """
+
+    def __init__(self, total_segmentos, posiciones=None):
+        self.total_segmentos = total_segmentos
+        self.posiciones = dict(posiciones or {})
+        self._lock = threading.Lock()
+
+    def terminado(self, segmento):
+        return self.posiciones.get(segmento) == _FIN_SEGMENTO
+
+    def inicio(self, segmento):
+        posicion = self.posiciones.get(segmento)
+        return None if posicion == _FIN_SEGMENTO else posicion
+
+    def avanzar(self, segmento, last_key):
+        with self._lock:
+            self.posiciones[segmento] = last_key or _FIN_SEGMENTO
+
+    @property
+    def completo(self):
+        return all(self.terminado(s) for s in range(self.total_segmentos))
+
+    def to_json(self):
+        # Las claves se guardan en DynamoDB JSON para no perder tipos (Decimal, Binary)
+        with self._lock:
+            posiciones = {
+                str(s): p if p == _FIN_SEGMENTO else {k: _serializer.serialize(v) for k, v in p.items()}
+                for s, p in self.posiciones.items()
+            }
+        return json.dumps({"totalSegmentos": self.total_segmentos, "posiciones": posiciones})
+
+    @classmethod
+    def from_json(cls, texto):
+        datos = json.loads(texto)
+        posiciones = {
+            int(s): p if p == _FIN_SEGMENTO else {k: _deserializer.deserialize(v) for k, v in p.items()}
+            for s, p in datos["posiciones"].items()
+        }
+        return cls(datos["totalSegmentos"], posiciones)
+
+
+class PresupuestoLectura:
+    """
+    Token bucket de RCU por segundo compartido por todos los segmentos. Se
+    descuenta lo que DynamoDB informa en ConsumedCapacity después de cada
+    página, así que puede quedar en negativo y los hilos esperan a que se
+    recupere.
+    """
+
+    def __init__(self, rcu_por_segundo):
+        self.rcu_por_segundo = float(rcu_por_segundo)
+        self.disponible = self.rcu_por_segundo
+        self.ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self, detener):
+        while not detener.is_set():
+            with self._lock:
+                ahora = time.monotonic()
+                self.disponible = min(
+                    self.rcu_por_segundo,
+                    self.disponible + (ahora - self.ultimo) * self.rcu_por_segundo,
+                )
+                self.ultimo = ahora
+                if self.disponible > 0:
+                    return
+                espera = -self.disponible / self.rcu_por_segundo
+            detener.wait(min(espera, 1.0))
+
+    def consumir(self, rcu):
+        with self._lock:
+            self.disponible -= rcu
+
+
+def _kwargs_base(proyeccion, filtro, consistente):
+    kwargs = {"ReturnConsumedCapacity": "TOTAL"}
+    if proyeccion:
+        nombres = {f"#p{i}": atributo for i, atributo in enumerate(proyeccion)}
+        kwargs["ProjectionExpression"] = ", ".join(nombres)
+        kwargs["ExpressionAttributeNames"] = nombres
+    if filtro is not None:
+        kwargs["FilterExpression"] = filtro
+    if consistente:
+        kwargs["ConsistentRead"] = True
+    return kwargs
+
+
+def escanear(
+    table,
+    segmentos=SEGMENTOS_POR_DEFECTO,
+    proyeccion=None,
+    filtro=None,
+    rcu_por_segundo=None,
+    checkpoint=None,
+    al_avanzar=None,
+    consistente=False,
+    limite_por_pagina=None,
+    tabla_para_hilo=None,
+):
+    """
+    Generador con todos los ítems de `table` (en cualquier orden). Cada hilo
+    lee con su propio Table (los resources de boto3 no son thread-safe), así
+    que `table` queda libre para que quien consume escriba mientras tanto.
+
+    proyeccion:       lista de atributos a leer (se escapan con #nombres).
+    filtro:           condición de boto3.dynamodb.conditions para FilterExpression.
+    rcu_por_segundo:  tope de capacidad de lectura para no competir con el tráfico.
+    checkpoint:       Checkpoint desde el que retomar; debe tener los mismos segmentos.
+    al_avanzar:       callback(checkpoint) cada vez que un segmento avanza una
+                      página, p.ej. para persistir checkpoint.to_json().
+    tabla_para_hilo:  callable() -> objeto con .scan() para cada hilo. Por
+                      defecto un Table de `table.name` sobre un resource propio
+                      (clients.dynamodb_resource_propio).
+    """
+    checkpoint = checkpoint or Checkpoint(segmentos)
+    if checkpoint.total_segmentos != segmentos:
+        raise ValueError(
+            f"El checkpoint es de {checkpoint.total_segmentos} segmentos, no de {segmentos}"
+        )
+
+    presupuesto = PresupuestoLectura(rcu_por_segundo) if rcu_por_segundo else None
+    cola = queue.Queue(maxsize=PAGINAS_EN_COLA_POR_SEGMENTO * segmentos)
+    detener = threading.Event()
+    base = _kwargs_base(proyeccion, filtro, consistente)
+
+    def _poner(elemento):
+        # put con timeout para poder salir si el consumidor dejó de leer
+        while not detener.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _leer_segmento(segmento):
+        tabla = tabla_para_hilo() if tabla_para_hilo else dynamodb_resource_propio().Table(table.name)
+        kwargs = dict(base, Segment=segmento, TotalSegments=segmentos)
+        if limite_por_pagina:
+            kwargs["Limit"] = limite_por_pagina
+        inicio = checkpoint.inicio(segmento)
+        if inicio:
+            kwargs["ExclusiveStartKey"] = inicio
+        try:
+            while not detener.is_set():
+                if presupuesto:
+                    presupuesto.esperar(detener)
+                resp = tabla.scan(**kwargs)
+                if presupuesto:
+                    presupuesto.consumir(resp.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+                last_key = resp.get("LastEvaluatedKey")
+                pagina = (segmento, resp.get("Items", []), last_key)
+                if not _poner(("pagina", pagina)) or not last_key:
+                    return
+                kwargs["ExclusiveStartKey"] = last_key
+        except Exception as e:
+            _poner(("error", e))
+        finally:
+            _poner(("fin", segmento))
+
+    pendientes = [s for s in range(segmentos) if not checkpoint.terminado(s)]
+    if not pendientes:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=len(pendientes))
+    try:
+        for segmento in pendientes:
+            pool.submit(_leer_segmento, segmento)
+
+        activos = len(pendientes)
+        while activos:
+            tipo, valor = cola.get()
+            if tipo == "pagina":
+                segmento, items, last_key = valor
+                yield from items
+                # El checkpoint avanza recién cuando el consumidor ya
+                # recibió todos los ítems de la página
+                checkpoint.avanzar(segmento, last_key)
+                if al_avanzar:
+                    al_avanzar(checkpoint)
+            elif tipo == "error":
+                raise valor
+            else:
+                activos -= 1
+    finally:
+        detener.set()
+        pool.shutdown(wait=True)
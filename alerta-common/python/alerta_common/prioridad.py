@@ -0,0 +1,28 @@
+"""
+Orden de urgencia de los incidentes abiertos para el panel admin.
+
+Cada incidente guarda prioridadKey = "<rango>#<createdAt>" (1=Alta, 2=Media,
+3=Baja), que ordena igual que el sort en memoria que hacía el panel. Los
+que no están cerrados llevan además abierto="1". El GSI
+abiertos-prioridad-index usa (abierto, prioridadKey), así que es disperso:
+al cerrar un incidente se borra `abierto` y el incidente sale del índice.
+"""
+ESTADO_CERRADO = "Cerrado"
+ABIERTO = "1"
+
+RANGO_POR_NIVEL = {"Alta": 1, "Media": 2, "Baja": 3}
+RANGO_DESCONOCIDO = 9
+
+
+def prioridad_key(nivel, created_at):
+    return f"{RANGO_POR_NIVEL.get(nivel, RANGO_DESCONOCIDO)}#{created_at or ''}"
+
+
+def atributos_de_prioridad(item):
+    """Atributos de índice para un incidente con su nivel, estado y createdAt."""
+    atributos = {
+        "prioridadKey": prioridad_key(item.get("nivelDeGravedad"), item.get("createdAt"))
+    }
+    if item.get("estado") != ESTADO_CERRADO:
+        atributos["abierto"] = ABIERTO
+    return atributos
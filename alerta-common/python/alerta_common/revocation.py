@@ -0,0 +1,48 @@
+"""
+Lista de revocación de tokens firmados (logout).
+
+La tabla tokens_revocados guarda {jti, expiresAt} y se limpia sola por TTL
+cuando el token igual ya habría expirado, así que siempre es pequeña. Cada
+contenedor la tiene entera en memoria y la relee cada
+REVOCATION_REFRESH_SECONDS: un logout tarda como mucho eso en verse.
+"""
+import os
+import time
+
+REVOCATION_REFRESH_SECONDS = float(os.environ.get("REVOCATION_REFRESH_SECONDS", "30"))
+
+
+def revocar(table, jti, exp):
+    table.put_item(Item={"jti": jti, "expiresAt": int(exp)})
+
+
+class RevocationList:
+    def __init__(self, table, refresh_seconds=REVOCATION_REFRESH_SECONDS):
+        self.table = table
+        self.refresh_seconds = refresh_seconds
+        self._jtis = frozenset()
+        self._loaded_at = None
+
+    def _cargar(self):
+        jtis = set()
+        kwargs = {"ProjectionExpression": "jti"}
+        while True:
+            resp = self.table.scan(**kwargs)
+            jtis.update(item["jti"] for item in resp.get("Items", []))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                return frozenset(jtis)
+            kwargs["ExclusiveStartKey"] = last_key
+
+    def is_revoked(self, jti):
+        ahora = time.monotonic()
+        if self._loaded_at is None or ahora - self._loaded_at > self.refresh_seconds:
+            try:
+                self._jtis = self._cargar()
+                self._loaded_at = ahora
+            except Exception as e:
+                # Si no se puede leer, seguimos con la última lista conocida
+                print("Error leyendo tokens_revocados:", e)
+                if self._loaded_at is None:
+                    raise
+        return jti in self._jtis
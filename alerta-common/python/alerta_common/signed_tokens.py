@@ -0,0 +1,107 @@
+"""
+Tokens de acceso firmados con HMAC-SHA256, verificables sin leer DynamoDB.
+
+Formato: base64url(payload JSON) + "." + base64url(firma)
+Payload: {"email", "rol", "area", "exp", "jti"}
+
+Los tokens viejos (uuid4 guardados en tokens_acceso) no tienen ".", así
+que se pueden distinguir y seguir aceptando por el camino de siempre.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+
+TOKEN_SIGNING_SECRET = os.environ.get("TOKEN_SIGNING_SECRET", "")
+TOKEN_TTL_SECONDS = int(os.environ.get("TOKEN_TTL_SECONDS", "28800"))
+
+ERROR_FORMATO = "Token mal formado"
+ERROR_FIRMA = "Firma del token inválida"
+ERROR_EXPIRADO = "Token expirado"
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _firma(payload_b64, secret):
+    return hmac.new(
+        secret.encode("utf-8"), payload_b64.encode("ascii"), hashlib.sha256
+    ).digest()
+
+
+def extract_token_from_headers(headers: dict | None):
+    """Token del header Authorization, con o sin "Bearer "."""
+    if not headers:
+        return None
+
+    # En HTTP API los headers suelen venir en minúsculas
+    auth = headers.get("authorization") or headers.get("Authorization")
+    if not auth:
+        return None
+
+    if auth.lower().startswith("bearer "):
+        return auth[7:]
+    return auth
+
+
+def es_token_firmado(token):
+    return "." in (token or "")
+
+
+def firmar(email, rol, area, secret=None, ttl_seconds=TOKEN_TTL_SECONDS):
+    """Devuelve (token, claims)."""
+    secret = secret or TOKEN_SIGNING_SECRET
+    if not secret:
+        raise RuntimeError("Falta la variable de entorno TOKEN_SIGNING_SECRET")
+
+    claims = {
+        "email": email,
+        "rol": rol,
+        "area": area,
+        "exp": int(time.time()) + ttl_seconds,
+        "jti": uuid.uuid4().hex,
+    }
+    payload_b64 = _b64encode(
+        json.dumps(claims, separators=(",", ":")).encode("utf-8")
+    )
+    return f"{payload_b64}.{_b64encode(_firma(payload_b64, secret))}", claims
+
+
+def verificar(token, secret=None, ahora=None):
+    """Devuelve (claims, error). No hace ninguna llamada de red."""
+    secret = secret or TOKEN_SIGNING_SECRET
+    if not secret:
+        raise RuntimeError("Falta la variable de entorno TOKEN_SIGNING_SECRET")
+
+    try:
+        payload_b64, firma_b64 = token.split(".")
+        firma = _b64decode(firma_b64)
+        # Dentro del try: un payload con caracteres no ASCII lanza
+        # UnicodeEncodeError (un ValueError) y es un token mal formado
+        esperada = _firma(payload_b64, secret)
+    except (ValueError, AttributeError):
+        return None, ERROR_FORMATO
+
+    if not hmac.compare_digest(firma, esperada):
+        return None, ERROR_FIRMA
+
+    try:
+        claims = json.loads(_b64decode(payload_b64))
+    except ValueError:
+        return None, ERROR_FORMATO
+
+    if not isinstance(claims, dict) or not claims.get("email"):
+        return None, ERROR_FORMATO
+
+    if int(claims.get("exp", 0)) < (ahora or time.time()):
+        return None, ERROR_EXPIRADO
+
+    return claims, None
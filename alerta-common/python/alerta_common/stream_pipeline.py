@@ -0,0 +1,173 @@
+"""
+Un solo lector del stream de Incidentes con varias vistas derivadas.
+
+Cada record se decodifica una vez a un Cambio y la lista entera pasa por
+todos los sinks registrados (historial, resumen, tendencias, broadcast,
+...), cada uno en su hilo. Si un sink falla, los demás terminan igual; el
+handler devuelve batchItemFailures con la unión de lo que falló y Lambda
+reintenta desde el primero de esos records (ReportBatchItemFailures).
+
+Un reintento vuelve a pasar esos records por TODOS los sinks, también por
+los que ya los habían procesado bien, así que cada sink tiene que tolerar
+ver un cambio más de una vez:
+
+- historial: claves determinísticas, reescribir la fila no cambia nada;
+- resumen y tendencias: guardan el último seq aplicado por incidente y
+  saltean lo que ya sumaron (ver alerta_common.idempotencia);
+- broadcast: al menos una vez; el cliente descarta un delta cuyo seq no es
+  mayor que el último que tiene de ese incidente.
+
+Los sinks no deben modificar las imágenes: se comparten entre hilos.
+
+Para agregar una vista nueva se escribe un Sink y se registra en el
+handler; no hace falta otro lector del stream ni otra decodificación.
+
+    pipeline = Pipeline([HistorialSink(...), ResumenSink(...)])
+    def lambda_handler(event, context):
+        return pipeline.procesar(event.get("Records", []))
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from alerta_common.dynamo_json import NUMEROS_DECIMAL, a_python
+
+METRICAS_NAMESPACE = "AlertaUTEC/Stream"
+
+
+class Cambio:
+    """
+    Un record del stream ya decodificado. `viejo` solo en MODIFY/REMOVE y
+    `nuevo` solo en INSERT/MODIFY.
+    """
+
+    __slots__ = ("evento", "nuevo", "viejo", "seq", "fecha")
+
+    def __init__(self, evento, nuevo, viejo, seq, fecha=None):
+        self.evento = evento
+        self.nuevo = nuevo
+        self.viejo = viejo
+        self.seq = seq
+        self.fecha = fecha  # ApproximateCreationDateTime (epoch en segundos)
+
+    @property
+    def imagen(self):
+        return self.nuevo or self.viejo
+
+    @property
+    def incidente_id(self):
+        return (self.imagen or {}).get("id")
+
+
+def _imagen(image):
+    # Decimal y sets como TypeDeserializer: los sinks vuelven a escribir
+    # estos valores en DynamoDB. Para mandarlos como JSON, dynamo_json.dumps
+    return a_python(image, numeros=NUMEROS_DECIMAL)
+
+
+def decodificar(records):
+    """(cambios, seqs de los records que no se pudieron decodificar)."""
+    cambios = []
+    invalidos = []
+    for record in records:
+        datos = record.get("dynamodb") or {}
+        seq = datos.get("SequenceNumber")
+        try:
+            evento = record["eventName"]  # INSERT, MODIFY, REMOVE
+            cambios.append(
+                Cambio(
+                    evento,
+                    _imagen(datos.get("NewImage")) if evento in ("INSERT", "MODIFY") else None,
+                    _imagen(datos.get("OldImage")) if evento in ("MODIFY", "REMOVE") else None,
+                    seq,
+                    datos.get("ApproximateCreationDateTime"),
+                )
+            )
+        except Exception as e:
+            print(f"Record {seq} inválido:", e)
+            invalidos.append(seq)
+    return cambios, invalidos
+
+
+class Sink:
+    """
+    Una vista derivada del stream. procesar() recibe todos los cambios del
+    batch y devuelve los seq que no pudo procesar (o None si procesó todo).
+    Si lanza una excepción se consideran fallidos todos los del batch.
+    """
+
+    nombre = "sink"
+
+    def procesar(self, cambios):
+        raise NotImplementedError
+
+
+def _metricas(sink, ms, cambios, fallidos, error):
+    # Embedded Metric Format: CloudWatch saca las métricas de esta línea
+    # del log, sin llamadas a PutMetricData
+    return json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICAS_NAMESPACE,
+                "Dimensions": [["Sink"]],
+                "Metrics": [
+                    {"Name": "DuracionMs", "Unit": "Milliseconds"},
+                    {"Name": "Cambios", "Unit": "Count"},
+                    {"Name": "Fallidos", "Unit": "Count"},
+                    {"Name": "Errores", "Unit": "Count"},
+                ],
+            }],
+        },
+        "Sink": sink,
+        "DuracionMs": round(ms, 2),
+        "Cambios": cambios,
+        "Fallidos": fallidos,
+        "Errores": 1 if error else 0,
+    })
+
+
+class Pipeline:
+    def __init__(self, sinks):
+        nombres = [sink.nombre for sink in sinks]
+        if len(set(nombres)) != len(nombres):
+            raise ValueError(f"Sinks con nombre repetido: {nombres}")
+        self.sinks = list(sinks)
+        # El pool vive con el contenedor: un hilo por sink
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.sinks)))
+
+    def _correr(self, sink, cambios):
+        inicio = time.perf_counter()
+        error = None
+        try:
+            fallidos = set(sink.procesar(cambios) or ())
+        except Exception as e:
+            error = e
+            print(f"Sink {sink.nombre} falló:", repr(e))
+            fallidos = {c.seq for c in cambios}
+        ms = (time.perf_counter() - inicio) * 1000
+        print(_metricas(sink.nombre, ms, len(cambios), len(fallidos), error))
+        return fallidos
+
+    def procesar(self, records):
+        """Corre el batch por todos los sinks; devuelve la respuesta para Lambda."""
+        cambios, invalidos = decodificar(records)
+
+        fallidos = set(invalidos)
+        if cambios:
+            futuros = [self._pool.submit(self._correr, sink, cambios) for sink in self.sinks]
+            for futuro in futuros:
+                fallidos |= futuro.result()
+
+        print(
+            f"Stream: {len(records)} records, {len(self.sinks)} sinks, "
+            f"{len(fallidos)} records a reintentar"
+        )
+        # En el orden del batch; Lambda retoma desde el menor
+        return {
+            "batchItemFailures": [
+                {"itemIdentifier": seq}
+                for seq in (r.get("dynamodb", {}).get("SequenceNumber") for r in records)
+                if seq in fallidos
+            ]
+        }
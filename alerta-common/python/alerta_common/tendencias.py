@@ -0,0 +1,259 @@
+"""
+Series de tiempo de incidentes para /admin/incidentes/tendencias,
+mantenidas desde el stream.
+
+Cada ítem de la tabla de tendencias es un bucket de una serie:
+
+    serie  = "<granularidad>#<dimension>"   p.ej. "hora#areaResponsable"
+    inicio = inicio del bucket (UTC)        p.ej. "2025-11-16T21:00" / "2025-11-16"
+
+con un atributo numérico "v#<valor>" por cada valor de la dimensión. Un
+incidente cuenta en el bucket de su createdAt, así que un rango se lee con
+un Query sobre `inicio` y el costo depende de cuántos buckets abarca, no
+de cuántos incidentes hay. Los buckets por hora expiran por TTL
+(expiraEn) y no se vuelven a escribir una vez vencidos; los diarios se
+guardan siempre.
+
+Los escribe el sink "tendencias" del lector del stream (ver stream_pipeline),
+con una marca por incidente (serie="aplicado#<id>", ver
+alerta_common.idempotencia) para no sumar dos veces un record reentregado.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from boto3.dynamodb.conditions import Key
+
+from alerta_common.agregados import DESCONOCIDO
+from alerta_common.idempotencia import AplicadorIdempotente, update_add
+from alerta_common.stream_pipeline import Sink
+
+DIMENSIONES_TENDENCIA = ["total", "areaResponsable", "categoria", "piso", "nivelDeGravedad"]
+
+# granularidad -> (formato del inicio del bucket, ancho del bucket)
+GRANULARIDADES = {
+    "hora": ("%Y-%m-%dT%H:00", timedelta(hours=1)),
+    "dia": ("%Y-%m-%d", timedelta(days=1)),
+}
+
+RETENCION_HORAS_DIAS = int(os.environ.get("TENDENCIAS_RETENCION_HORAS_DIAS", "90"))
+CONTADORES_POR_UPDATE = 100
+PREFIJO_VALOR = "v#"
+PREFIJO_MARCA = "aplicado#"
+
+
+def _valor(item, dimension):
+    if dimension == "total":
+        return "total"
+    valor = item.get(dimension)
+    if valor is None or valor == "":
+        return DESCONOCIDO
+    return str(valor)
+
+
+def parsear_fecha(texto):
+    """ISO 8601 -> datetime naive en UTC (createdAt se guarda así)."""
+    fecha = datetime.fromisoformat(texto)
+    if fecha.tzinfo is not None:
+        fecha = (fecha - fecha.utcoffset()).replace(tzinfo=None)
+    return fecha
+
+
+def inicio_bucket(fecha, granularidad):
+    formato, _ = GRANULARIDADES[granularidad]
+    return fecha.strftime(formato)
+
+
+def buckets_entre(desde, hasta, granularidad):
+    """Inicios de todos los buckets que tocan [desde, hasta], en orden."""
+    formato, ancho = GRANULARIDADES[granularidad]
+    actual = datetime.strptime(desde.strftime(formato), formato)
+    inicios = []
+    while actual <= hasta:
+        inicios.append(actual.strftime(formato))
+        actual += ancho
+    return inicios
+
+
+def _sumar(deltas, item, signo, ahora):
+    created_at = item.get("createdAt")
+    try:
+        fecha = parsear_fecha(created_at)
+    except (TypeError, ValueError):
+        # Sin createdAt no hay bucket; /resumen lo sigue contando
+        return
+    for granularidad in GRANULARIDADES:
+        inicio = inicio_bucket(fecha, granularidad)
+        if granularidad == "hora" and _expira_en(inicio) <= ahora:
+            # Ya lo borró (o lo va a borrar) el TTL: escribirlo lo recrearía
+            continue
+        for dimension in DIMENSIONES_TENDENCIA:
+            bucket = deltas.setdefault((f"{granularidad}#{dimension}", inicio), {})
+            valor = _valor(item, dimension)
+            bucket[valor] = bucket.get(valor, 0) + signo
+
+
+def deltas_de_cambios(cambios):
+    """
+    {(serie, inicio): {valor: delta}} de un batch de stream_pipeline.Cambio,
+    sin los que se cancelan.
+    """
+    ahora = time.time()
+    deltas = {}
+    for cambio in cambios:
+        if cambio.viejo:
+            _sumar(deltas, cambio.viejo, -1, ahora)
+        if cambio.nuevo:
+            _sumar(deltas, cambio.nuevo, +1, ahora)
+    return _sin_ceros(deltas)
+
+
+def contar(items, ahora=None):
+    """
+    Buckets absolutos de un conjunto de incidentes (para reconciliar), sin
+    los buckets por hora que ya vencieron.
+    """
+    ahora = time.time() if ahora is None else ahora
+    conteos = {}
+    for item in items:
+        _sumar(conteos, item, +1, ahora)
+    return _sin_ceros(conteos)
+
+
+def series():
+    return [f"{g}#{d}" for g in GRANULARIDADES for d in DIMENSIONES_TENDENCIA]
+
+
+def _sin_ceros(deltas):
+    limpios = {}
+    for clave, valores in deltas.items():
+        valores = {valor: n for valor, n in valores.items() if n}
+        if valores:
+            limpios[clave] = valores
+    return limpios
+
+
+def _expira_en(inicio):
+    fecha = datetime.strptime(inicio, GRANULARIDADES["hora"][0])
+    return int((fecha - datetime(1970, 1, 1)).total_seconds()) + RETENCION_HORAS_DIAS * 86400
+
+
+def vencido(serie, inicio, ahora=None):
+    """¿Es un bucket por hora cuyo expiraEn ya pasó? Los diarios no vencen."""
+    if not serie.startswith("hora#"):
+        return False
+    return _expira_en(inicio) <= (time.time() if ahora is None else ahora)
+
+
+def aplicar(table, deltas):
+    """
+    Un UpdateItem con ADD por bucket tocado. Un batch normal cae en el
+    bucket de la hora y el día actuales, así que son
+    2 * len(DIMENSIONES_TENDENCIA) updates sin importar cuántos records traiga.
+    """
+    for (serie, inicio), valores in sorted(deltas.items()):
+        pendientes = sorted(valores.items())
+        for desde in range(0, len(pendientes), CONTADORES_POR_UPDATE):
+            nombres = {}
+            expresion_valores = {}
+            partes = []
+            for i, (valor, n) in enumerate(pendientes[desde:desde + CONTADORES_POR_UPDATE]):
+                nombres[f"#c{i}"] = PREFIJO_VALOR + valor
+                expresion_valores[f":v{i}"] = n
+                partes.append(f"#c{i} :v{i}")
+            update_expression = "ADD " + ", ".join(partes)
+            if serie.startswith("hora#"):
+                update_expression += " SET expiraEn = if_not_exists(expiraEn, :exp)"
+                expresion_valores[":exp"] = _expira_en(inicio)
+            table.update_item(
+                Key={"serie": serie, "inicio": inicio},
+                UpdateExpression=update_expression,
+                ExpressionAttributeNames=nombres,
+                ExpressionAttributeValues=expresion_valores,
+            )
+
+
+def valores_de_item(item):
+    """Ítem de la tabla de tendencias -> {valor: int}, sin ceros."""
+    return {
+        k[len(PREFIJO_VALOR):]: int(v)
+        for k, v in item.items()
+        if k.startswith(PREFIJO_VALOR) and int(v) != 0
+    }
+
+
+def leer_serie(table, serie, desde=None, hasta=None, consistente=False):
+    """{inicio: {valor: n}} de los buckets guardados de `serie` en [desde, hasta]."""
+    condicion = Key("serie").eq(serie)
+    if desde is not None and hasta is not None:
+        condicion = condicion & Key("inicio").between(desde, hasta)
+    kwargs = {"KeyConditionExpression": condicion}
+    if consistente:
+        kwargs["ConsistentRead"] = True
+
+    buckets = {}
+    while True:
+        resp = table.query(**kwargs)
+        for item in resp.get("Items", []):
+            valores = valores_de_item(item)
+            if valores:
+                buckets[item["inicio"]] = valores
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return buckets
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def consultar(table, dimension, granularidad, desde, hasta):
+    """
+    Serie completa entre dos datetimes: un elemento por bucket, en orden, con
+    ceros donde no hubo incidentes (el Query solo devuelve los que existen).
+    """
+    inicios = buckets_entre(desde, hasta, granularidad)
+    guardados = leer_serie(table, f"{granularidad}#{dimension}", inicios[0], inicios[-1])
+    serie = []
+    for inicio in inicios:
+        valores = guardados.get(inicio, {})
+        serie.append({
+            "inicio": inicio,
+            "total": sum(valores.values()),
+            "valores": {} if dimension == "total" else valores,
+        })
+    return serie
+
+
+def _clave_marca(incidente_id):
+    return {"serie": PREFIJO_MARCA + incidente_id, "inicio": "seq"}
+
+
+class TendenciasSink(Sink):
+    """
+    Un Update con ADD por bucket que tocan los cambios todavía no sumados,
+    en la misma transacción que las marcas de esos incidentes.
+    """
+
+    nombre = "tendencias"
+
+    def __init__(self, table):
+        self.table = table
+        self._aplicador = AplicadorIdempotente(table, _clave_marca, self._updates)
+
+    def _updates(self, cambios):
+        updates = []
+        for (serie, inicio), valores in sorted(deltas_de_cambios(cambios).items()):
+            key = {"serie": serie, "inicio": inicio}
+            contadores = {PREFIJO_VALOR + valor: n for valor, n in valores.items()}
+            if serie.startswith("hora#"):
+                updates.append(update_add(
+                    self.table.name,
+                    key,
+                    contadores,
+                    extra_set="expiraEn = if_not_exists(expiraEn, :exp)",
+                    extra_valores={":exp": _expira_en(inicio)},
+                ))
+            else:
+                updates.append(update_add(self.table.name, key, contadores))
+        return updates
+
+    def procesar(self, cambios):
+        self._aplicador.aplicar(cambios)
@@ -0,0 +1,180 @@
+"""
+Lectura de t_historial para /incidentes/{id}/historial y /incidentes/historial.
+
+Siempre es un Query por incidenteId (nunca Scan) con el rango de tiempo en
+la condición de clave: changedAt es "<fecha ISO>#<SequenceNumber>" (ver
+alerta_common.historial.changed_at), así que comparar con una fecha ISO ordena
+igual que comparar fechas. Se usa el cliente de bajo nivel porque el
+endpoint por lotes hace varios Query a la vez desde hilos y los clientes
+de botocore sí son thread-safe (los resources de boto3 no).
+"""
+import base64
+import binascii
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from alerta_common.dynamo_json import NUMEROS_NATIVOS, a_python
+
+LIMIT_POR_DEFECTO = 50
+LIMIT_MAXIMO = 200
+MAX_IDS_POR_LOTE = int(os.environ.get("HISTORIAL_MAX_IDS_POR_LOTE", "50"))
+QUERIES_CONCURRENTES = int(os.environ.get("HISTORIAL_QUERIES_CONCURRENTES", "8"))
+
+ORDEN_ASC = "asc"
+ORDEN_DESC = "desc"
+
+# Campos que se pueden pedir con ?campos=; las claves van siempre
+CAMPOS = [
+    "evento", "motivo", "seq", "estado", "estadoAnterior", "actor",
+    "nivelDeGravedad", "areaResponsable", "categoria", "piso", "createdAt",
+]
+
+# Mayor que cualquier carácter de una fecha ISO o de "#<seq>": hasta=2025-01-01
+# incluye todo lo de ese día
+_FIN = "~"
+
+
+class ParametroInvalido(ValueError):
+    """Parámetro de la consulta que el cliente mandó mal (-> 400)."""
+
+
+class Opciones:
+    """Lo que se puede pedir de un timeline, ya validado."""
+
+    def __init__(self, limit=LIMIT_POR_DEFECTO, orden=ORDEN_ASC, desde=None, hasta=None, campos=None):
+        self.limit = limit
+        self.orden = orden
+        self.desde = desde
+        self.hasta = hasta
+        self.campos = campos
+
+    @classmethod
+    def desde_params(cls, params, limit_por_defecto=LIMIT_POR_DEFECTO):
+        try:
+            limit = int(params.get("limit") or limit_por_defecto)
+        except ValueError:
+            raise ParametroInvalido("limit debe ser un entero")
+        if not 1 <= limit <= LIMIT_MAXIMO:
+            raise ParametroInvalido(f"limit debe estar entre 1 y {LIMIT_MAXIMO}")
+
+        orden = params.get("orden") or ORDEN_ASC
+        if orden not in (ORDEN_ASC, ORDEN_DESC):
+            raise ParametroInvalido(f"orden debe ser {ORDEN_ASC} o {ORDEN_DESC}")
+
+        desde = params.get("desde") or None
+        hasta = params.get("hasta") or None
+        if desde and hasta and desde > hasta:
+            raise ParametroInvalido("desde debe ser anterior a hasta")
+
+        campos = None
+        if params.get("campos"):
+            campos = [c.strip() for c in params["campos"].split(",") if c.strip()]
+            desconocidos = [c for c in campos if c not in CAMPOS]
+            if desconocidos:
+                raise ParametroInvalido(f"campos desconocidos: {', '.join(desconocidos)}")
+
+        return cls(limit, orden, desde, hasta, campos)
+
+
+def codificar_cursor(incidente_id, key):
+    datos = {"id": incidente_id, "k": key["changedAt"]["S"]}
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(incidente_id, cursor):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        changed_at = datos["k"]
+        cursor_id = datos["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ParametroInvalido("cursor inválido")
+    if cursor_id != incidente_id:
+        raise ParametroInvalido("el cursor es de otro incidente")
+    return {"incidenteId": {"S": incidente_id}, "changedAt": {"S": changed_at}}
+
+
+def _kwargs_query(table_name, incidente_id, opciones):
+    nombres = {"#id": "incidenteId"}
+    valores = {":id": {"S": incidente_id}}
+    condicion = "#id = :id"
+    if opciones.desde and opciones.hasta:
+        condicion += " AND #t BETWEEN :desde AND :hasta"
+        valores[":desde"] = {"S": opciones.desde}
+        valores[":hasta"] = {"S": opciones.hasta + _FIN}
+    elif opciones.desde:
+        condicion += " AND #t >= :desde"
+        valores[":desde"] = {"S": opciones.desde}
+    elif opciones.hasta:
+        condicion += " AND #t <= :hasta"
+        valores[":hasta"] = {"S": opciones.hasta + _FIN}
+    if opciones.desde or opciones.hasta:
+        nombres["#t"] = "changedAt"
+
+    kwargs = {
+        "TableName": table_name,
+        "KeyConditionExpression": condicion,
+        "ExpressionAttributeValues": valores,
+        "ScanIndexForward": opciones.orden == ORDEN_ASC,
+        # Uno más que el límite para saber si hay otra página sin
+        # devolver un nextCursor que lleve a una página vacía
+        "Limit": opciones.limit + 1,
+    }
+    if opciones.campos:
+        nombres["#t"] = "changedAt"
+        for i, campo in enumerate(opciones.campos):
+            nombres[f"#p{i}"] = campo
+        kwargs["ProjectionExpression"] = ", ".join(
+            ["#id", "#t"] + [f"#p{i}" for i in range(len(opciones.campos))]
+        )
+    kwargs["ExpressionAttributeNames"] = nombres
+    return kwargs
+
+
+def timeline(client, table_name, incidente_id, opciones, cursor=None):
+    """
+    Una página del historial de un incidente: (items, next_cursor). Hace un
+    solo Query salvo que DynamoDB corte la página por el 1 MB.
+    """
+    kwargs = _kwargs_query(table_name, incidente_id, opciones)
+    if cursor:
+        kwargs["ExclusiveStartKey"] = decodificar_cursor(incidente_id, cursor)
+
+    crudos = []
+    while len(crudos) <= opciones.limit:
+        resp = client.query(**kwargs)
+        crudos.extend(resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        kwargs["ExclusiveStartKey"] = last_key
+        kwargs["Limit"] = opciones.limit + 1 - len(crudos)
+
+    next_cursor = None
+    if len(crudos) > opciones.limit:
+        crudos = crudos[:opciones.limit]
+        ultimo = crudos[-1]
+        next_cursor = codificar_cursor(incidente_id, {"changedAt": ultimo["changedAt"]})
+
+    # Directo de DynamoDB JSON a valores JSON, sin pasar por Decimal
+    items = [a_python(item, numeros=NUMEROS_NATIVOS) for item in crudos]
+    return items, next_cursor
+
+
+def timelines(client, table_name, incidente_ids, opciones):
+    """
+    Primera página del historial de varios incidentes, con un Query por id
+    en paralelo: {id: {"items": [...], "nextCursor": ...}}. Para seguir
+    paginando uno se usa /incidentes/{id}/historial con su nextCursor.
+    """
+    ids = list(dict.fromkeys(incidente_ids))
+
+    def _uno(incidente_id):
+        items, next_cursor = timeline(client, table_name, incidente_id, opciones)
+        return incidente_id, {"items": items, "nextCursor": next_cursor}
+
+    if len(ids) == 1:
+        return dict([_uno(ids[0])])
+    with ThreadPoolExecutor(max_workers=min(QUERIES_CONCURRENTES, len(ids))) as pool:
+        return dict(pool.map(_uno, ids))
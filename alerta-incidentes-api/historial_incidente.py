@@ -0,0 +1,46 @@
+# historial_incidente.py
+import json
+import os
+
+from alerta_common.clients import dynamodb_client
+from alerta_common.dynamo_json import dumps
+from historial import Opciones, ParametroInvalido, timeline
+
+HISTORIAL_TABLE = os.environ["HISTORIAL_TABLE"]
+
+def lambda_handler(event, context):
+    print("Event historialIncidente:", json.dumps(event))
+
+    # id del path: /incidentes/{id}/historial
+    incidente_id = (event.get("pathParameters") or {}).get("id")
+    if not incidente_id:
+        return _response(400, {"message": "Falta el id en la URL"})
+
+    # ?desde=&hasta= (ISO), ?orden=asc|desc, ?campos=estado,actor, ?limit=, ?cursor=
+    params = event.get("queryStringParameters") or {}
+    try:
+        opciones = Opciones.desde_params(params)
+        items, next_cursor = timeline(
+            dynamodb_client(), HISTORIAL_TABLE, incidente_id, opciones, params.get("cursor")
+        )
+    except ParametroInvalido as e:
+        return _response(400, {"message": str(e)})
+    except Exception as e:
+        print("Error leyendo historial:", e)
+        return _response(500, {"message": "Error interno leyendo historial"})
+
+    return _response(200, {
+        "incidenteId": incidente_id,
+        "items": items,
+        "count": len(items),
+        "nextCursor": next_cursor,
+    })
+
+def _response(status, body):
+    return {
+        "statusCode": status,
+        "headers": {
+            "Content-Type": "application/json",
+        },
+        "body": dumps(body),
+    }
@@ -0,0 +1,45 @@
+# historial_lote.py
+import json
+import os
+
+from alerta_common.clients import dynamodb_client
+from alerta_common.dynamo_json import dumps
+from historial import MAX_IDS_POR_LOTE, Opciones, ParametroInvalido, timelines
+
+HISTORIAL_TABLE = os.environ["HISTORIAL_TABLE"]
+
+# Por incidente; la vista de detalle del panel muestra los últimos cambios
+LIMIT_POR_DEFECTO_LOTE = 20
+
+def lambda_handler(event, context):
+    print("Event historialLote:", json.dumps(event))
+
+    # ?ids=id1,id2,... más las mismas opciones que /incidentes/{id}/historial
+    # (sin cursor: cada timeline trae su nextCursor para seguir por id)
+    params = event.get("queryStringParameters") or {}
+    ids = [i.strip() for i in (params.get("ids") or "").split(",") if i.strip()]
+    if not ids:
+        return _response(400, {"message": "Falta ?ids=id1,id2,..."})
+    if len(ids) > MAX_IDS_POR_LOTE:
+        return _response(400, {"message": f"Como máximo {MAX_IDS_POR_LOTE} ids por llamada"})
+
+    try:
+        opciones = Opciones.desde_params(params, limit_por_defecto=LIMIT_POR_DEFECTO_LOTE)
+        # Un Query por id, varios a la vez
+        resultado = timelines(dynamodb_client(), HISTORIAL_TABLE, ids, opciones)
+    except ParametroInvalido as e:
+        return _response(400, {"message": str(e)})
+    except Exception as e:
+        print("Error leyendo historial:", e)
+        return _response(500, {"message": "Error interno leyendo historial"})
+
+    return _response(200, {"historiales": resultado})
+
+def _response(status, body):
+    return {
+        "statusCode": status,
+        "headers": {
+            "Content-Type": "application/json",
+        },
+        "body": dumps(body),
+    }
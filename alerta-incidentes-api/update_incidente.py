@@ -5,6 +5,9 @@ import boto3
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+from alerta_common.dynamo_json import a_python, dumps
+from alerta_common.prioridad import ABIERTO, ESTADO_CERRADO, prioridad_key
+
 INCIDENTES_TABLE = os.environ["INCIDENTES_TABLE"]
 
 dynamodb = boto3.resource("dynamodb")
@@ -27,40 +30,84 @@ def lambda_handler(event, context):
 
     nuevo_estado = body.get("estado")
 
-    if not nuevo_estado:
+    if not nuevo_estado or not isinstance(nuevo_estado, str):
         return _response(400, {"message": "Falta el campo 'estado' en el body"})
 
     now = datetime.utcnow().isoformat()
 
+    # Al cerrar, el incidente sale del índice de abiertos del panel admin
+    valores = {":e": nuevo_estado, ":u": now}
+    asignaciones = "estado = :e, updatedAt = :u"
+
+    # Quién hizo el cambio, para el historial (si la ruta tiene autorizador)
+    actor = _actor(event)
+    if actor:
+        asignaciones += ", updatedBy = :b"
+        valores[":b"] = actor
+
+    if nuevo_estado == ESTADO_CERRADO:
+        update_expression = f"SET {asignaciones} REMOVE abierto"
+        condicion = "attribute_exists(id)"  # solo si existe
+    else:
+        update_expression = f"SET {asignaciones}, abierto = :a"
+        valores[":a"] = ABIERTO
+        # Los incidentes creados antes de prioridadKey no entran al índice
+        # de abiertos sin ella: si falta, la condición falla y se vuelve a
+        # escribir con la clave (ver abajo)
+        condicion = "attribute_exists(id) AND attribute_exists(prioridadKey)"
+
     try:
-        resp = table.update_item(
-            Key={"id": incident_id},
-            UpdateExpression="SET estado = :e, updatedAt = :u",
-            ExpressionAttributeValues={
-                ":e": nuevo_estado,
-                ":u": now,
-            },
-            ConditionExpression="attribute_exists(id)",  # solo si existe
-            ReturnValues="ALL_NEW",
-        )
+        try:
+            resp = _actualizar(incident_id, update_expression, valores, condicion)
+        except ClientError as e:
+            viejo = a_python(e.response.get("Item"), campos=["nivelDeGravedad", "createdAt"])
+            if (
+                e.response["Error"]["Code"] != "ConditionalCheckFailedException"
+                or nuevo_estado == ESTADO_CERRADO
+                or viejo is None
+            ):
+                raise
+            # Existe pero sin prioridadKey: la misma escritura, con la clave
+            valores[":pk"] = prioridad_key(viejo.get("nivelDeGravedad"), viejo.get("createdAt"))
+            resp = _actualizar(
+                incident_id,
+                f"{update_expression}, prioridadKey = if_not_exists(prioridadKey, :pk)",
+                valores,
+                "attribute_exists(id)",
+            )
+        item_actualizado = resp.get("Attributes", {})
     except ClientError as e:
         if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
             return _response(404, {"message": "Incidente no encontrado"})
         print("Error actualizando incidente:", e)
         return _response(500, {"message": "Error actualizando incidente"})
 
-    item_actualizado = resp.get("Attributes", {})
-
     return _response(200, {
         "message": "Estado actualizado",
         "incidente": item_actualizado,
     })
 
+def _actualizar(incident_id, update_expression, valores, condicion):
+    # Si la condición falla, el ítem viejo viene en el error (ALL_OLD)
+    return table.update_item(
+        Key={"id": incident_id},
+        UpdateExpression=update_expression,
+        ExpressionAttributeValues=valores,
+        ConditionExpression=condicion,
+        ReturnValues="ALL_NEW",
+        ReturnValuesOnConditionCheckFailure="ALL_OLD",
+    )
+
+def _actor(event):
+    """Email que dejó el autorizador HTTP API (payload 2.0), o None."""
+    ctx = ((event.get("requestContext") or {}).get("authorizer") or {}).get("lambda") or {}
+    return ctx.get("email")
+
 def _response(status, body):
     return {
         "statusCode": status,
         "headers": {
             "Content-Type": "application/json",
         },
-        "body": json.dumps(body),
+        "body": dumps(body),
     }
@@ -0,0 +1,74 @@
+"""
+Migra las conexiones creadas antes de las suscripciones por topic: les
+pone topic, shard y expiresAt para que entren en topic-shard-index (el
+índice no tiene las filas sin `topic`, así que el broadcaster no les
+mandaría nada). Esas conexiones recibían todo, así que quedan en el topic
+sin filtros (area=*|nivel=*) y formato completo.
+
+Hay que correrlo una vez justo después de desplegar. Es idempotente: solo
+toca filas sin topic y no pisa una conexión que se volvió a registrar
+mientras corría.
+
+Uso (desde alerta-realtime, con credenciales de AWS):
+    CONNECTIONS_TABLE=Connections PYTHONPATH=../alerta-common/python \\
+        python backfill_topics.py [--dry-run] [--segmentos 4]
+"""
+import argparse
+import os
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from alerta_common.parallel_scan import escanear
+from connection_registry import expira_en, shard_para
+from topics import topic_para_filtros
+from wire_format import FORMATO_COMPLETO
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--segmentos", type=int, default=4)
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(os.environ["CONNECTIONS_TABLE"])
+    pendientes = escanear(
+        table,
+        args.segmentos,
+        proyeccion=["connectionId"],
+        filtro=Attr("topic").not_exists(),
+    )
+    migradas = 0
+    for item in pendientes:
+        connection_id = item["connectionId"]
+        migradas += 1
+        if args.dry_run:
+            continue
+        try:
+            table.update_item(
+                Key={"connectionId": connection_id},
+                UpdateExpression=(
+                    "SET topic = :t, #s = :s, expiresAt = :e, "
+                    "formato = if_not_exists(formato, :f)"
+                ),
+                # "shard" es palabra reservada de DynamoDB
+                ExpressionAttributeNames={"#s": "shard"},
+                ConditionExpression="attribute_exists(connectionId) AND attribute_not_exists(topic)",
+                ExpressionAttributeValues={
+                    ":t": topic_para_filtros(),
+                    ":s": shard_para(connection_id),
+                    ":e": expira_en(),
+                    ":f": FORMATO_COMPLETO,
+                },
+            )
+        except ClientError as e:
+            # Desconectada o registrada de nuevo mientras corría
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    print(f"{migradas} conexiones {'por migrar' if args.dry_run else 'migradas'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import json
+import os
+import boto3
+
+from coalescing import Evento
+from connection_registry import ConnectionRegistry
+from fanout import apigw_client_config
+from rate_limiter import ConnectionRateLimiter
+from shard_worker import ShardWorker
+
+CONNECTIONS_TABLE = os.environ["CONNECTIONS_TABLE"]
+WS_ENDPOINT = os.environ["WS_ENDPOINT"]
+
+dynamodb = boto3.resource("dynamodb")
+table = dynamodb.Table(CONNECTIONS_TABLE)
+
+apigw = boto3.client(
+    "apigatewaymanagementapi",
+    endpoint_url=WS_ENDPOINT,
+    config=apigw_client_config(),
+)
+
+# Una conexión siempre cae en el mismo shard, así que el rate limiter de
+# este contenedor ve todos los mensajes de sus conexiones.
+worker = ShardWorker(apigw, ConnectionRegistry(table), ConnectionRateLimiter())
+
+def lambda_handler(event, context):
+    """
+    Worker de un shard. Lo invoca dynamo_stream_broadcast con
+    {"shard": <n>, "eventos": [...]} y devuelve las stats del fan-out.
+    """
+    shard = event["shard"]
+    eventos = [Evento.from_dict(e) for e in event["eventos"]]
+
+    stats = worker.procesar(eventos, shard=shard)
+
+    print(f"Shard {shard} stats:", json.dumps(stats.to_dict()))
+    return stats.to_wire()
@@ -0,0 +1,91 @@
+"""
+Coalescing de registros del stream por incidente.
+
+Si el mismo incidente cambia varias veces dentro de un batch (Airflow o un
+admin tocando muchos incidentes a la vez), los clientes solo necesitan el
+último estado. Se colapsa todo a un evento por `id`:
+
+    primer evento   último evento   resultado
+    INSERT          MODIFY          INSERT con la imagen más nueva
+    INSERT          REMOVE          (nada: el cliente nunca lo vio)
+    MODIFY/REMOVE   INSERT          MODIFY (se borró y se volvió a crear)
+    MODIFY          REMOVE          REMOVE con la última imagen antes de borrarse
+    MODIFY          MODIFY          MODIFY (oldImage del primero, newImage del último)
+
+El orden de salida respeta el primer cambio de cada incidente.
+"""
+
+
+class Evento:
+    __slots__ = ("event_name", "new_item", "old_item", "seq", "records")
+
+    def __init__(self, event_name, new_item, old_item, seq):
+        self.event_name = event_name
+        self.new_item = new_item
+        self.old_item = old_item
+        self.seq = seq
+        self.records = 1
+
+    @property
+    def incidente_id(self):
+        return (self.new_item or self.old_item or {}).get("id")
+
+    def to_dict(self):
+        return {
+            "eventName": self.event_name,
+            "newImage": self.new_item,
+            "oldImage": self.old_item,
+            "seq": self.seq,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["eventName"], data.get("newImage"), data.get("oldImage"), data.get("seq"))
+
+
+def _combinar(primero, ultimo):
+    if primero.event_name == "INSERT":
+        if ultimo.event_name == "REMOVE":
+            return None
+        event_name = "INSERT"
+    elif ultimo.event_name == "INSERT":
+        event_name = "MODIFY"
+    else:
+        event_name = ultimo.event_name
+
+    if event_name == "INSERT":
+        old_item = None
+    elif event_name == "REMOVE":
+        old_item = ultimo.old_item  # el último estado antes de borrarse
+    else:
+        old_item = primero.old_item
+
+    evento = Evento(
+        event_name,
+        ultimo.new_item if event_name != "REMOVE" else None,
+        old_item,
+        ultimo.seq,
+    )
+    evento.records = primero.records + ultimo.records
+    return evento
+
+
+def coalesce(eventos):
+    por_id = {}
+    sin_id = []
+    for evento in eventos:
+        incidente_id = evento.incidente_id
+        if incidente_id is None:
+            sin_id.append(evento)
+            continue
+        if incidente_id not in por_id:
+            por_id[incidente_id] = evento
+            continue
+        previo = por_id[incidente_id]
+        if previo is None:
+            # INSERT + REMOVE ya colapsado; un INSERT nuevo vuelve a empezar
+            por_id[incidente_id] = evento
+        else:
+            por_id[incidente_id] = _combinar(previo, evento)
+
+    return [e for e in por_id.values() if e is not None] + sin_id
@@ -0,0 +1,151 @@
+import os
+import time
+import zlib
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from wire_format import FORMATO_COMPLETO
+
+# Cuánto tiempo puede reutilizar un contenedor caliente la lista de
+# suscriptores de un topic antes de volver a leer el índice. Las conexiones
+# nuevas de otros contenedores se ven, como mucho, con este retraso.
+CONNECTIONS_CACHE_TTL_SECONDS = float(
+    os.environ.get("CONNECTIONS_CACHE_TTL_SECONDS", "5")
+)
+CONNECTIONS_TOPIC_INDEX = os.environ.get("CONNECTIONS_TOPIC_INDEX", "topic-shard-index")
+# Vida de una fila de Connections; DynamoDB la borra sola (TTL sobre
+# expiresAt) si el cliente desaparece sin pasar por $disconnect. Por defecto
+# son las 2 horas que API Gateway deja abierta una conexión WebSocket, así
+# que nunca expira un socket que sigue abierto aunque el cliente no mande
+# heartbeat; el heartbeat la renueva igual.
+CONNECTION_TTL_SECONDS = int(os.environ.get("CONNECTION_TTL_SECONDS", "7200"))
+# Número de shards en que se reparten las conexiones (atributo `shard`)
+CONNECTION_SHARDS = int(os.environ.get("CONNECTION_SHARDS", "1"))
+
+
+def shard_para(connection_id, shards=CONNECTION_SHARDS):
+    """Shard estable de una conexión (crc32, igual en todos los contenedores)."""
+    return zlib.crc32(connection_id.encode("utf-8")) % max(1, shards)
+
+
+def expira_en(ttl_seconds=CONNECTION_TTL_SECONDS):
+    return int(time.time()) + ttl_seconds
+
+
+class ConnectionRegistry:
+    """
+    Registro de conexiones WebSocket respaldado por la tabla Connections y
+    su GSI por `topic` + `shard`.
+
+    - `subscribers(topics, shard)` devuelve {connectionId: formato} de las
+      conexiones suscritas a cualquiera de los topics (solo las del shard,
+      si se indica), paginando cada Query (LastEvaluatedKey) y cacheando
+      cada (topic, shard) en el contenedor por un TTL.
+    - `add()` / `remove()` escriben en la tabla y actualizan la caché en
+      memoria, así no hace falta volver a consultar tras cada cambio.
+    - `remove_many()` borra varias conexiones muertas con BatchWriteItem.
+    """
+
+    def __init__(
+        self,
+        table,
+        ttl_seconds=CONNECTIONS_CACHE_TTL_SECONDS,
+        index_name=CONNECTIONS_TOPIC_INDEX,
+    ):
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.index_name = index_name
+        self._por_topic = {}  # (topic, shard) -> (loaded_at, {connectionId: formato})
+        self.queries = 0
+
+    def _query_topic(self, topic, shard):
+        condicion = Key("topic").eq(topic)
+        if shard is not None:
+            condicion = condicion & Key("shard").eq(shard)
+
+        connections = {}
+        kwargs = {
+            "IndexName": self.index_name,
+            "KeyConditionExpression": condicion,
+            # El TTL borra con horas de retraso: las filas ya vencidas se
+            # ignoran aunque sigan en el índice
+            "FilterExpression": Attr("expiresAt").not_exists()
+            | Attr("expiresAt").gt(int(time.time())),
+            "ProjectionExpression": "connectionId, formato",
+        }
+        while True:
+            resp = self.table.query(**kwargs)
+            self.queries += 1
+            for item in resp.get("Items", []):
+                connections[item["connectionId"]] = item.get("formato") or FORMATO_COMPLETO
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                return connections
+            kwargs["ExclusiveStartKey"] = last_key
+
+    def _topic(self, topic, shard):
+        cached = self._por_topic.get((topic, shard))
+        if cached is None or time.monotonic() - cached[0] > self.ttl_seconds:
+            cached = (time.monotonic(), self._query_topic(topic, shard))
+            self._por_topic[(topic, shard)] = cached
+        return cached[1]
+
+    def subscribers(self, topics, shard=None):
+        """{connectionId: formato} suscritos a alguno de los topics."""
+        connections = {}
+        for topic in topics:
+            connections.update(self._topic(topic, shard))
+        return connections
+
+    def add(self, connection_id, topic, **attributes):
+        shard = shard_para(connection_id)
+        self.table.put_item(
+            Item={
+                "connectionId": connection_id,
+                "topic": topic,
+                "shard": shard,
+                "expiresAt": expira_en(),
+                **attributes,
+            }
+        )
+        formato = attributes.get("formato") or FORMATO_COMPLETO
+        for clave in ((topic, shard), (topic, None)):
+            cached = self._por_topic.get(clave)
+            if cached is not None:
+                cached[1][connection_id] = formato
+
+    def touch(self, connection_id):
+        """Heartbeat: renueva expiresAt. Devuelve False si la conexión ya no existe."""
+        try:
+            self.table.update_item(
+                Key={"connectionId": connection_id},
+                UpdateExpression="SET expiresAt = :e",
+                ConditionExpression="attribute_exists(connectionId)",
+                ExpressionAttributeValues={":e": expira_en()},
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def remove_many(self, connection_ids):
+        """
+        Borra en lotes de 25 (BatchWriteItem); batch_writer reintenta solo
+        los UnprocessedItems.
+        """
+        connection_ids = set(connection_ids)
+        if not connection_ids:
+            return
+        with self.table.batch_writer() as batch:
+            for connection_id in connection_ids:
+                batch.delete_item(Key={"connectionId": connection_id})
+        for connection_id in connection_ids:
+            self.discard(connection_id)
+
+    def remove(self, connection_id):
+        self.table.delete_item(Key={"connectionId": connection_id})
+        self.discard(connection_id)
+
+    def discard(self, connection_id):
+        """Saca la conexión de la caché sin tocar la tabla."""
+        for _, connections in self._por_topic.values():
+            connections.pop(connection_id, None)
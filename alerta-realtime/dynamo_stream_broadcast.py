@@ -1,69 +1,122 @@
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import boto3
-from boto3.dynamodb.types import TypeDeserializer
+
+from alerta_common.dynamo_json import dumps
+from alerta_common.stream_pipeline import Sink
+from coalescing import Evento, coalesce
+from connection_registry import CONNECTION_SHARDS, ConnectionRegistry
+from event_log import EventLog
+from fanout import FanoutStats, apigw_client_config
+from rate_limiter import ConnectionRateLimiter
+from shard_worker import ShardWorker
 
 CONNECTIONS_TABLE = os.environ["CONNECTIONS_TABLE"]
 WS_ENDPOINT = os.environ["WS_ENDPOINT"]
 
+# Cómo se reparte el fan-out entre shards de Connections:
+# - "inline": este mismo Lambda recorre todos los shards (por defecto)
+# - "lambda": una invocación de BROADCAST_SHARD_FUNCTION por shard, en paralelo
+# - "local":  un proceso por shard (desarrollo / benchmarks)
+SHARD_DISPATCH = os.environ.get("SHARD_DISPATCH", "inline")
+BROADCAST_SHARD_FUNCTION = os.environ.get("BROADCAST_SHARD_FUNCTION")
+EVENT_LOG_TABLE = os.environ.get("EVENT_LOG_TABLE")
+
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(CONNECTIONS_TABLE)
 
 apigw = boto3.client(
     "apigatewaymanagementapi",
-    endpoint_url=WS_ENDPOINT
+    endpoint_url=WS_ENDPOINT,
+    config=apigw_client_config(),
 )
 
-deserializer = TypeDeserializer()
-
-def dynamodb_item_to_dict(item):
-    if not item:
+worker = ShardWorker(apigw, ConnectionRegistry(table), ConnectionRateLimiter())
+
+event_log = EventLog(dynamodb.Table(EVENT_LOG_TABLE)) if EVENT_LOG_TABLE else None
+
+lambda_client = boto3.client("lambda") if SHARD_DISPATCH == "lambda" else None
+
+class BroadcastSink(Sink):
+    """
+    Sink "broadcast" de incidentes_stream: colapsa el batch a un evento por
+    incidente, lo agrega al log de "sync" y lo manda por WebSocket a los
+    suscriptores (inline o repartido por shard).
+    """
+
+    nombre = "broadcast"
+
+    def procesar(self, cambios):
+        eventos = [Evento(c.evento, c.nuevo, c.viejo, c.seq) for c in cambios]
+
+        # Un solo evento por incidente con su último estado
+        eventos = coalesce(eventos)
+        print(f"Coalesced {len(cambios)} records into {len(eventos)} events")
+
+        # Primero al log, así un cliente que reconecta a mitad del fan-out ya
+        # puede pedir estos cambios con "sync"
+        if event_log:
+            event_log.append(eventos)
+
+        if SHARD_DISPATCH == "inline" or CONNECTION_SHARDS <= 1:
+            stats = worker.procesar(eventos)
+            fallidos = []
+        else:
+            stats, fallidos = dispatch_shards(eventos)
+
+        print("Fan-out stats:", json.dumps(stats.to_dict()))
+
+        if fallidos:
+            # Cada evento va a todos los shards: si uno falló, ninguno de
+            # los cambios llegó a todos sus suscriptores. Se reintenta el
+            # batch; los clientes descartan lo repetido por seq
+            print(f"Shards fallidos: {fallidos}")
+            return [c.seq for c in cambios]
+
+def dispatch_shards(eventos, shards=CONNECTION_SHARDS, modo=SHARD_DISPATCH):
+    """
+    Manda los eventos a un worker por shard y junta sus stats. Devuelve
+    (stats, shards cuyo worker falló).
+    """
+    eventos = [e.to_dict() for e in eventos]
+    trabajos = [{"shard": shard, "eventos": eventos} for shard in range(shards)]
+
+    if modo == "local":
+        with ProcessPoolExecutor(max_workers=shards) as pool:
+            resultados = list(pool.map(_invocar_local, trabajos))
+    else:
+        with ThreadPoolExecutor(max_workers=shards) as pool:
+            resultados = list(pool.map(_invocar_lambda, trabajos))
+
+    stats = FanoutStats()
+    fallidos = []
+    for trabajo, resultado in zip(trabajos, resultados):
+        if resultado is None:
+            fallidos.append(trabajo["shard"])
+        else:
+            stats.merge(FanoutStats.from_wire(resultado))
+    return stats, fallidos
+
+def _invocar_local(trabajo):
+    # Cada proceso importa el worker y arma sus propios clientes
+    import broadcast_shard
+
+    return broadcast_shard.lambda_handler(trabajo, None)
+
+def _invocar_lambda(trabajo):
+    """Stats del worker del shard, o None si la invocación falló."""
+    try:
+        resp = lambda_client.invoke(
+            FunctionName=BROADCAST_SHARD_FUNCTION,
+            InvocationType="RequestResponse",
+            Payload=dumps(trabajo, compacto=True).encode("utf-8"),
+        )
+        if resp.get("FunctionError"):
+            print(f"Shard {trabajo['shard']} falló:", resp["Payload"].read())
+            return None
+        return json.loads(resp["Payload"].read())
+    except Exception as e:
+        print(f"Error invocando shard {trabajo['shard']}: {e}")
         return None
-    return {k: deserializer.deserialize(v) for k, v in item.items()}
-
-def lambda_handler(event, context):
-    print("Stream event:", json.dumps(event))
-
-    for record in event["Records"]:
-        event_name = record["eventName"]  # INSERT, MODIFY, REMOVE
-
-        new_image = record["dynamodb"].get("NewImage")
-        old_image = record["dynamodb"].get("OldImage")
-
-        new_item = dynamodb_item_to_dict(new_image)
-        old_item = dynamodb_item_to_dict(old_image)
-
-        message = {
-            "eventName": event_name,
-            "newImage": new_item,
-            "oldImage": old_item
-        }
-
-        broadcast_to_all(message)
-
-    return {
-        "statusCode": 200,
-        "body": "OK"
-    }
-
-def broadcast_to_all(message):
-    payload = json.dumps(message).encode("utf-8")
-
-    resp = table.scan(ProjectionExpression="connectionId")
-    connections = resp.get("Items", [])
-
-    print(f"Broadcasting to {len(connections)} connections")
-
-    for item in connections:
-        connection_id = item["connectionId"]
-
-        try:
-            apigw.post_to_connection(
-                ConnectionId=connection_id,
-                Data=payload
-            )
-        except apigw.exceptions.GoneException:
-            print(f"Stale connection, deleting {connection_id}")
-            table.delete_item(Key={"connectionId": connection_id})
-        except Exception as e:
-            print(f"Error sending to {connection_id}: {e}")
@@ -0,0 +1,178 @@
+import json
+import os
+import time
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from alerta_common.dynamo_json import dumps
+
+from wire_format import mensaje_delta, seq_wire
+
+# Cuánto se guarda cada cambio en el log (TTL sobre expiresAt)
+EVENT_LOG_TTL_SECONDS = int(os.environ.get("EVENT_LOG_TTL_SECONDS", "86400"))
+# Ancho de cada partición del log: los cambios de una hora van juntos, así
+# las escrituras no caen siempre en la misma clave
+EVENT_LOG_BUCKET_SECONDS = int(os.environ.get("EVENT_LOG_BUCKET_SECONDS", "3600"))
+EVENT_LOG_SEQ_INDEX = os.environ.get("EVENT_LOG_SEQ_INDEX", "seq-index")
+# Si un cliente se perdió más cambios que esto, se le manda a hacer snapshot
+SYNC_MAX_EVENTS = int(os.environ.get("SYNC_MAX_EVENTS", "1000"))
+
+PARTICION = "incidentes"
+
+
+def seq_key(seq):
+    # La misma forma que el `seq` de los mensajes (wire_format.seq_wire)
+    return seq_wire(seq)
+
+
+def inicio_bucket(instante, bucket_seconds=EVENT_LOG_BUCKET_SECONDS):
+    return int(instante) // bucket_seconds * bucket_seconds
+
+
+def particion_de(inicio):
+    """Clave de partición del bucket que empieza en `inicio` (epoch, segundos)."""
+    return f"{PARTICION}#{inicio}"
+
+
+def _inicio_de_particion(particion):
+    _, _, inicio = particion.partition("#")
+    return int(inicio) if inicio.isdigit() else None
+
+
+class EventLog:
+    """
+    Log compacto de cambios de Incidentes para la ruta "sync":
+    particion="incidentes#<inicio del bucket>", seq=<SequenceNumber con
+    padding>, delta=<mensaje delta en JSON>, escritoEn=<ms>. Las filas
+    expiran por TTL.
+
+    Los SequenceNumber solo crecen dentro de un shard del stream, y los
+    cambios de un incidente siempre van por el mismo shard. Así que el orden
+    por seq vale para cada incidente, no entre incidentes. Por eso "sync"
+    no corta por seq sino por escritoEn: devuelve todo lo escrito desde que
+    se escribió `desde`. Puede repetir algún cambio del mismo batch, y el
+    cliente lo descarta comparando el seq de ese incidente.
+
+    El índice seq-index (seq -> particion, escritoEn) encuentra el bucket de
+    `desde` con una sola Query.
+    """
+
+    def __init__(
+        self,
+        table,
+        ttl_seconds=EVENT_LOG_TTL_SECONDS,
+        bucket_seconds=EVENT_LOG_BUCKET_SECONDS,
+        index_name=EVENT_LOG_SEQ_INDEX,
+    ):
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+        self.index_name = index_name
+
+    def append(self, eventos):
+        ahora = time.time()
+        expires_at = int(ahora) + self.ttl_seconds
+        escrito_en = int(ahora * 1000)
+        particion = particion_de(inicio_bucket(ahora, self.bucket_seconds))
+        with self.table.batch_writer() as batch:
+            for evento in eventos:
+                if not evento.seq:
+                    continue
+                delta = mensaje_delta(
+                    evento.event_name, evento.new_item, evento.old_item, evento.seq
+                )
+                batch.put_item(
+                    Item={
+                        "particion": particion,
+                        "seq": seq_key(evento.seq),
+                        "delta": dumps(delta, compacto=True),
+                        "escritoEn": escrito_en,
+                        "expiresAt": expires_at,
+                    }
+                )
+
+    def _buscar(self, desde):
+        """(inicio del bucket, escritoEn) de `desde`, o None si ya no está."""
+        resp = self.table.query(
+            IndexName=self.index_name,
+            KeyConditionExpression=Key("seq").eq(seq_key(desde)),
+            ProjectionExpression="particion, escritoEn",
+            Limit=1,
+        )
+        items = resp.get("Items", [])
+        if not items:
+            return None
+        inicio = _inicio_de_particion(items[0]["particion"])
+        if inicio is None:
+            # Fila de antes de los buckets
+            return None
+        return inicio, int(items[0].get("escritoEn", 0))
+
+    def _bucket(self, inicio, desde_ms, limite):
+        kwargs = {
+            "KeyConditionExpression": Key("particion").eq(particion_de(inicio)),
+            "ProjectionExpression": "#s, #d",
+            "ExpressionAttributeNames": {"#s": "seq", "#d": "delta"},
+        }
+        if desde_ms:
+            kwargs["FilterExpression"] = Attr("escritoEn").gte(desde_ms)
+        items = []
+        while len(items) < limite:
+            resp = self.table.query(**kwargs)
+            items.extend(resp.get("Items", []))
+            last_key = resp.get("LastEvaluatedKey")
+            if not last_key:
+                break
+            kwargs["ExclusiveStartKey"] = last_key
+        return items
+
+    def since(self, desde, max_events=SYNC_MAX_EVENTS):
+        """
+        Deltas escritos desde `desde`, bucket por bucket. Devuelve
+        (deltas, ok); ok=False si el hueco es muy grande o `desde` ya expiró
+        del log, y el cliente tiene que hacer snapshot.
+        """
+        # El propio `desde` tiene que seguir en el log; si no, hay cambios
+        # que ya expiraron y no podemos saber cuáles eran
+        encontrado = self._buscar(desde)
+        if encontrado is None:
+            return [], False
+        inicio, desde_ms = encontrado
+
+        clave = seq_key(desde)
+        # Un minuto de margen por si el reloj de quien escribió va adelantado
+        ultimo = inicio_bucket(time.time() + 60, self.bucket_seconds)
+        deltas = []
+        for bucket in range(inicio, ultimo + 1, self.bucket_seconds):
+            filtro_ms = desde_ms if bucket == inicio else None
+            # max_events + 1 para saber si hay más de max_events; en el
+            # primer bucket uno más, porque el filtro por escritoEn también
+            # trae la fila del propio `desde`, que se saltea
+            limite = max_events + 1 - len(deltas) + (1 if bucket == inicio else 0)
+            for item in self._bucket(bucket, filtro_ms, limite):
+                if item["seq"] == clave:
+                    continue
+                deltas.append(json.loads(item["delta"]))
+            if len(deltas) > max_events:
+                return [], False
+
+        return deltas, True
+
+    def latest(self):
+        """Último seq del bucket más reciente que tenga cambios."""
+        ahora = inicio_bucket(time.time(), self.bucket_seconds)
+        buckets = self.ttl_seconds // self.bucket_seconds + 1
+        for i in range(buckets + 1):
+            resp = self.table.query(
+                KeyConditionExpression=Key("particion").eq(
+                    particion_de(ahora - i * self.bucket_seconds)
+                ),
+                ScanIndexForward=False,
+                Limit=1,
+                ProjectionExpression="#s",
+                ExpressionAttributeNames={"#s": "seq"},
+            )
+            items = resp.get("Items", [])
+            if items:
+                return items[0]["seq"]
+        return None
@@ -0,0 +1,143 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Paralelismo del fan-out y timeouts por conexión (se pueden ajustar por env)
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", "32"))
+FANOUT_CONNECT_TIMEOUT = float(os.environ.get("FANOUT_CONNECT_TIMEOUT", "1"))
+FANOUT_READ_TIMEOUT = float(os.environ.get("FANOUT_READ_TIMEOUT", "2"))
+
+
+def apigw_client_config():
+    """
+    Config de botocore para el cliente apigatewaymanagementapi:
+    el pool de conexiones HTTP tiene que ser >= al número de hilos,
+    si no los hilos se quedan esperando un socket libre.
+    """
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=FANOUT_WORKERS,
+        connect_timeout=FANOUT_CONNECT_TIMEOUT,
+        read_timeout=FANOUT_READ_TIMEOUT,
+        retries={"max_attempts": 1, "mode": "standard"},
+        tcp_keepalive=True,
+    )
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+class FanoutStats:
+    def __init__(self):
+        self.sent = 0
+        self.gone = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.resyncs = 0
+        self.latencias_ms = []
+        self.gone_ids = []
+
+    def merge(self, otro):
+        self.sent += otro.sent
+        self.gone += otro.gone
+        self.failed += otro.failed
+        self.rate_limited += otro.rate_limited
+        self.resyncs += otro.resyncs
+        self.latencias_ms.extend(otro.latencias_ms)
+        self.gone_ids.extend(otro.gone_ids)
+
+    def to_dict(self):
+        return {
+            "sent": self.sent,
+            "gone": self.gone,
+            "failed": self.failed,
+            "rateLimited": self.rate_limited,
+            "resyncs": self.resyncs,
+            "p50Ms": round(_percentil(self.latencias_ms, 50), 2),
+            "p99Ms": round(_percentil(self.latencias_ms, 99), 2),
+        }
+
+    def to_wire(self):
+        """Forma serializable para devolverla desde un worker de shard."""
+        return {
+            "sent": self.sent,
+            "gone": self.gone,
+            "failed": self.failed,
+            "rateLimited": self.rate_limited,
+            "resyncs": self.resyncs,
+            "latenciasMs": [round(x, 2) for x in self.latencias_ms],
+        }
+
+    @classmethod
+    def from_wire(cls, data):
+        stats = cls()
+        stats.sent = data.get("sent", 0)
+        stats.gone = data.get("gone", 0)
+        stats.failed = data.get("failed", 0)
+        stats.rate_limited = data.get("rateLimited", 0)
+        stats.resyncs = data.get("resyncs", 0)
+        stats.latencias_ms = list(data.get("latenciasMs", []))
+        return stats
+
+
+def _enviar(apigw, connection_id, payload):
+    """
+    Envía a una sola conexión. Devuelve (resultado, latencia_ms) donde
+    resultado es "sent", "gone" o "failed".
+    """
+    inicio = time.perf_counter()
+    try:
+        apigw.post_to_connection(ConnectionId=connection_id, Data=payload)
+        resultado = "sent"
+    except apigw.exceptions.GoneException:
+        resultado = "gone"
+    except Exception as e:
+        print(f"Error sending to {connection_id}: {e}")
+        resultado = "failed"
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def fan_out(apigw, connection_ids, payload, max_workers=None):
+    """
+    Manda `payload` a todas las conexiones con concurrencia acotada.
+    No borra las conexiones muertas: las deja en stats.gone_ids para que
+    quien llama decida qué hacer con ellas.
+    """
+    return fan_out_envios(
+        apigw,
+        ((connection_id, payload) for connection_id in connection_ids),
+        max_workers=max_workers,
+    )
+
+
+def fan_out_envios(apigw, envios, max_workers=None):
+    """Como fan_out, pero cada conexión con su propio payload: [(connectionId, payload)]."""
+    stats = FanoutStats()
+    envios = list(envios)
+    if not envios:
+        return stats
+
+    workers = max(1, min(max_workers or FANOUT_WORKERS, len(envios)))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        resultados = pool.map(
+            lambda envio: (envio[0], _enviar(apigw, envio[0], envio[1])),
+            envios,
+        )
+        for connection_id, (resultado, latencia_ms) in resultados:
+            stats.latencias_ms.append(latencia_ms)
+            if resultado == "sent":
+                stats.sent += 1
+            elif resultado == "gone":
+                stats.gone += 1
+                stats.gone_ids.append(connection_id)
+            else:
+                stats.failed += 1
+
+    return stats
@@ -0,0 +1,38 @@
+import os
+
+from alerta_common.agregados import ResumenSink
+from alerta_common.clients import dynamodb_client, dynamodb_resource_propio
+from alerta_common.historial import HistorialSink
+from alerta_common.stream_pipeline import Pipeline
+from alerta_common.tendencias import TendenciasSink
+from dynamo_stream_broadcast import BroadcastSink
+
+HISTORIAL_TABLE = os.environ["HISTORIAL_TABLE"]
+AGREGADOS_TABLE = os.environ["AGREGADOS_TABLE"]
+TENDENCIAS_TABLE = os.environ["TENDENCIAS_TABLE"]
+
+
+def _tabla_propia(nombre):
+    # Los sinks corren en hilos distintos y los resources de boto3 no son
+    # thread-safe: cada sink que usa un Table tiene su propio resource
+    return dynamodb_resource_propio().Table(nombre)
+
+
+# Vistas derivadas del stream de Incidentes. Una vista nueva (p.ej. un
+# índice de búsqueda) es un Sink más en esta lista, no otro lector.
+pipeline = Pipeline([
+    HistorialSink(dynamodb_client(), HISTORIAL_TABLE),
+    ResumenSink(_tabla_propia(AGREGADOS_TABLE)),
+    TendenciasSink(_tabla_propia(TENDENCIAS_TABLE)),
+    BroadcastSink(),
+])
+
+
+def lambda_handler(event, context):
+    """
+    Único lector del stream de Incidentes: decodifica cada record una vez
+    y lo pasa por todos los sinks en paralelo. Devuelve batchItemFailures
+    (ReportBatchItemFailures) con los records que algún sink no pudo
+    procesar; las métricas por sink salen en el log en formato EMF.
+    """
+    return pipeline.procesar(event.get("Records", []))
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+
+# Mensajes por segundo que puede recibir cada conexión, y ráfaga máxima
+WS_RATE_PER_SECOND = float(os.environ.get("WS_RATE_PER_SECOND", "5"))
+WS_RATE_BURST = float(os.environ.get("WS_RATE_BURST", "20"))
+
+RESYNC_PAYLOAD = json.dumps({"t": "resync"}).encode("utf-8")
+
+
+class ConnectionRateLimiter:
+    """
+    Token bucket por conexión, en memoria del contenedor caliente.
+
+    Cuando una conexión se queda sin tokens se le manda UNA vez el aviso
+    {"t": "resync"} y se le dejan de enviar mensajes hasta que se recupere.
+    El cliente que recibe el aviso debe volver a pedir el listado por REST
+    en vez de intentar reconstruir lo que se perdió.
+    """
+
+    def __init__(self, rate=WS_RATE_PER_SECOND, burst=WS_RATE_BURST, max_buckets=50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self._buckets = {}  # connectionId -> [tokens, last_ts]
+        self._en_resync = set()
+        self.suprimidos = 0
+        self.resyncs = 0
+
+    def _tomar(self, connection_id, ahora):
+        bucket = self._buckets.get(connection_id)
+        if bucket is None:
+            bucket = self._buckets[connection_id] = [self.burst, ahora]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (ahora - bucket[1]) * self.rate)
+            bucket[1] = ahora
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        return False
+
+    def _podar(self, ahora):
+        # Un bucket que ya se rellenó por completo es igual a uno nuevo
+        llenos = [
+            cid
+            for cid, (tokens, ts) in self._buckets.items()
+            if tokens + (ahora - ts) * self.rate >= self.burst
+        ]
+        for cid in llenos:
+            del self._buckets[cid]
+            self._en_resync.discard(cid)
+
+    def filtrar(self, envios):
+        """
+        Recibe [(connectionId, payload)] y devuelve los envíos permitidos,
+        cambiando por el aviso de resync el primer mensaje que se pasa del límite.
+        """
+        ahora = time.monotonic()
+        if len(self._buckets) > self.max_buckets:
+            self._podar(ahora)
+
+        permitidos = []
+        for connection_id, payload in envios:
+            if self._tomar(connection_id, ahora):
+                self._en_resync.discard(connection_id)
+                permitidos.append((connection_id, payload))
+            elif connection_id not in self._en_resync:
+                self._en_resync.add(connection_id)
+                self.resyncs += 1
+                permitidos.append((connection_id, RESYNC_PAYLOAD))
+            else:
+                self.suprimidos += 1
+        return permitidos
+
+    def olvidar(self, connection_id):
+        self._buckets.pop(connection_id, None)
+        self._en_resync.discard(connection_id)
@@ -0,0 +1,106 @@
+from fanout import FanoutStats, fan_out_envios
+from topics import topics_para_cambio
+from wire_format import (
+    FORMATO_DELTA,
+    FORMATO_LOTE,
+    encode,
+    encode_lote,
+    mensaje_completo,
+    mensaje_delta,
+)
+
+
+class ShardWorker:
+    """
+    Envía una lista de eventos (ya colapsados) a los suscriptores de un shard
+    de Connections, o de todos si shard es None.
+
+    Lo usan tanto dynamo_stream_broadcast (modo inline) como broadcast_shard
+    (un worker por shard). No crea clientes: recibe apigw, el registro de
+    conexiones y el rate limiter ya construidos.
+    """
+
+    def __init__(self, apigw, registry, limiter):
+        self.apigw = apigw
+        self.registry = registry
+        self.limiter = limiter
+
+    def procesar(self, eventos, shard=None):
+        stats = FanoutStats()
+        suprimidos_antes, resyncs_antes = self.limiter.suprimidos, self.limiter.resyncs
+        # connectionId -> deltas pendientes para los clientes con formato "lote"
+        lotes = {}
+
+        for evento in eventos:
+            # Solo a los suscriptores cuyo filtro coincide con el incidente.
+            # Cada topic se lee una vez por batch (o ninguna si la caché sigue viva).
+            connections = self.registry.subscribers(
+                topics_para_cambio(evento.new_item, evento.old_item), shard=shard
+            )
+
+            envios = []
+            payloads = {}  # cada payload se serializa una sola vez
+            delta = None
+            for connection_id, formato in connections.items():
+                if formato == FORMATO_LOTE:
+                    if delta is None:
+                        delta = _delta(evento)
+                    lotes.setdefault(connection_id, []).append(delta)
+                    continue
+                if formato not in payloads:
+                    if formato == FORMATO_DELTA:
+                        payloads[formato] = encode(_delta(evento))
+                    else:
+                        payloads[formato] = encode(
+                            mensaje_completo(
+                                evento.event_name,
+                                evento.new_item,
+                                evento.old_item,
+                                evento.seq,
+                            )
+                        )
+                envios.append((connection_id, payloads[formato]))
+
+            stats.merge(self.broadcast(self.limiter.filtrar(envios)))
+
+        if lotes:
+            stats.merge(self.broadcast(self.limiter.filtrar(_envios_lote(lotes))))
+
+        # Las conexiones muertas se borran todas juntas al final, no una por una
+        # dentro del fan-out
+        if stats.gone_ids:
+            print(f"Deleting {len(stats.gone_ids)} stale connections")
+            self.registry.remove_many(stats.gone_ids)
+
+        stats.rate_limited = self.limiter.suprimidos - suprimidos_antes
+        stats.resyncs = self.limiter.resyncs - resyncs_antes
+        return stats
+
+    def broadcast(self, envios):
+        print(f"Broadcasting to {len(envios)} connections")
+
+        stats = fan_out_envios(self.apigw, envios)
+
+        # Se sacan de la caché ya, para no volver a intentarlas en este batch
+        for connection_id in stats.gone_ids:
+            self.registry.discard(connection_id)
+            self.limiter.olvidar(connection_id)
+
+        return stats
+
+
+def _delta(evento):
+    return mensaje_delta(evento.event_name, evento.new_item, evento.old_item, evento.seq)
+
+
+def _envios_lote(lotes):
+    # Casi todas las conexiones "lote" reciben los mismos deltas: se
+    # comprime una vez por combinación distinta, no una vez por conexión.
+    frames = {}
+    envios = []
+    for connection_id, deltas in lotes.items():
+        clave = tuple(id(d) for d in deltas)
+        if clave not in frames:
+            frames[clave] = encode_lote(deltas)
+        envios.append((connection_id, frames[clave]))
+    return envios
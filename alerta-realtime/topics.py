@@ -0,0 +1,51 @@
+"""
+Topics de suscripción del WebSocket.
+
+Cada conexión se suscribe a UN topic que combina sus filtros opcionales
+(areaResponsable y nivelDeGravedad). Un filtro ausente se guarda como "*".
+
+    ?areaResponsable=laboratorios                -> area=laboratorios|nivel=*
+    ?nivelDeGravedad=Alta                        -> area=*|nivel=Alta
+    (sin filtros)                                -> area=*|nivel=*
+
+Para un incidente con área A y nivel N solo hay 4 topics que le interesan:
+(A, N), (A, *), (*, N) y (*, *). Así el broadcaster consulta solo esas
+particiones del índice en vez de recorrer todas las conexiones.
+"""
+
+TODOS = "*"
+
+
+def topic_para_filtros(area=None, nivel=None):
+    return f"area={area or TODOS}|nivel={nivel or TODOS}"
+
+
+def topic_desde_query(params):
+    params = params or {}
+    return topic_para_filtros(
+        params.get("areaResponsable") or params.get("area"),
+        params.get("nivelDeGravedad") or params.get("nivel"),
+    )
+
+
+def topics_para_incidente(item):
+    if not item:
+        return set()
+    area = item.get("areaResponsable") or None
+    nivel = item.get("nivelDeGravedad") or None
+    topics = {topic_para_filtros()}
+    if area:
+        topics.add(topic_para_filtros(area=area))
+    if nivel:
+        topics.add(topic_para_filtros(nivel=nivel))
+    if area and nivel:
+        topics.add(topic_para_filtros(area=area, nivel=nivel))
+    return topics
+
+
+def topics_para_cambio(new_item, old_item):
+    """
+    Un MODIFY que cambia de área o de nivel tiene que llegar tanto a los
+    suscriptores del valor viejo (para que lo saquen) como a los del nuevo.
+    """
+    return topics_para_incidente(new_item) | topics_para_incidente(old_item)
@@ -3,10 +3,15 @@ import os
 import boto3
 from datetime import datetime
 
+from connection_registry import ConnectionRegistry
+from topics import topic_desde_query
+from wire_format import formato_desde_query
+
 CONNECTIONS_TABLE = os.environ["CONNECTIONS_TABLE"]
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(CONNECTIONS_TABLE)
+registry = ConnectionRegistry(table)
 
 def lambda_handler(event, context):
     print("Event OnConnect:", json.dumps(event))
@@ -14,13 +19,14 @@ def lambda_handler(event, context):
     connection_id = event["requestContext"]["connectionId"]
     now = datetime.utcnow().isoformat()
 
+    # Filtros opcionales: ?areaResponsable=...&nivelDeGravedad=...
+    # y formato de mensaje: ?formato=completo|delta|lote
+    params = event.get("queryStringParameters")
+    topic = topic_desde_query(params)
+    formato = formato_desde_query(params)
+
     try:
-        table.put_item(
-            Item={
-                "connectionId": connection_id,
-                "connectedAt": now,
-            }
-        )
+        registry.add(connection_id, topic, connectedAt=now, formato=formato)
         return {
             "statusCode": 200,
             "body": "Connected."
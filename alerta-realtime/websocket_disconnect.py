@@ -2,10 +2,13 @@ import json
 import os
 import boto3
 
+from connection_registry import ConnectionRegistry
+
 CONNECTIONS_TABLE = os.environ["CONNECTIONS_TABLE"]
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(CONNECTIONS_TABLE)
+registry = ConnectionRegistry(table)
 
 def lambda_handler(event, context):
     print("Event OnDisconnect:", json.dumps(event))
@@ -13,11 +16,7 @@ def lambda_handler(event, context):
     connection_id = event["requestContext"]["connectionId"]
 
     try:
-        table.delete_item(
-            Key={
-                "connectionId": connection_id
-            }
-        )
+        registry.remove(connection_id)
         return {
             "statusCode": 200,
             "body": "Disconnected."
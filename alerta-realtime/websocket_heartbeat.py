@@ -0,0 +1,29 @@
+import json
+import os
+import boto3
+
+from connection_registry import ConnectionRegistry
+
+CONNECTIONS_TABLE = os.environ["CONNECTIONS_TABLE"]
+
+dynamodb = boto3.resource("dynamodb")
+table = dynamodb.Table(CONNECTIONS_TABLE)
+registry = ConnectionRegistry(table)
+
+def lambda_handler(event, context):
+    """
+    Ruta "heartbeat": renueva expiresAt de la conexión y evita que API
+    Gateway cierre el socket por inactividad. Las filas de clientes que
+    desaparecen sin $disconnect las borra el TTL de DynamoDB.
+    """
+    print("Event heartbeat:", json.dumps(event))
+
+    connection_id = event["requestContext"]["connectionId"]
+
+    try:
+        if not registry.touch(connection_id):
+            return {"statusCode": 410, "body": "Unknown connection."}
+        return {"statusCode": 200, "body": "OK"}
+    except Exception as e:
+        print("Error refreshing connection:", e)
+        return {"statusCode": 500, "body": "Failed to refresh connection."}
@@ -0,0 +1,48 @@
+import json
+import os
+import boto3
+
+from alerta_common.dynamo_json import dumps
+
+INCIDENTES_TABLE = os.environ["INCIDENTES_TABLE"]
+WS_ENDPOINT = os.environ["WS_ENDPOINT"]
+
+dynamodb = boto3.resource("dynamodb")
+table = dynamodb.Table(INCIDENTES_TABLE)
+
+apigw = boto3.client(
+    "apigatewaymanagementapi",
+    endpoint_url=WS_ENDPOINT
+)
+
+def lambda_handler(event, context):
+    """
+    Ruta "incidente": los clientes con formato delta/lote piden aquí la
+    imagen completa de un incidente cuando la necesitan.
+    Mensaje: {"action": "incidente", "id": "<id>"}
+    """
+    print("Event incidente:", json.dumps(event))
+
+    connection_id = event["requestContext"]["connectionId"]
+
+    try:
+        body = json.loads(event.get("body") or "{}")
+    except json.JSONDecodeError:
+        return {"statusCode": 400, "body": "Body debe ser JSON"}
+
+    incidente_id = body.get("id")
+    if not incidente_id:
+        return {"statusCode": 400, "body": "Falta el campo 'id'"}
+
+    try:
+        res = table.get_item(Key={"id": incidente_id})
+        apigw.post_to_connection(
+            ConnectionId=connection_id,
+            Data=dumps(
+                {"t": "incidente", "id": incidente_id, "incidente": res.get("Item")}
+            ).encode("utf-8"),
+        )
+        return {"statusCode": 200, "body": "OK"}
+    except Exception as e:
+        print("Error enviando incidente:", e)
+        return {"statusCode": 500, "body": "Error enviando incidente"}
@@ -0,0 +1,62 @@
+import json
+import os
+import boto3
+
+from event_log import EventLog, seq_key
+from fanout import apigw_client_config
+from wire_format import encode, encode_lote
+
+EVENT_LOG_TABLE = os.environ["EVENT_LOG_TABLE"]
+WS_ENDPOINT = os.environ["WS_ENDPOINT"]
+
+# Deltas por frame; un frame de API Gateway WebSocket no puede pasar de 128 KB
+SYNC_FRAME_EVENTS = int(os.environ.get("SYNC_FRAME_EVENTS", "200"))
+
+dynamodb = boto3.resource("dynamodb")
+event_log = EventLog(dynamodb.Table(EVENT_LOG_TABLE))
+
+apigw = boto3.client(
+    "apigatewaymanagementapi",
+    endpoint_url=WS_ENDPOINT,
+    config=apigw_client_config(),
+)
+
+def lambda_handler(event, context):
+    """
+    Ruta "sync": {"action": "sync", "desde": "<último seq aplicado>"}.
+
+    Reenvía solo los cambios posteriores a `desde` como frames "lote" y
+    termina con {"t": "sync", "seq": <último>}. Si el hueco es muy grande o
+    ya expiró del log, responde {"t": "snapshot", "seq": <último>}: el
+    cliente recarga el listado por REST y sigue escuchando desde ese seq.
+    """
+    print("Event sync:", json.dumps(event))
+
+    connection_id = event["requestContext"]["connectionId"]
+
+    try:
+        body = json.loads(event.get("body") or "{}")
+    except json.JSONDecodeError:
+        return {"statusCode": 400, "body": "Body debe ser JSON"}
+
+    desde = body.get("desde")
+
+    try:
+        deltas, ok = event_log.since(desde) if desde else ([], False)
+
+        if not ok:
+            _post(connection_id, encode({"t": "snapshot", "seq": event_log.latest()}))
+            return {"statusCode": 200, "body": "Snapshot needed."}
+
+        for i in range(0, len(deltas), SYNC_FRAME_EVENTS):
+            _post(connection_id, encode_lote(deltas[i:i + SYNC_FRAME_EVENTS]))
+
+        ultimo = deltas[-1]["seq"] if deltas else seq_key(desde)
+        _post(connection_id, encode({"t": "sync", "seq": ultimo, "n": len(deltas)}))
+        return {"statusCode": 200, "body": "Synced."}
+    except Exception as e:
+        print("Error en sync:", e)
+        return {"statusCode": 500, "body": "Failed to sync."}
+
+def _post(connection_id, payload):
+    apigw.post_to_connection(ConnectionId=connection_id, Data=payload)
@@ -0,0 +1,88 @@
+"""
+Formatos de mensaje del WebSocket. El cliente lo elige al conectarse con
+?formato=... (ver README):
+
+- "completo" (por defecto): {eventName, newImage, oldImage, seq}, como siempre.
+- "delta": un mensaje por cambio con solo los atributos que cambiaron:
+      {"t": "delta", "ev": "MODIFY", "id": "...", "seq": "...",
+       "cambios": {...}, "borrados": [...]}
+  En INSERT `cambios` trae el incidente completo; en REMOVE solo va el id.
+  `seq` es el SequenceNumber del stream con ceros a la izquierda hasta
+  SEQ_DIGITOS dígitos (ver seq_wire): así dos seq de un mismo incidente se
+  comparan como strings, el cliente puede descartar mensajes viejos y pedir
+  con la ruta "sync" lo que se perdió durante una desconexión. La imagen
+  completa se pide con la ruta "incidente" del WebSocket.
+- "lote": los deltas de todo el batch del stream en un solo frame,
+  comprimido con gzip y en base64:
+      {"t": "lote", "enc": "gzip+base64", "n": 3, "data": "..."}
+"""
+import base64
+import gzip
+
+from alerta_common.dynamo_json import dumps
+
+FORMATO_COMPLETO = "completo"
+FORMATO_DELTA = "delta"
+FORMATO_LOTE = "lote"
+FORMATOS = {FORMATO_COMPLETO, FORMATO_DELTA, FORMATO_LOTE}
+
+# Los SequenceNumber del stream tienen hasta 40 dígitos y largo variable;
+# con padding el orden de strings coincide con el numérico
+SEQ_DIGITOS = 40
+
+
+def formato_desde_query(params):
+    formato = ((params or {}).get("formato") or FORMATO_COMPLETO).lower()
+    return formato if formato in FORMATOS else FORMATO_COMPLETO
+
+
+def seq_wire(seq):
+    """SequenceNumber con padding, el `seq` que ven los clientes."""
+    if seq is None:
+        return None
+    return str(seq).zfill(SEQ_DIGITOS)
+
+
+def mensaje_completo(event_name, new_item, old_item, seq=None):
+    return {
+        "eventName": event_name,
+        "newImage": new_item,
+        "oldImage": old_item,
+        "seq": seq_wire(seq),
+    }
+
+
+def mensaje_delta(event_name, new_item, old_item, seq):
+    base = new_item or old_item or {}
+    delta = {"t": "delta", "ev": event_name, "id": base.get("id"), "seq": seq_wire(seq)}
+
+    if event_name == "INSERT":
+        delta["cambios"] = new_item or {}
+    elif event_name == "MODIFY":
+        new_item = new_item or {}
+        old_item = old_item or {}
+        delta["cambios"] = {
+            k: v for k, v in new_item.items() if old_item.get(k) != v
+        }
+        borrados = [k for k in old_item if k not in new_item]
+        if borrados:
+            delta["borrados"] = borrados
+
+    return delta
+
+
+def encode(mensaje):
+    # Las imágenes traen Decimal (números de DynamoDB)
+    return dumps(mensaje, compacto=True).encode("utf-8")
+
+
+def encode_lote(deltas):
+    comprimido = gzip.compress(encode(deltas), compresslevel=6)
+    return encode(
+        {
+            "t": "lote",
+            "enc": "gzip+base64",
+            "n": len(deltas),
+            "data": base64.b64encode(comprimido).decode("ascii"),
+        }
+    )
@@ -0,0 +1,63 @@
+"""
+Completa prioridadKey / abierto en incidentes creados antes del índice
+abiertos-prioridad-index. Es idempotente: solo escribe los que difieren.
+
+Uso (desde alerta-utec-admin-panel, con credenciales de AWS):
+    INCIDENTES_TABLE=Incidentes PYTHONPATH=../alerta-common/python \\
+        python backfill_prioridad.py [--dry-run] [--segmentos 8] [--rcu-por-segundo N]
+"""
+import argparse
+import os
+
+import boto3
+from botocore.exceptions import ClientError
+
+from alerta_common.parallel_scan import escanear
+from alerta_common.prioridad import atributos_de_prioridad
+
+
+def _pendientes(table, segmentos, rcu_por_segundo):
+    proyeccion = ["id", "estado", "nivelDeGravedad", "createdAt", "prioridadKey", "abierto"]
+    for item in escanear(table, segmentos, proyeccion=proyeccion, rcu_por_segundo=rcu_por_segundo):
+        esperado = atributos_de_prioridad(item)
+        actual = {k: item[k] for k in ("prioridadKey", "abierto") if k in item}
+        if esperado != actual:
+            yield item["id"], esperado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--segmentos", type=int, default=8)
+    parser.add_argument("--rcu-por-segundo", type=float, help="tope de lectura del Scan")
+    args = parser.parse_args()
+
+    table = boto3.resource("dynamodb").Table(os.environ["INCIDENTES_TABLE"])
+    actualizados = 0
+    for incidente_id, atributos in _pendientes(table, args.segmentos, args.rcu_por_segundo):
+        actualizados += 1
+        if args.dry_run:
+            continue
+        valores = {":p": atributos["prioridadKey"]}
+        if "abierto" in atributos:
+            update_expression = "SET prioridadKey = :p, abierto = :a"
+            valores[":a"] = atributos["abierto"]
+        else:
+            update_expression = "SET prioridadKey = :p REMOVE abierto"
+        try:
+            table.update_item(
+                Key={"id": incidente_id},
+                UpdateExpression=update_expression,
+                ExpressionAttributeValues=valores,
+                ConditionExpression="attribute_exists(id)",
+            )
+        except ClientError as e:
+            # Borrado mientras corría el backfill
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    print(f"{actualizados} incidentes {'por actualizar' if args.dry_run else 'actualizados'}")
+
+
+if __name__ == "__main__":
+    main()
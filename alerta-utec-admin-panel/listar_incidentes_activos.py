@@ -1,24 +1,60 @@
 import json
 import os
 import boto3
-from boto3.dynamodb.conditions import Attr
+
+from alerta_common.agregados import (
+    CLAVE_RESUMEN,
+    VERSION,
+    conteos_por_dimension,
+    contadores_de_item,
+    version_de_item,
+)
+from query_planner import ORDENES, ConsultaNoSoportada, CursorInvalido, ejecutar, planificar
+from respuesta_http import coincide, etag, no_modificado, responder, ventana
 
 dynamodb = boto3.resource("dynamodb")
 INCIDENTES_TABLE = os.environ["INCIDENTES_TABLE"]
 incidentes_table = dynamodb.Table(INCIDENTES_TABLE)
+AGREGADOS_TABLE = os.environ["AGREGADOS_TABLE"]
+agregados_table = dynamodb.Table(AGREGADOS_TABLE)
 
+# Tamaño de página de /admin/incidentes (?limit=...)
+LIMIT_POR_DEFECTO = 50
+LIMIT_MAXIMO = 200
 
-def _response(status_code, body):
-    return {
-        "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*",
-            "Access-Control-Allow-Methods": "OPTIONS,GET",
-        },
-        "body": json.dumps(body),
-    }
+
+def _resumen_incidentes():
+    """
+    Ítem "resumen" que mantiene el sink del mismo nombre: su versión da el
+    ETag y sus contadores le dicen al planificador qué índice es más
+    selectivo. None si no se pudo leer.
+    """
+    try:
+        res = agregados_table.get_item(Key={"clave": CLAVE_RESUMEN})
+    except Exception as e:
+        # Sin resumen se responde igual, solo que sin ETag y con el orden
+        # fijo de índices
+        print("Error leyendo resumen de Incidentes:", e)
+        return None
+    return res.get("Item")
+
+
+def _misma_version(version):
+    """
+    ¿La versión sigue igual después de consultar? Si cambió mientras se
+    leía Incidentes, el cuerpo puede mezclar las dos versiones y no se le
+    pone ETag (el panel lo vuelve a pedir completo la próxima vez).
+    """
+    try:
+        res = agregados_table.get_item(
+            Key={"clave": CLAVE_RESUMEN},
+            ProjectionExpression="#v",
+            ExpressionAttributeNames={"#v": VERSION},
+        )
+    except Exception as e:
+        print("Error releyendo versión de Incidentes:", e)
+        return False
+    return version_de_item(res.get("Item")) == version
 
 
 def lambda_handler(event, context):
@@ -28,50 +64,60 @@ def lambda_handler(event, context):
     estado = params.get("estado")
     nivel = params.get("nivelDeGravedad")
     area = params.get("areaResponsable")
+    orden = params.get("orden")
+    cursor = params.get("cursor")
 
-    # Para hackathon: usamos Scan + filtro. Si tuvieras MUCHOS datos,
-    # aquí ya pensaríamos en GSIs.
-    filtro = Attr("id").exists()
-
-    # Por defecto, mostrar solo incidentes NO cerrados
-    if estado:
-        filtro = filtro & Attr("estado").eq(estado)
-    else:
-        filtro = filtro & Attr("estado").ne("Cerrado")
-
-    if nivel:
-        filtro = filtro & Attr("nivelDeGravedad").eq(nivel)
-
-    if area:
-        filtro = filtro & Attr("areaResponsable").eq(area)
-
     try:
-        res = incidentes_table.scan(
-            FilterExpression=filtro
+        limit = int(params.get("limit") or LIMIT_POR_DEFECTO)
+    except ValueError:
+        return responder(event, 400, {"message": "limit debe ser un entero"})
+    if not 1 <= limit <= LIMIT_MAXIMO:
+        return responder(event, 400, {"message": f"limit debe estar entre 1 y {LIMIT_MAXIMO}"})
+
+    if orden and orden not in ORDENES:
+        return responder(event, 400, {"message": f"orden debe ser uno de: {', '.join(ORDENES)}"})
+
+    # Si Incidentes no cambió desde la última consulta de este panel (y
+    # seguimos en la misma ventana), 304 sin tocar la tabla
+    resumen = _resumen_incidentes()
+    version = version_de_item(resumen)
+    tag = etag(version, "incidentes", ventana(), estado, nivel, area, orden, limit, cursor)
+    if coincide(event, tag):
+        return no_modificado(tag)
+
+    # Por defecto el índice de abiertos ya ordenado por urgencia (con los
+    # filtros como FilterExpression); con orden=reciente, el GSI con menos
+    # filas para los filtros según los contadores
+    try:
+        plan = planificar(
+            {"estado": estado, "nivelDeGravedad": nivel, "areaResponsable": area},
+            orden,
+            conteos=conteos_por_dimension(contadores_de_item(resumen)),
+            cursor=cursor,
         )
+    except ConsultaNoSoportada as e:
+        return responder(event, 400, {"message": str(e)})
+    print("Plan listarIncidentesActivos:", plan.describir())
+
+    try:
+        items, next_cursor = ejecutar(incidentes_table, plan, limit, cursor)
+    except CursorInvalido as e:
+        return responder(event, 400, {"message": str(e)})
     except Exception as e:
         print("Error leyendo Incidentes:", e)
-        return _response(500, {"message": "Error interno leyendo incidentes"})
-
-    items = res.get("Items", [])
-
-    # Si quieres priorizar en el panel:
-    # ordenar por nivelDeGravedad y/o createdAt en memoria
-    # Ejemplo simple: primero Alta, luego Media, luego Baja
-    prioridad = {"Alta": 1, "Media": 2, "Baja": 3}
-
-    def prioridad_key(x):
-        return (
-            prioridad.get(x.get("nivelDeGravedad"), 99),
-            x.get("createdAt", ""),
-        )
+        return responder(event, 500, {"message": "Error interno leyendo incidentes"})
 
-    items.sort(key=prioridad_key)
+    if tag and not _misma_version(version):
+        tag = None
 
-    return _response(
+    return responder(
+        event,
         200,
         {
             "items": items,
             "count": len(items),
+            "nextCursor": next_cursor,
+            "orden": plan.orden,
         },
+        tag,
     )
@@ -0,0 +1,238 @@
+"""
+Planificador de consultas de /admin/incidentes.
+
+La tabla Incidentes tiene un GSI por cada filtro del panel (todos con
+createdAt como sort key) y uno disperso con los incidentes abiertos ya
+ordenados por urgencia (ver alerta_common.prioridad). Con los filtros y el
+orden del request se elige un índice y el resto se aplica como
+FilterExpression, así que lo leído depende del tamaño de la página y no
+del de la tabla. Un orden que ningún índice puede dar (ver planificar) se
+rechaza con ConsultaNoSoportada en vez de devolver otro orden.
+
+Las respuestas van paginadas: como mucho `limit` ítems y un cursor opaco
+para pedir la página siguiente.
+"""
+import base64
+import binascii
+import json
+import os
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from alerta_common.prioridad import ABIERTO, ESTADO_CERRADO
+
+ORDEN_PRIORIDAD = "prioridad"   # Alta primero; dentro de cada nivel, los más antiguos
+ORDEN_RECIENTE = "reciente"     # createdAt descendente
+ORDENES = (ORDEN_PRIORIDAD, ORDEN_RECIENTE)
+
+# (atributo, índice), de más a menos selectivo cuando no hay conteos: hay
+# muchas áreas, pocos estados y solo tres niveles de gravedad
+INDICES = [
+    ("areaResponsable", "areaResponsable-createdAt-index"),
+    ("estado", "estado-createdAt-index"),
+    ("nivelDeGravedad", "nivelDeGravedad-createdAt-index"),
+]
+INDICE_PRIORIDAD = "abiertos-prioridad-index"
+
+# El Limit de DynamoDB cuenta ítems antes del FilterExpression: con filtro
+# se piden páginas más grandes y se corta en `limit`
+PAGINA_CON_FILTRO = int(os.environ.get("LISTADO_PAGINA_CON_FILTRO", "100"))
+# Tope de ítems evaluados por request; al llegar se devuelve lo que haya
+# con cursor, para que un filtro poco selectivo no lea todo el índice
+MAX_EVALUADOS = int(os.environ.get("LISTADO_MAX_EVALUADOS", "2000"))
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class ConsultaNoSoportada(ValueError):
+    pass
+
+
+class PlanConsulta:
+    """
+    Query sobre un índice (indice/hash_key/valor/range_key), Scan si indice
+    es None, o nada si `vacio` (los contadores dicen que no hay resultados).
+    """
+
+    def __init__(self, orden=None):
+        self.orden = orden
+        self.vacio = False
+        self.indice = None
+        self.hash_key = None
+        self.valor = None
+        self.range_key = None
+        self.ascendente = True
+        self.filtro = None
+
+    def describir(self):
+        if self.vacio:
+            return "vacío (sin conteo para los filtros)"
+        if self.indice is None:
+            return "scan"
+        return f"query {self.indice} ({self.hash_key}={self.valor})"
+
+    def clave_de(self, item):
+        """Clave de arranque equivalente a haber terminado en `item`."""
+        clave = {"id": item["id"]}
+        if self.indice is not None:
+            clave[self.hash_key] = item[self.hash_key]
+            clave[self.range_key] = item[self.range_key]
+        return clave
+
+
+def planificar(filtros, orden=None, conteos=None, cursor=None):
+    """
+    filtros: {"estado", "nivelDeGravedad", "areaResponsable"} -> valor o None.
+    Sin estado se listan solo los no cerrados.
+
+    orden: ORDEN_PRIORIDAD u ORDEN_RECIENTE. Por defecto prioridad, como el
+    listado de siempre: con filtros se lee abiertos-prioridad-index y los
+    filtros van como FilterExpression. Con estado=Cerrado el defecto es
+    reciente, porque los cerrados no están en ese índice. Lanza
+    ConsultaNoSoportada para prioridad con estado=Cerrado y para reciente
+    sin filtros (no hay índice por createdAt de toda la tabla).
+
+    conteos: opcional, {atributo: {valor: cantidad}} (los contadores del
+    resumen, ver alerta_common.agregados); si viene, se elige el índice con
+    menos filas para ese valor en vez del orden fijo de INDICES. Un valor
+    que no está en los contadores tiene 0 incidentes: si algún filtro pide
+    uno así, el plan es vacío y no se lee Incidentes.
+
+    cursor: el de la página anterior, si hay. La paginación sigue en el
+    índice con que empezó aunque los conteos hayan cambiado entre medio.
+    """
+    cerrados = filtros.get("estado") == ESTADO_CERRADO
+    if orden is None:
+        orden = ORDEN_RECIENTE if cerrados else ORDEN_PRIORIDAD
+    if orden == ORDEN_PRIORIDAD and cerrados:
+        raise ConsultaNoSoportada(
+            "orden=prioridad solo aplica a incidentes abiertos; usa orden=reciente"
+        )
+    if orden == ORDEN_RECIENTE and not any(filtros.values()):
+        raise ConsultaNoSoportada("orden=reciente requiere al menos un filtro")
+
+    plan = PlanConsulta(orden)
+    # Sin ningún contador (resumen todavía no escrito) no se sabe nada. Con
+    # cursor se sigue leyendo el índice de la página anterior
+    hay_conteos = bool(conteos) and any(conteos.values())
+    if hay_conteos and not cursor and any(
+        _conteo(conteos, atributo, valor) == 0 for atributo, valor in filtros.items() if valor
+    ):
+        plan.vacio = True
+        return plan
+
+    if orden == ORDEN_PRIORIDAD:
+        plan.indice = INDICE_PRIORIDAD
+        plan.hash_key, plan.valor = "abierto", ABIERTO
+        plan.range_key = "prioridadKey"
+    else:
+        candidatos = [(atributo, indice) for atributo, indice in INDICES if filtros.get(atributo)]
+        fijado = _indice_de_cursor(cursor) if cursor else None
+        if fijado in {indice for _, indice in candidatos}:
+            candidatos.sort(key=lambda c: c[1] != fijado)
+        elif hay_conteos:
+            candidatos.sort(key=lambda c: _conteo(conteos, c[0], filtros[c[0]]))
+        if candidatos:
+            plan.hash_key, plan.indice = candidatos[0]
+            plan.valor = filtros[plan.hash_key]
+            plan.range_key = "createdAt"
+            plan.ascendente = False
+
+    for atributo, _ in INDICES:
+        if atributo == plan.hash_key:
+            continue
+        valor = filtros.get(atributo)
+        if valor:
+            condicion = Attr(atributo).eq(valor)
+        elif atributo == "estado" and plan.indice != INDICE_PRIORIDAD:
+            condicion = Attr("estado").ne(ESTADO_CERRADO)
+        else:
+            continue
+        plan.filtro = condicion if plan.filtro is None else plan.filtro & condicion
+
+    return plan
+
+
+def _conteo(conteos, atributo, valor):
+    # Los contadores en cero no se guardan: si falta, no hay ninguno
+    return conteos.get(atributo, {}).get(valor, 0)
+
+
+def codificar_cursor(plan, clave):
+    crudo = json.dumps({"i": plan.indice, "k": clave}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii")
+
+
+def _leer_cursor(cursor):
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datos["i"], datos["k"]
+    except (AttributeError, binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise CursorInvalido("cursor inválido")
+
+
+def _indice_de_cursor(cursor):
+    # Un cursor roto no decide nada aquí; lo rechaza decodificar_cursor
+    try:
+        return _leer_cursor(cursor)[0]
+    except CursorInvalido:
+        return None
+
+
+def decodificar_cursor(plan, cursor):
+    """Devuelve el ExclusiveStartKey del cursor o lanza CursorInvalido."""
+    indice, clave = _leer_cursor(cursor)
+
+    # Un cursor solo vale para la misma consulta que lo generó
+    if indice != plan.indice or not isinstance(clave, dict) or "id" not in clave:
+        raise CursorInvalido("el cursor no corresponde a estos filtros")
+    return clave
+
+
+def ejecutar(table, plan, limit, cursor=None):
+    """
+    Corre el plan hasta juntar `limit` ítems. Devuelve (items, next_cursor);
+    next_cursor es None cuando no hay más resultados.
+    """
+    if plan.vacio:
+        return [], None
+
+    kwargs = {}
+    if plan.indice is None:
+        operacion = table.scan
+    else:
+        operacion = table.query
+        kwargs["IndexName"] = plan.indice
+        kwargs["KeyConditionExpression"] = Key(plan.hash_key).eq(plan.valor)
+        kwargs["ScanIndexForward"] = plan.ascendente
+    if plan.filtro is not None:
+        kwargs["FilterExpression"] = plan.filtro
+    if cursor:
+        kwargs["ExclusiveStartKey"] = decodificar_cursor(plan, cursor)
+
+    items = []
+    evaluados = 0
+    while True:
+        faltan = limit - len(items)
+        kwargs["Limit"] = faltan if plan.filtro is None else max(faltan, PAGINA_CON_FILTRO)
+        resp = operacion(**kwargs)
+        nuevos = resp.get("Items", [])
+        last_key = resp.get("LastEvaluatedKey")
+        evaluados += resp.get("ScannedCount", len(nuevos))
+
+        if len(nuevos) >= faltan:
+            items.extend(nuevos[:faltan])
+            # Si sobraron ítems de esta página se retoma justo después del
+            # último devuelto, no desde LastEvaluatedKey
+            if len(nuevos) > faltan or last_key:
+                return items, codificar_cursor(plan, plan.clave_de(items[-1]))
+            return items, None
+
+        items.extend(nuevos)
+        if not last_key:
+            return items, None
+        if evaluados >= MAX_EVALUADOS:
+            return items, codificar_cursor(plan, last_key)
+        kwargs["ExclusiveStartKey"] = last_key
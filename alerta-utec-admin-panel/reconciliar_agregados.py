@@ -0,0 +1,122 @@
+"""
+Recalcula los contadores de /admin/incidentes/resumen y los buckets de
+/admin/incidentes/tendencias con un Scan completo de Incidentes y reporta
+la diferencia con los que mantiene el stream. También sirve para cargar
+las tendencias de los incidentes anteriores al sink de tendencias.
+
+Uso (desde alerta-utec-admin-panel, con credenciales de AWS):
+    INCIDENTES_TABLE=Incidentes AGREGADOS_TABLE=IncidentesAgregados \\
+    TENDENCIAS_TABLE=IncidentesTendencias PYTHONPATH=../alerta-common/python \\
+        python reconciliar_agregados.py [--aplicar] [--segmentos 8] [--rcu-por-segundo N]
+
+Sin --aplicar solo reporta. Con --aplicar corrige con ADD de la diferencia
+(no reescribe los ítems), así que no pisa lo que el stream sume mientras
+corre; lo que cambie durante el Scan puede dejar una diferencia pequeña
+que la siguiente corrida corrige. Los buckets por hora que ya vencieron
+(expiraEn en el pasado) no se cuentan ni se comparan: el TTL los borra y
+recrearlos solo haría que cada corrida vuelva a ver drift.
+"""
+import argparse
+import json
+import os
+import time
+
+import boto3
+
+from alerta_common import tendencias
+from alerta_common.agregados import CLAVE_RESUMEN, DIMENSIONES, aplicar, contadores_de_item, contar
+from alerta_common.parallel_scan import escanear
+
+
+def drift(esperados, actuales):
+    """{contador: esperado - actual} para los que no coinciden."""
+    return {
+        contador: esperados.get(contador, 0) - actuales.get(contador, 0)
+        for contador in sorted(set(esperados) | set(actuales))
+        if esperados.get(contador, 0) != actuales.get(contador, 0)
+    }
+
+
+def drift_tendencias(esperados, actuales):
+    """{(serie, inicio): {valor: esperado - actual}} de los buckets que no coinciden."""
+    diferencias = {}
+    for bucket in set(esperados) | set(actuales):
+        d = drift(esperados.get(bucket, {}), actuales.get(bucket, {}))
+        if d:
+            diferencias[bucket] = d
+    return diferencias
+
+
+def _contando(items, conteos):
+    # Un solo Scan alimenta el resumen y las tendencias
+    for item in items:
+        contar([item], conteos)
+        yield item
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--aplicar", action="store_true", help="corregir los contadores")
+    parser.add_argument("--segmentos", type=int, default=8)
+    parser.add_argument("--rcu-por-segundo", type=float, help="tope de lectura del Scan")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb")
+    incidentes = dynamodb.Table(os.environ["INCIDENTES_TABLE"])
+    agregados = dynamodb.Table(os.environ["AGREGADOS_TABLE"])
+    tabla_tendencias = dynamodb.Table(os.environ["TENDENCIAS_TABLE"])
+
+    proyeccion = sorted(
+        set(DIMENSIONES) | set(tendencias.DIMENSIONES_TENDENCIA) - {"total"} | {"createdAt"}
+    )
+    # El mismo "ahora" para decidir qué buckets por hora ya vencieron al
+    # contar y al comparar
+    ahora = time.time()
+    esperados = {}
+    buckets_esperados = tendencias.contar(
+        _contando(
+            escanear(
+                incidentes,
+                args.segmentos,
+                proyeccion=proyeccion,
+                rcu_por_segundo=args.rcu_por_segundo,
+            ),
+            esperados,
+        ),
+        ahora=ahora,
+    )
+
+    actual = agregados.get_item(Key={"clave": CLAVE_RESUMEN}, ConsistentRead=True).get("Item")
+    diferencias = drift(esperados, contadores_de_item(actual))
+
+    buckets_actuales = {}
+    for serie in tendencias.series():
+        for inicio, valores in tendencias.leer_serie(tabla_tendencias, serie, consistente=True).items():
+            # Vencido pero todavía no borrado por el TTL
+            if not tendencias.vencido(serie, inicio, ahora):
+                buckets_actuales[(serie, inicio)] = valores
+    diferencias_buckets = drift_tendencias(buckets_esperados, buckets_actuales)
+
+    print(json.dumps(
+        {
+            "total": esperados.get("total", 0),
+            "drift": diferencias,
+            "bucketsConDrift": len(diferencias_buckets),
+            "ejemplosBuckets": {
+                f"{serie}@{inicio}": d
+                for (serie, inicio), d in sorted(diferencias_buckets.items())[:20]
+            },
+        },
+        indent=2,
+    ))
+    if args.aplicar:
+        if diferencias:
+            # Sube la versión para que los paneles no se queden con el 304
+            aplicar(agregados, diferencias, cambios=1)
+        if diferencias_buckets:
+            tendencias.aplicar(tabla_tendencias, diferencias_buckets)
+        print(f"{len(diferencias)} contadores y {len(diferencias_buckets)} buckets corregidos")
+
+
+if __name__ == "__main__":
+    main()
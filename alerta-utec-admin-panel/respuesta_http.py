@@ -0,0 +1,146 @@
+"""
+Respuestas del panel admin con ETag/304 y gzip.
+
+Los paneles abiertos consultan /admin/incidentes y /admin/incidentes/resumen
+cada pocos segundos y casi siempre reciben lo mismo. Con un ETag fuerte el
+navegador manda If-None-Match y, si nada cambió, se responde 304 sin cuerpo
+(y sin leer Incidentes: el ETag sale de la versión que mantiene el sink
+"resumen", ver alerta_common.agregados). Cache-Control: no-cache hace que
+el navegador guarde la respuesta pero la revalide en cada consulta.
+
+El listado lee índices con consistencia eventual y la versión llega por el
+stream, así que puede haber una respuesta vieja con una versión nueva. Por
+eso su ETag también lleva la ventana de ETAG_VENTANA_SECONDS en que se
+armó (ver ventana()): un cuerpo desactualizado se revalida a lo sumo una
+ventana después, aunque Incidentes no vuelva a cambiar.
+
+Los cuerpos de GZIP_MIN_BYTES o más van comprimidos si el cliente manda
+Accept-Encoding: gzip. HTTP API decodifica el base64 (isBase64Encoded) y
+entrega los bytes tal cual.
+"""
+import base64
+import gzip
+import hashlib
+import os
+import time
+
+from alerta_common.dynamo_json import dumps
+
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", "1024"))
+GZIP_NIVEL = 6
+ETAG_VENTANA_SECONDS = int(os.environ.get("ETAG_VENTANA_SECONDS", "60"))
+
+# Sufijo del ETag de la representación comprimida: es otra secuencia de
+# bytes, así que un ETag fuerte no puede ser el mismo
+_SUFIJO_GZIP = "-gz"
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,GET",
+    # La misma URL puede ir comprimida o no según Accept-Encoding
+    "Vary": "Accept-Encoding",
+}
+
+
+def _header(event, nombre):
+    # HTTP API (payload 2.0) manda los headers en minúsculas
+    headers = event.get("headers") or {}
+    return headers.get(nombre) or headers.get(nombre.title())
+
+
+def etag(version, *partes):
+    """
+    ETag fuerte para una versión de Incidentes y lo que se pidió (filtros,
+    cursor, límite). None si no hay versión: entonces no se usa caché.
+    """
+    if version is None:
+        return None
+    huella = hashlib.sha1(dumps(partes, compacto=True).encode("utf-8")).hexdigest()[:16]
+    return f'"{version}-{huella}"'
+
+
+def ventana(ahora=None):
+    """Número de la ventana de ETAG_VENTANA_SECONDS actual, para el ETag."""
+    return int(time.time() if ahora is None else ahora) // ETAG_VENTANA_SECONDS
+
+
+def coincide(event, tag):
+    """¿El If-None-Match del cliente ya tiene esta versión (con o sin gzip)?"""
+    if not tag:
+        return False
+    enviado = _header(event, "if-none-match")
+    if not enviado:
+        return False
+    # If-None-Match usa comparación débil (RFC 9110): se ignora W/
+    candidatos = {t.strip().removeprefix("W/") for t in enviado.split(",")}
+    return "*" in candidatos or bool(candidatos & {tag, _con_gzip(tag)})
+
+
+def _con_gzip(tag):
+    return tag[:-1] + _SUFIJO_GZIP + '"'
+
+
+def _calidad(parametros):
+    # q=... de una entrada de Accept-Encoding; sin q (o ilegible) vale 1
+    for parametro in parametros.split(";"):
+        nombre, _, valor = parametro.strip().partition("=")
+        if nombre.strip().lower() == "q":
+            try:
+                return float(valor)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+
+def acepta_gzip(event):
+    """
+    ¿Accept-Encoding admite gzip? Una entrada "gzip" explícita manda sobre
+    "*" (RFC 9110), sin importar el orden: "*;q=0, gzip" sí lo acepta.
+    """
+    calidades = {}
+    for codificacion in (_header(event, "accept-encoding") or "").split(","):
+        nombre, _, parametros = codificacion.partition(";")
+        nombre = nombre.strip().lower()
+        if nombre in ("gzip", "*"):
+            calidades[nombre] = _calidad(parametros)
+    calidad = calidades.get("gzip", calidades.get("*", 0))
+    return calidad > 0
+
+
+def no_modificado(tag):
+    headers = dict(HEADERS, ETag=tag)
+    headers["Cache-Control"] = "no-cache"
+    return {"statusCode": 304, "headers": headers, "body": ""}
+
+
+def responder(event, status_code, body, tag=None):
+    """
+    Respuesta para API Gateway: 304 si el cliente ya tiene `tag`, si no el
+    cuerpo en JSON (comprimido si conviene) con su ETag.
+    """
+    headers = dict(HEADERS)
+    if tag and status_code == 200:
+        if coincide(event, tag):
+            return no_modificado(tag)
+        headers["Cache-Control"] = "no-cache"
+    else:
+        tag = None
+
+    texto = dumps(body)
+    if len(texto) < GZIP_MIN_BYTES or not acepta_gzip(event):
+        if tag:
+            headers["ETag"] = tag
+        return {"statusCode": status_code, "headers": headers, "body": texto}
+
+    headers["Content-Encoding"] = "gzip"
+    if tag:
+        headers["ETag"] = _con_gzip(tag)
+    comprimido = gzip.compress(texto.encode("utf-8"), compresslevel=GZIP_NIVEL)
+    return {
+        "statusCode": status_code,
+        "headers": headers,
+        "body": base64.b64encode(comprimido).decode("ascii"),
+        "isBase64Encoded": True,
+    }
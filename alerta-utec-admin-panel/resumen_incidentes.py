@@ -2,54 +2,36 @@ import json
 import os
 import boto3
 
-dynamodb = boto3.resource("dynamodb")
-INCIDENTES_TABLE = os.environ["INCIDENTES_TABLE"]
-incidentes_table = dynamodb.Table(INCIDENTES_TABLE)
-
+from alerta_common.agregados import (
+    CLAVE_RESUMEN,
+    contadores_de_item,
+    resumen_desde_contadores,
+    version_de_item,
+)
+from respuesta_http import etag, responder
 
-def _response(status_code, body):
-    return {
-        "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*",
-            "Access-Control-Allow-Methods": "OPTIONS,GET",
-        },
-        "body": json.dumps(body),
-    }
+dynamodb = boto3.resource("dynamodb")
+AGREGADOS_TABLE = os.environ["AGREGADOS_TABLE"]
+agregados_table = dynamodb.Table(AGREGADOS_TABLE)
 
 
 def lambda_handler(event, context):
     print("Event resumenIncidentes:", json.dumps(event))
 
+    # Los contadores los mantiene el sink "resumen" del lector del stream
+    # (alerta-realtime/incidentes_stream.py); aquí es un solo GetItem en vez
+    # de un Scan de la tabla
     try:
-        res = incidentes_table.scan()
+        res = agregados_table.get_item(Key={"clave": CLAVE_RESUMEN})
     except Exception as e:
-        print("Error leyendo Incidentes:", e)
-        return _response(500, {"message": "Error interno leyendo incidentes"})
-
-    items = res.get("Items", [])
-
-    por_estado = {}
-    por_nivel = {}
-    por_area = {}
-
-    for it in items:
-        est = it.get("estado", "DESCONOCIDO")
-        niv = it.get("nivelDeGravedad", "DESCONOCIDO")
-        area = it.get("areaResponsable", "DESCONOCIDO")
-
-        por_estado[est] = por_estado.get(est, 0) + 1
-        por_nivel[niv] = por_nivel.get(niv, 0) + 1
-        por_area[area] = por_area.get(area, 0) + 1
+        print("Error leyendo agregados:", e)
+        return responder(event, 500, {"message": "Error interno leyendo resumen"})
 
-    return _response(
+    item = res.get("Item")
+    # Si la versión no cambió, el cliente ya tiene estos conteos: 304
+    return responder(
+        event,
         200,
-        {
-            "total": len(items),
-            "porEstado": por_estado,
-            "porNivelDeGravedad": por_nivel,
-            "porAreaResponsable": por_area,
-        },
+        resumen_desde_contadores(contadores_de_item(item)),
+        etag(version_de_item(item), "resumen"),
     )
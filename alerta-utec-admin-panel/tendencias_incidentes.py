@@ -0,0 +1,90 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import boto3
+
+from alerta_common.dynamo_json import dumps
+from alerta_common.tendencias import DIMENSIONES_TENDENCIA, GRANULARIDADES, consultar, parsear_fecha
+
+dynamodb = boto3.resource("dynamodb")
+TENDENCIAS_TABLE = os.environ["TENDENCIAS_TABLE"]
+tendencias_table = dynamodb.Table(TENDENCIAS_TABLE)
+
+# Rango por defecto (?desde= omitido) y máximo de buckets por consulta
+RANGO_POR_DEFECTO = {"hora": timedelta(hours=24), "dia": timedelta(days=30)}
+MAX_BUCKETS = {"hora": 24 * 31, "dia": 366 * 2}
+
+
+def _response(status_code, body):
+    return {
+        "statusCode": status_code,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "*",
+            "Access-Control-Allow-Methods": "OPTIONS,GET",
+        },
+        "body": dumps(body),
+    }
+
+
+def lambda_handler(event, context):
+    print("Event tendenciasIncidentes:", json.dumps(event))
+
+    params = (event.get("queryStringParameters") or {}) or {}
+    dimension = params.get("dimension") or "total"
+    granularidad = params.get("granularidad") or "hora"
+
+    if dimension not in DIMENSIONES_TENDENCIA:
+        return _response(
+            400, {"message": f"dimension debe ser una de: {', '.join(DIMENSIONES_TENDENCIA)}"}
+        )
+    if granularidad not in GRANULARIDADES:
+        return _response(
+            400, {"message": f"granularidad debe ser una de: {', '.join(GRANULARIDADES)}"}
+        )
+
+    try:
+        hasta = parsear_fecha(params["hasta"]) if params.get("hasta") else datetime.utcnow()
+        desde = (
+            parsear_fecha(params["desde"])
+            if params.get("desde")
+            else hasta - RANGO_POR_DEFECTO[granularidad]
+        )
+    except ValueError:
+        return _response(400, {"message": "desde y hasta deben ser fechas ISO 8601"})
+    if desde > hasta:
+        return _response(400, {"message": "desde debe ser anterior a hasta"})
+
+    ancho = GRANULARIDADES[granularidad][1]
+    if (hasta - desde) / ancho >= MAX_BUCKETS[granularidad]:
+        return _response(
+            400,
+            {"message": f"El rango no puede pasar de {MAX_BUCKETS[granularidad]} buckets de {granularidad}"},
+        )
+
+    # Un Query sobre los buckets del rango; no toca la tabla Incidentes
+    try:
+        buckets = consultar(tendencias_table, dimension, granularidad, desde, hasta)
+    except Exception as e:
+        print("Error leyendo tendencias:", e)
+        return _response(500, {"message": "Error interno leyendo tendencias"})
+
+    totales = {}
+    for bucket in buckets:
+        for valor, n in bucket["valores"].items():
+            totales[valor] = totales.get(valor, 0) + n
+
+    return _response(
+        200,
+        {
+            "dimension": dimension,
+            "granularidad": granularidad,
+            "desde": buckets[0]["inicio"],
+            "hasta": buckets[-1]["inicio"],
+            "total": sum(b["total"] for b in buckets),
+            "totales": totales,
+            "buckets": buckets,
+        },
+    )
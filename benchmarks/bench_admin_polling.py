@@ -0,0 +1,232 @@
+"""
+Paneles admin abiertos consultando /admin/incidentes y
+/admin/incidentes/resumen cada tick, con moto.
+
+- "sinCache": como antes, cada consulta sin If-None-Match ni
+  Accept-Encoding (respuesta completa y sin comprimir).
+- "condicional": como un navegador, guarda el ETag de cada URL, manda
+  If-None-Match y Accept-Encoding: gzip.
+
+Cada --cada-ticks ticks cambia un incidente y el cambio pasa por el sink
+"resumen" (lo que hace incidentesStream), que sube la versión.
+
+Reporta, por modo: llamadas a DynamoDB por tabla, bytes de cuerpo que
+salen por API Gateway, respuestas 200/304 y latencia media del handler.
+
+Uso:
+    python benchmarks/bench_admin_polling.py [--paneles 5] [--ticks 20]
+        [--cada-ticks 5] [--incidentes 200]
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-utec-admin-panel"))
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+os.environ.update({
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "INCIDENTES_TABLE": "Incidentes",
+    "AGREGADOS_TABLE": "IncidentesAgregados",
+})
+
+AREAS = ["ti", "seguridad", "infraestructura", "limpieza"]
+NIVELES = ["Baja", "Media", "Alta"]
+ESTADOS = ["Reportado", "EN_ATENCION", "RESUELTO"]
+
+URLS = [
+    ("listar", {}),
+    ("listar", {"areaResponsable": "ti"}),
+    ("resumen", None),
+]
+
+
+class ContadorDynamo:
+    def __init__(self):
+        self.por_tabla = {}
+
+    def instalar(self):
+        from botocore.client import BaseClient
+
+        original = BaseClient._make_api_call
+        contador = self
+
+        def _make_api_call(client, operation_name, api_params):
+            if client.meta.service_model.service_name == "dynamodb":
+                clave = f"{api_params.get('TableName')}:{operation_name}"
+                contador.por_tabla[clave] = contador.por_tabla.get(clave, 0) + 1
+            return original(client, operation_name, api_params)
+
+        BaseClient._make_api_call = _make_api_call
+
+
+def _incidente(i, estado=None):
+    from alerta_common.prioridad import atributos_de_prioridad
+
+    item = {
+        "id": f"inc-{i}",
+        "estado": estado or ESTADOS[i % len(ESTADOS)],
+        "areaResponsable": AREAS[i % len(AREAS)],
+        "nivelDeGravedad": NIVELES[i % len(NIVELES)],
+        "descripcion": f"incidente de prueba {i} " * 4,
+        "createdAt": f"2024-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+    }
+    item.update(atributos_de_prioridad(item))
+    return item
+
+
+def _gsi(nombre, hash_key, range_key):
+    return {
+        "IndexName": nombre,
+        "KeySchema": [
+            {"AttributeName": hash_key, "KeyType": "HASH"},
+            {"AttributeName": range_key, "KeyType": "RANGE"},
+        ],
+        "Projection": {"ProjectionType": "ALL"},
+    }
+
+
+def _sembrar(n_incidentes):
+    import boto3
+
+    from alerta_common.agregados import CLAVE_RESUMEN, VERSION, contar
+
+    dynamodb = boto3.resource("dynamodb")
+    gsis = [
+        _gsi(f"{atributo}-createdAt-index", atributo, "createdAt")
+        for atributo in ("estado", "areaResponsable", "nivelDeGravedad")
+    ] + [_gsi("abiertos-prioridad-index", "abierto", "prioridadKey")]
+    atributos = {"id", "createdAt", "estado", "areaResponsable", "nivelDeGravedad", "abierto", "prioridadKey"}
+    incidentes = dynamodb.create_table(
+        TableName="Incidentes",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in sorted(atributos)],
+        GlobalSecondaryIndexes=gsis,
+        BillingMode="PAY_PER_REQUEST",
+    )
+    agregados = dynamodb.create_table(
+        TableName="IncidentesAgregados",
+        KeySchema=[{"AttributeName": "clave", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "clave", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    items = [_incidente(i) for i in range(n_incidentes)]
+    with incidentes.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    resumen = contar(items)
+    resumen.update({"clave": CLAVE_RESUMEN, VERSION: n_incidentes})
+    agregados.put_item(Item=resumen)
+    return incidentes, agregados
+
+
+def _cambiar(incidentes, sink, n, seq):
+    """Un cambio de estado como lo vería incidentesStream."""
+    from alerta_common.prioridad import atributos_de_prioridad
+    from alerta_common.stream_pipeline import Cambio
+
+    viejo = incidentes.get_item(Key={"id": f"inc-{n}"})["Item"]
+    nuevo = dict(viejo, estado=ESTADOS[(ESTADOS.index(viejo["estado"]) + 1) % len(ESTADOS)])
+    nuevo.update(atributos_de_prioridad(nuevo))
+    incidentes.put_item(Item=nuevo)
+    sink.procesar([Cambio("MODIFY", nuevo, viejo, str(10_000 + seq))])
+
+
+def _bytes_cuerpo(res):
+    if res.get("isBase64Encoded"):
+        return len(base64.b64decode(res["body"]))
+    return len(res.get("body") or "")
+
+
+def _correr(modo, args, contador):
+    from moto import mock_aws
+
+    with mock_aws():
+        incidentes, agregados = _sembrar(args.incidentes)
+
+        import listar_incidentes_activos
+        import resumen_incidentes
+
+        from alerta_common.agregados import ResumenSink
+
+        sink = ResumenSink(agregados)
+        handlers = {
+            "listar": listar_incidentes_activos.lambda_handler,
+            "resumen": resumen_incidentes.lambda_handler,
+        }
+        etags = {}
+        status = {}
+        bytes_salida = 0
+        latencias = []
+        cambios = 0
+        contador.por_tabla = {}
+
+        for tick in range(args.ticks):
+            if tick and tick % args.cada_ticks == 0:
+                _cambiar(incidentes, sink, cambios * 7 % args.incidentes, cambios)
+                cambios += 1
+            for panel in range(args.paneles):
+                for i, (ruta, params) in enumerate(URLS):
+                    evento = {"queryStringParameters": params, "headers": {}}
+                    if modo == "condicional":
+                        evento["headers"]["accept-encoding"] = "gzip, deflate, br"
+                        if (panel, i) in etags:
+                            evento["headers"]["if-none-match"] = etags[(panel, i)]
+                    inicio = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        res = handlers[ruta](evento, None)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                    status[res["statusCode"]] = status.get(res["statusCode"], 0) + 1
+                    bytes_salida += _bytes_cuerpo(res)
+                    if res["headers"].get("ETag"):
+                        etags[(panel, i)] = res["headers"]["ETag"]
+
+        # El sink y _cambiar no son consultas de los paneles
+        llamadas = {
+            k: v for k, v in contador.por_tabla.items()
+            if k not in ("Incidentes:GetItem", "Incidentes:PutItem")
+            and not k.endswith((":BatchGetItem", ":TransactWriteItems"))
+        }
+        for modulo in ("listar_incidentes_activos", "resumen_incidentes", "respuesta_http"):
+            sys.modules.pop(modulo, None)
+
+    return {
+        "consultas": sum(status.values()),
+        "cambios": cambios,
+        "status": {str(k): v for k, v in sorted(status.items())},
+        "llamadasDynamo": dict(sorted(llamadas.items())),
+        "bytesSalida": bytes_salida,
+        "latenciaMediaMs": round(sum(latencias) / len(latencias), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paneles", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--cada-ticks", type=int, default=5)
+    parser.add_argument("--incidentes", type=int, default=200)
+    args = parser.parse_args()
+
+    contador = ContadorDynamo()
+    contador.instalar()
+    resultados = {modo: _correr(modo, args, contador) for modo in ("sinCache", "condicional")}
+    antes, ahora = resultados["sinCache"], resultados["condicional"]
+    resultados["reduccionBytes"] = round(1 - ahora["bytesSalida"] / antes["bytesSalida"], 3)
+    resultados["queriesIncidentes"] = {
+        modo: sum(n for k, n in r["llamadasDynamo"].items() if k.startswith("Incidentes:"))
+        for modo, r in (("sinCache", antes), ("condicional", ahora))
+    }
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Harness local del autorizador HTTP API de alerta-utec-incidentes: simula
+API Gateway (caché de autorizador por Authorization + routeKey) y mide la
+latencia de punta a punta de POST /incidentes en tres modos:
+
+- sin-autorizador: el handler valida el token él mismo (como antes)
+- autorizador:     cada request invoca al autorizador (resultTtlInSeconds=0)
+- autorizador+cache: API Gateway reutiliza la respuesta del autorizador
+
+DynamoDB es moto (pip install -r benchmarks/requirements.txt). La caché de
+tokens en memoria de auth.py se apaga para medir solo la de API Gateway.
+
+Uso:
+    python benchmarks/bench_authorizer.py [--requests 300] [--overhead-invocacion-ms 8]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "Incidentes"))
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.update(
+    {
+        "INCIDENTES_TABLE": "Incidentes",
+        "USUARIOS_TABLE": "tabla_usuarios",
+        "TOKENS_TABLE": "tokens_acceso",
+        "AUTH_CACHE_TTL_SECONDS": "0",
+        "AUTH_CACHE_NEGATIVE_TTL_SECONDS": "0",
+        "TOKEN_SIGNING_SECRET": "bench-secret",
+    }
+)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+
+def _crear_tablas():
+    dynamodb = boto3.resource("dynamodb")
+    for nombre, clave in [
+        ("Incidentes", "id"),
+        ("tabla_usuarios", "email"),
+        ("tokens_acceso", "token"),
+    ]:
+        dynamodb.create_table(
+            TableName=nombre,
+            KeySchema=[{"AttributeName": clave, "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": clave, "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+    dynamodb.Table("tabla_usuarios").put_item(
+        Item={"email": "admin@utec.edu.pe", "rol": "administrativo", "area": "seguridad"}
+    )
+    dynamodb.Table("tokens_acceso").put_item(
+        Item={"token": "token-bench", "email": "admin@utec.edu.pe", "rol": "administrativo"}
+    )
+
+
+class FakeHttpApi:
+    """Lo justo de API Gateway HTTP API para correr autorizador + handler."""
+
+    def __init__(self, autorizador, result_ttl, overhead_s):
+        self.autorizador = autorizador
+        self.result_ttl = result_ttl
+        self.overhead_s = overhead_s
+        self.cache = {}
+        self.invocaciones = 0
+
+    def _autorizar(self, route_key, headers):
+        clave = (headers.get("authorization"), route_key)
+        cached = self.cache.get(clave)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        time.sleep(self.overhead_s)  # invocar otro Lambda no es gratis
+        self.invocaciones += 1
+        res = self.autorizador.lambda_handler(
+            {"routeKey": route_key, "headers": headers}, None
+        )
+        if self.result_ttl > 0:
+            self.cache[clave] = (time.monotonic() + self.result_ttl, res)
+        return res
+
+    def request(self, handler, route_key, headers, body, usar_autorizador=True):
+        event = {"routeKey": route_key, "headers": headers, "body": json.dumps(body)}
+        if usar_autorizador:
+            res = self._autorizar(route_key, headers)
+            if not res.get("isAuthorized"):
+                return {"statusCode": 403}
+            event["requestContext"] = {"authorizer": {"lambda": res["context"]}}
+        return handler(event, None)
+
+
+def _medir(api, handler, n, usar_autorizador):
+    headers = {"authorization": "Bearer token-bench"}
+    body = {"estado": "Reportado", "nivelDeGravedad": "Media", "descripcion": "bench"}
+    latencias = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            res = api.request(handler, "POST /incidentes", headers, body, usar_autorizador)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        assert res["statusCode"] == 201, res
+    latencias.sort()
+    return {
+        "p50Ms": round(statistics.median(latencias), 2),
+        "p99Ms": round(latencias[int(len(latencias) * 0.99) - 1], 2),
+        "invocacionesAutorizador": api.invocaciones,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--overhead-invocacion-ms", type=float, default=8)
+    args = parser.parse_args()
+
+    with mock_aws():
+        _crear_tablas()
+        import autorizador
+        import crear_incidente
+
+        overhead = args.overhead_invocacion_ms / 1000
+        modos = [
+            ("sin-autorizador", FakeHttpApi(autorizador, 0, overhead), False),
+            ("autorizador", FakeHttpApi(autorizador, 0, overhead), True),
+            ("autorizador+cache", FakeHttpApi(autorizador, 60, overhead), True),
+        ]
+        for nombre, api, usar in modos:
+            stats = _medir(api, crear_incidente.lambda_handler, args.requests, usar)
+            print(f"{nombre:>18} {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
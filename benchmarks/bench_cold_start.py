@@ -0,0 +1,592 @@
+"""
+Suite de cold start y costo por invocación de todos los handlers Lambda.
+
+Cada handler corre en un proceso nuevo (como un contenedor Lambda recién
+creado) contra moto como DynamoDB / API Gateway local, y se mide:
+
+- importMs:      importar el módulo del handler (boto3 ya lo cargó moto,
+                 así que no entra; sí los clientes creados a nivel de módulo)
+- primeraMs:     primera invocación (sesión, cliente y conexiones en frío)
+- calienteP50Ms / calienteP99Ms: invocaciones siguientes
+- roundTrips:    llamadas a AWS por invocación caliente, por operación
+- memoriaPicoKb: pico de memoria Python (tracemalloc) de una invocación caliente
+- maxRssMb:      RSS máximo del proceso al terminar (incluye moto)
+
+La salida es un JSON en stdout (o en --salida) pensado para guardarse por
+commit y compararse con --comparar:
+
+    python benchmarks/bench_cold_start.py --salida base.json
+    # ... cambios ...
+    python benchmarks/bench_cold_start.py --comparar base.json
+
+Con --modo sin-reuso se descartan los clientes de alerta_common.clients
+antes de cada invocación (lo que pasaba cuando se llamaba boto3.resource()
+dentro del handler). Las latencias absolutas son las de moto, no las de
+AWS; sirven para comparar entre commits y entre modos. Las cachés en
+memoria (tokens, suscriptores) quedan con sus valores por defecto, así que
+roundTrips es lo que hace un contenedor caliente real.
+
+Requiere: pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+WS_ENDPOINT = "https://bench.execute-api.us-east-1.amazonaws.com/dev"
+
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "INCIDENTES_TABLE": "Incidentes",
+    "USUARIOS_TABLE": "tabla_usuarios",
+    "TOKENS_TABLE": "tokens_acceso",
+    "REVOKED_TOKENS_TABLE": "tokens_revocados",
+    "HISTORIAL_TABLE": "t_historial",
+    "CONNECTIONS_TABLE": "Connections",
+    "EVENT_LOG_TABLE": "IncidentesEventos",
+    "AGREGADOS_TABLE": "IncidentesAgregados",
+    "TENDENCIAS_TABLE": "IncidentesTendencias",
+    "WS_ENDPOINT": WS_ENDPOINT,
+    "SHARD_DISPATCH": "inline",
+    "TOKEN_SIGNING_SECRET": "bench-secret",
+    "TOKEN_FORMAT": "uuid",
+}
+
+N_INCIDENTES = 200
+N_CONEXIONES = 50
+N_EVENTOS_LOG = 20
+N_HISTORIAL = 20  # incidentes con historial sembrado
+CAMBIOS_POR_INCIDENTE = 15
+RECORDS_POR_LOTE = 10
+
+AREAS = ["ti", "seguridad", "infraestructura", "limpieza"]
+NIVELES = ["Baja", "Media", "Alta"]
+ESTADOS = ["Reportado", "EN_ATENCION", "RESUELTO"]
+
+HEADERS_ADMIN = {"authorization": "Bearer token-bench"}
+
+
+def _incidente(i, estado=None):
+    from alerta_common.prioridad import atributos_de_prioridad
+
+    item = {
+        "id": f"inc-{i}",
+        "estado": estado or ESTADOS[i % len(ESTADOS)],
+        "areaResponsable": AREAS[i % len(AREAS)],
+        "nivelDeGravedad": NIVELES[i % len(NIVELES)],
+        "descripcion": f"incidente de prueba {i}",
+        "createdAt": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+    }
+    item.update(atributos_de_prioridad(item))
+    return item
+
+
+def _record_stream(i, j):
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    n = i * RECORDS_POR_LOTE + j
+    old = _incidente(n % N_INCIDENTES, "Reportado")
+    new = dict(old, estado="EN_ATENCION", updatedAt="2024-01-02T00:00:00")
+    return {
+        "eventName": "MODIFY",
+        "dynamodb": {
+            "Keys": {"id": {"S": new["id"]}},
+            "NewImage": {k: serializer.serialize(v) for k, v in new.items()},
+            "OldImage": {k: serializer.serialize(v) for k, v in old.items()},
+            "SequenceNumber": str(10_000 + n),
+            "ApproximateCreationDateTime": 1704067200 + n,
+        },
+    }
+
+
+def _ws(connection_id, body=None):
+    evento = {"requestContext": {"connectionId": connection_id}}
+    if body is not None:
+        evento["body"] = json.dumps(body)
+    return evento
+
+
+def _evento_crear_incidente(i):
+    body = {"estado": "Reportado", "nivelDeGravedad": "Media", "descripcion": f"bench {i}"}
+    return {"routeKey": "POST /incidentes", "headers": HEADERS_ADMIN, "body": json.dumps(body)}
+
+
+def _evento_eliminar_incidente(i):
+    return {
+        "routeKey": "DELETE /incidentes/{id}",
+        "headers": HEADERS_ADMIN,
+        "pathParameters": {"id": f"inc-{i}"},
+    }
+
+
+def _evento_validar_token(i):
+    return {"headers": HEADERS_ADMIN}
+
+
+def _evento_autorizador(i):
+    return {"routeKey": "POST /incidentes", "headers": HEADERS_ADMIN}
+
+
+def _evento_actualizar_estado(i):
+    return {
+        "pathParameters": {"id": f"inc-{i % N_INCIDENTES}"},
+        "body": json.dumps({"estado": ESTADOS[(i + 1) % len(ESTADOS)]}),
+        # Lo que deja tokenAuthorizer
+        "requestContext": {
+            "authorizer": {"lambda": {"email": "admin@utec.edu.pe", "rol": "administrativo", "area": "seguridad"}}
+        },
+    }
+
+
+def _evento_stream(i):
+    return {"Records": [_record_stream(i, j) for j in range(RECORDS_POR_LOTE)]}
+
+
+def _evento_broadcast_shard(i):
+    eventos = []
+    for record in _evento_stream(i)["Records"]:
+        eventos.append(
+            {
+                "eventName": record["eventName"],
+                "newImage": _incidente(0, "EN_ATENCION"),
+                "oldImage": _incidente(0, "Reportado"),
+                "seq": record["dynamodb"]["SequenceNumber"],
+            }
+        )
+    return {"shard": 0, "eventos": eventos}
+
+
+def _evento_listar(i):
+    return {"queryStringParameters": {"areaResponsable": AREAS[i % len(AREAS)]}}
+
+
+def _evento_resumen(i):
+    return {}
+
+
+def _evento_tendencias(i):
+    if i % 2:
+        params = {"granularidad": "dia", "desde": "2023-12-01", "hasta": "2024-01-31"}
+    else:
+        params = {"granularidad": "hora", "desde": "2024-01-01T00:00", "hasta": "2024-01-01T23:59"}
+    params["dimension"] = "areaResponsable"
+    return {"queryStringParameters": params}
+
+
+def _evento_historial_incidente(i):
+    return {
+        "pathParameters": {"id": f"inc-{i % N_HISTORIAL}"},
+        "queryStringParameters": {"limit": "10", "orden": "desc"},
+    }
+
+
+def _evento_historial_lote(i):
+    ids = ",".join(f"inc-{(i + k) % N_HISTORIAL}" for k in range(10))
+    return {"queryStringParameters": {"ids": ids, "limit": "5"}}
+
+
+def _evento_crear_usuario(i):
+    body = {"email": f"user{i}@utec.edu.pe", "password": "x", "rol": "usuario", "area": "ti"}
+    return {"body": json.dumps(body)}
+
+
+def _evento_login_usuario(i):
+    return {"body": json.dumps({"email": "admin@utec.edu.pe", "password": "admin"})}
+
+
+def _evento_logout_usuario(i):
+    return {"headers": {"authorization": f"Bearer logout-{i}"}}
+
+
+def _evento_ws_connect(i):
+    evento = _ws(f"nueva-{i}")
+    evento["queryStringParameters"] = {"areaResponsable": "ti", "formato": "delta"}
+    return evento
+
+
+def _evento_ws_disconnect(i):
+    return _ws(f"conn-{i % N_CONEXIONES}")
+
+
+def _evento_ws_heartbeat(i):
+    return _ws(f"conn-{i % N_CONEXIONES}", {"action": "heartbeat"})
+
+
+def _evento_ws_incidente(i):
+    return _ws("conn-0", {"action": "incidente", "id": f"inc-{i % N_INCIDENTES}"})
+
+
+def _evento_ws_sync(i):
+    return _ws("conn-0", {"action": "sync", "desde": "1"})
+
+
+# nombre de la función en serverless.yml -> (servicio, módulo, evento(i))
+HANDLERS = {
+    "crearIncidente": ("Incidentes", "crear_incidente", _evento_crear_incidente),
+    "eliminarIncidente": ("Incidentes", "eliminar_incidente", _evento_eliminar_incidente),
+    "validarToken": ("Incidentes", "validar_token", _evento_validar_token),
+    "autorizador": ("Incidentes", "autorizador", _evento_autorizador),
+    "actualizarEstadoIncidente": ("alerta-incidentes-api", "update_incidente", _evento_actualizar_estado),
+    "historialIncidente": ("alerta-incidentes-api", "historial_incidente", _evento_historial_incidente),
+    "historialLote": ("alerta-incidentes-api", "historial_lote", _evento_historial_lote),
+    "listarIncidentesActivos": ("alerta-utec-admin-panel", "listar_incidentes_activos", _evento_listar),
+    "resumenIncidentes": ("alerta-utec-admin-panel", "resumen_incidentes", _evento_resumen),
+    "tendenciasIncidentes": ("alerta-utec-admin-panel", "tendencias_incidentes", _evento_tendencias),
+    "crearUsuario": ("seguridad-usuarios", "crear_usuario", _evento_crear_usuario),
+    "loginUsuario": ("seguridad-usuarios", "login_usuario", _evento_login_usuario),
+    "logoutUsuario": ("seguridad-usuarios", "logout_usuario", _evento_logout_usuario),
+    "websocketConnect": ("alerta-realtime", "websocket_connect", _evento_ws_connect),
+    "websocketDisconnect": ("alerta-realtime", "websocket_disconnect", _evento_ws_disconnect),
+    "websocketHeartbeat": ("alerta-realtime", "websocket_heartbeat", _evento_ws_heartbeat),
+    "websocketIncidente": ("alerta-realtime", "websocket_incidente", _evento_ws_incidente),
+    "websocketSync": ("alerta-realtime", "websocket_sync", _evento_ws_sync),
+    "incidentesStream": ("alerta-realtime", "incidentes_stream", _evento_stream),
+    "broadcastShard": ("alerta-realtime", "broadcast_shard", _evento_broadcast_shard),
+}
+
+
+def _gsi(nombre, hash_key, range_key=None):
+    claves = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+    if range_key:
+        claves.append({"AttributeName": range_key, "KeyType": "RANGE"})
+    return {
+        "IndexName": nombre,
+        "KeySchema": claves,
+        "Projection": {"ProjectionType": "ALL"},
+    }
+
+
+def _crear_tabla(dynamodb, nombre, hash_key, range_key=None, tipos=None, gsis=None):
+    tipos = tipos or {}
+    claves = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+    atributos = {hash_key}
+    if range_key:
+        claves.append({"AttributeName": range_key, "KeyType": "RANGE"})
+        atributos.add(range_key)
+    kwargs = {}
+    if gsis:
+        kwargs["GlobalSecondaryIndexes"] = gsis
+        for gsi in gsis:
+            atributos.update(k["AttributeName"] for k in gsi["KeySchema"])
+    dynamodb.create_table(
+        TableName=nombre,
+        KeySchema=claves,
+        AttributeDefinitions=[
+            {"AttributeName": a, "AttributeType": tipos.get(a, "S")} for a in sorted(atributos)
+        ],
+        BillingMode="PAY_PER_REQUEST",
+        **kwargs,
+    )
+    return dynamodb.Table(nombre)
+
+
+def _sembrar(invocaciones):
+    """Crea las tablas de todos los servicios con datos suficientes para `invocaciones`."""
+    import hashlib
+
+    import boto3
+
+    dynamodb = boto3.resource("dynamodb")
+    incidentes = _crear_tabla(
+        dynamodb,
+        "Incidentes",
+        "id",
+        gsis=[
+            _gsi(f"{atributo}-createdAt-index", atributo, "createdAt")
+            for atributo in ("estado", "areaResponsable", "nivelDeGravedad")
+        ]
+        + [_gsi("abiertos-prioridad-index", "abierto", "prioridadKey")],
+    )
+    usuarios = _crear_tabla(dynamodb, "tabla_usuarios", "email")
+    tokens = _crear_tabla(dynamodb, "tokens_acceso", "token")
+    _crear_tabla(dynamodb, "tokens_revocados", "jti")
+    historial = _crear_tabla(dynamodb, "t_historial", "incidenteId", "changedAt")
+    conexiones = _crear_tabla(
+        dynamodb,
+        "Connections",
+        "connectionId",
+        tipos={"shard": "N"},
+        gsis=[_gsi("topic-shard-index", "topic", "shard")],
+    )
+    eventos = _crear_tabla(
+        dynamodb, "IncidentesEventos", "particion", "seq", gsis=[_gsi("seq-index", "seq")]
+    )
+    agregados = _crear_tabla(dynamodb, "IncidentesAgregados", "clave")
+    tendencias = _crear_tabla(dynamodb, "IncidentesTendencias", "serie", "inicio")
+
+    usuarios.put_item(
+        Item={
+            "email": "admin@utec.edu.pe",
+            "passwordHash": hashlib.sha256(b"admin").hexdigest(),
+            "rol": "administrativo",
+            "area": "seguridad",
+        }
+    )
+    tokens.put_item(Item={"token": "token-bench", "email": "admin@utec.edu.pe", "rol": "administrativo"})
+    with tokens.batch_writer() as batch:
+        for i in range(invocaciones):
+            batch.put_item(Item={"token": f"logout-{i}", "email": "admin@utec.edu.pe"})
+    resumen = {"clave": "resumen"}
+    buckets = {}
+    with incidentes.batch_writer() as batch:
+        for i in range(max(N_INCIDENTES, invocaciones)):
+            item = _incidente(i)
+            batch.put_item(Item=item)
+            resumen["total"] = resumen.get("total", 0) + 1
+            for dimension in ("estado", "nivelDeGravedad", "areaResponsable"):
+                contador = f"{dimension}#{item[dimension]}"
+                resumen[contador] = resumen.get(contador, 0) + 1
+            for serie, inicio in (
+                ("hora#areaResponsable", item["createdAt"][:13] + ":00"),
+                ("dia#areaResponsable", item["createdAt"][:10]),
+            ):
+                bucket = buckets.setdefault((serie, inicio), {"serie": serie, "inicio": inicio})
+                valor = "v#" + item["areaResponsable"]
+                bucket[valor] = bucket.get(valor, 0) + 1
+    resumen["version"] = N_INCIDENTES
+    agregados.put_item(Item=resumen)
+    with historial.batch_writer() as batch:
+        for i in range(N_HISTORIAL):
+            for j in range(CAMBIOS_POR_INCIDENTE):
+                batch.put_item(
+                    Item={
+                        "incidenteId": f"inc-{i}",
+                        "changedAt": f"2024-01-01T00:{j:02d}:00.000#{str(j).zfill(40)}",
+                        "evento": "MODIFY",
+                        "motivo": "CAMBIO_ESTADO",
+                        "estado": ESTADOS[j % len(ESTADOS)],
+                        "estadoAnterior": ESTADOS[(j - 1) % len(ESTADOS)],
+                        "actor": "admin@utec.edu.pe",
+                    }
+                )
+    for bucket in buckets.values():
+        tendencias.put_item(Item=bucket)
+    with conexiones.batch_writer() as batch:
+        for i in range(N_CONEXIONES):
+            batch.put_item(
+                Item={
+                    "connectionId": f"conn-{i}",
+                    "topic": "area=*|nivel=*",
+                    "shard": 0,
+                    "formato": ["completo", "delta", "lote"][i % 3],
+                    "expiresAt": int(time.time()) + 3600,
+                }
+            )
+    # Un bucket del log (hora actual, ver event_log.py)
+    bucket = int(time.time()) // 3600 * 3600
+    with eventos.batch_writer() as batch:
+        for seq in range(1, N_EVENTOS_LOG + 1):
+            delta = {"t": "delta", "ev": "MODIFY", "id": f"inc-{seq}", "seq": str(seq).zfill(40),
+                     "cambios": {"estado": "EN_ATENCION"}, "borrados": []}
+            batch.put_item(
+                Item={
+                    "particion": f"incidentes#{bucket}",
+                    "seq": str(seq).zfill(40),
+                    "delta": json.dumps(delta, separators=(",", ":")),
+                    "escritoEn": bucket * 1000 + seq,
+                    "expiresAt": int(time.time()) + 3600,
+                }
+            )
+
+
+class _ContadorLlamadas:
+    """Cuenta las llamadas a AWS de todos los clientes botocore del proceso."""
+
+    def __init__(self):
+        self.por_operacion = {}
+
+    def instalar(self):
+        from botocore.client import BaseClient
+
+        original = BaseClient._make_api_call
+        contador = self
+
+        def _make_api_call(client, operation_name, api_params):
+            clave = f"{client.meta.service_model.service_name}:{operation_name}"
+            contador.por_operacion[clave] = contador.por_operacion.get(clave, 0) + 1
+            return original(client, operation_name, api_params)
+
+        BaseClient._make_api_call = _make_api_call
+
+    def reset(self):
+        self.por_operacion = {}
+
+
+def _olvidar_clientes():
+    from alerta_common import clients
+
+    clients._session = None
+    clients._dynamodb_client = None
+    clients._dynamodb_resource = None
+    clients._tables.clear()
+
+
+def _invocar(handler, evento):
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = handler(evento, None)
+    if "statusCode" in res:
+        return str(res["statusCode"])
+    if "isAuthorized" in res:
+        return str(res["isAuthorized"])
+    if res.get("batchItemFailures"):
+        return "batchItemFailures"
+    return "ok"
+
+
+def _medir_hijo(nombre, invocaciones, modo):
+    """Corre dentro del proceso hijo: importa, invoca y devuelve el reporte."""
+    servicio, modulo, evento = HANDLERS[nombre]
+    sys.path.insert(0, os.path.join(RAIZ, servicio))
+    sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+    # moto se arranca antes de importar porque varios handlers crean sus
+    # tablas a nivel de módulo
+    from moto import mock_aws
+
+    contador = _ContadorLlamadas()
+    contador.instalar()
+
+    with mock_aws():
+        _sembrar(invocaciones + 2)
+
+        inicio = time.perf_counter()
+        handler = __import__(modulo).lambda_handler
+        import_ms = (time.perf_counter() - inicio) * 1000
+
+        latencias = []
+        llamadas = []
+        status = {}
+        for i in range(invocaciones + 1):
+            if modo == "sin-reuso":
+                _olvidar_clientes()
+            contador.reset()
+            inicio = time.perf_counter()
+            codigo = _invocar(handler, evento(i))
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            llamadas.append(dict(contador.por_operacion))
+            status[codigo] = status.get(codigo, 0) + 1
+
+        # Memoria aparte: tracemalloc distorsiona las latencias
+        tracemalloc.start()
+        _invocar(handler, evento(invocaciones + 1))
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    calientes = sorted(latencias[1:])
+    por_operacion = {}
+    for llamada in llamadas[1:]:
+        for operacion, n in llamada.items():
+            por_operacion[operacion] = por_operacion.get(operacion, 0) + n
+    return {
+        "handler": nombre,
+        "modo": modo,
+        "importMs": round(import_ms, 1),
+        "primeraMs": round(latencias[0], 1),
+        "calienteP50Ms": round(statistics.median(calientes), 2),
+        "calienteP99Ms": round(calientes[max(int(len(calientes) * 0.99) - 1, 0)], 2),
+        "roundTrips": round(sum(por_operacion.values()) / len(calientes), 2),
+        "roundTripsPrimera": sum(llamadas[0].values()),
+        "operaciones": {k: round(v / len(calientes), 2) for k, v in sorted(por_operacion.items())},
+        "memoriaPicoKb": round(pico / 1024, 1),
+        "maxRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "status": status,
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "-C", RAIZ, "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _comparar(base, actual):
+    """Imprime la variación de cada métrica respecto a un JSON anterior."""
+    anteriores = {(r["handler"], r["modo"]): r for r in base["resultados"]}
+    metricas = ["importMs", "primeraMs", "calienteP50Ms", "roundTrips", "memoriaPicoKb"]
+    print(f"{'handler':<28}{'modo':<11}" + "".join(f"{m:>22}" for m in metricas), file=sys.stderr)
+    for r in actual["resultados"]:
+        anterior = anteriores.get((r["handler"], r["modo"]))
+        if anterior is None:
+            continue
+        celdas = []
+        for m in metricas:
+            a, b = anterior[m], r[m]
+            variacion = f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+            celdas.append(f"{a}->{b} ({variacion})")
+        print(f"{r['handler']:<28}{r['modo']:<11}" + "".join(f"{c:>22}" for c in celdas), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invocaciones", type=int, default=50)
+    parser.add_argument("--modo", choices=["reutiliza", "sin-reuso", "ambos"], default="reutiliza")
+    parser.add_argument("--solo", nargs="*", choices=sorted(HANDLERS), help="handlers a medir")
+    parser.add_argument("--salida", help="archivo donde escribir el JSON")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--handler", choices=sorted(HANDLERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.handler:
+        os.environ.update(ENV)
+        print(json.dumps(_medir_hijo(args.handler, args.invocaciones, args.modo)))
+        return
+
+    modos = ["reutiliza", "sin-reuso"] if args.modo == "ambos" else [args.modo]
+    resultados = []
+    for modo in modos:
+        for nombre in args.solo or HANDLERS:
+            salida = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--handler", nombre,
+                    "--modo", modo,
+                    "--invocaciones", str(args.invocaciones),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            if salida.returncode != 0:
+                print(f"{nombre} ({modo}) falló:\n{salida.stderr}", file=sys.stderr)
+                continue
+            resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+            print(f"{nombre:<28}{modo:<11} p50={resultado['calienteP50Ms']}ms "
+                  f"rt={resultado['roundTrips']}", file=sys.stderr)
+            resultados.append(resultado)
+
+    reporte = {
+        "commit": _commit_actual(),
+        "python": sys.version.split()[0],
+        "invocaciones": args.invocaciones,
+        "resultados": resultados,
+    }
+    texto = json.dumps(reporte, indent=2)
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            _comparar(json.load(f), reporte)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Decodificar imágenes del stream y serializar respuestas: TypeDeserializer
+atributo por atributo (+ convertir Decimal antes de json.dumps) contra
+alerta_common.dynamo_json.
+
+Mide, por batch de --records records MODIFY (NewImage + OldImage):
+
+- decodeTypeDeserializerMs: lo que hacía el pipeline antes.
+- decodeDecimalMs:          a_python(numeros="decimal"), mismo resultado.
+- decodeNativoMs:           a_python(numeros="nativo"), listo para JSON.
+- decodeProyeccionMs:       a_python(numeros="nativo", campos=[...]).
+- jsonConvertirMs:          TypeDeserializer + pasar Decimal a int/float a
+                            mano + json.dumps (historial.py antes).
+- jsonNativoMs:             a_python(nativo) + json.dumps.
+- jsonConvertirDecimalMs:   ítems ya leídos con Decimal: convertir a mano +
+                            json.dumps.
+- jsonDumpsDecimalMs:       los mismos ítems con dynamo_json.dumps.
+
+Uso:
+    python benchmarks/bench_dynamo_json.py [--records 1000] [--repeticiones 10]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+from alerta_common.dynamo_json import (  # noqa: E402
+    NUMEROS_DECIMAL,
+    NUMEROS_NATIVOS,
+    a_python,
+    dumps,
+)
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # noqa: E402
+
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+CAMPOS_PROYECCION = ["id", "estado", "nivelDeGravedad", "areaResponsable"]
+
+
+def _imagen(n, estado):
+    item = {
+        "id": f"inc-{n}",
+        "estado": estado,
+        "nivelDeGravedad": "Alta",
+        "areaResponsable": "ti",
+        "categoria": "infraestructura",
+        "piso": Decimal(n % 12),
+        "descripcion": "descripción de prueba " * 6,
+        "createdAt": "2025-11-16T21:00:00",
+        "createdByEmail": f"usuario{n}@utec.edu.pe",
+        "prioridadKey": "1#2025-11-16T21:00:00",
+        "abierto": "1",
+        "ubicacion": {"lat": Decimal("-12.1352"), "lng": Decimal("-77.0220"), "aula": "A-301"},
+        "etiquetas": ["urgente", "electricidad"],
+        "votos": Decimal(n % 40),
+    }
+    return {k: serializer.serialize(v) for k, v in item.items()}
+
+
+def _records(n_records):
+    return [
+        {
+            "eventName": "MODIFY",
+            "dynamodb": {
+                "NewImage": _imagen(n, "EN_ATENCION"),
+                "OldImage": _imagen(n, "Reportado"),
+                "SequenceNumber": str(10_000 + n),
+            },
+        }
+        for n in range(n_records)
+    ]
+
+
+def _a_json(valor):
+    if isinstance(valor, Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if isinstance(valor, dict):
+        return {k: _a_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, set)):
+        return [_a_json(v) for v in valor]
+    return valor
+
+
+def _imagenes(records):
+    for record in records:
+        yield record["dynamodb"]["NewImage"]
+        yield record["dynamodb"]["OldImage"]
+
+
+def _medir(funcion, repeticiones):
+    funcion()  # calentamiento
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return round((time.perf_counter() - inicio) / repeticiones * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    records = _records(args.records)
+    imagenes = list(_imagenes(records))
+
+    def type_deserializer():
+        return [{k: deserializer.deserialize(v) for k, v in img.items()} for img in imagenes]
+
+    con_decimal = type_deserializer()
+    assert [a_python(img, numeros=NUMEROS_DECIMAL) for img in imagenes] == con_decimal
+    assert json.dumps(_a_json(con_decimal)) == dumps(con_decimal)
+
+    resultados = {
+        "records": args.records,
+        "decodeTypeDeserializerMs": _medir(type_deserializer, args.repeticiones),
+        "decodeDecimalMs": _medir(
+            lambda: [a_python(img, numeros=NUMEROS_DECIMAL) for img in imagenes],
+            args.repeticiones,
+        ),
+        "decodeNativoMs": _medir(
+            lambda: [a_python(img, numeros=NUMEROS_NATIVOS) for img in imagenes],
+            args.repeticiones,
+        ),
+        "decodeProyeccionMs": _medir(
+            lambda: [
+                a_python(img, numeros=NUMEROS_NATIVOS, campos=CAMPOS_PROYECCION)
+                for img in imagenes
+            ],
+            args.repeticiones,
+        ),
+        "jsonConvertirMs": _medir(
+            lambda: json.dumps(_a_json(type_deserializer())), args.repeticiones
+        ),
+        "jsonNativoMs": _medir(
+            lambda: json.dumps([a_python(img, numeros=NUMEROS_NATIVOS) for img in imagenes]),
+            args.repeticiones,
+        ),
+        "jsonConvertirDecimalMs": _medir(
+            lambda: json.dumps(_a_json(con_decimal)), args.repeticiones
+        ),
+        "jsonDumpsDecimalMs": _medir(lambda: dumps(con_decimal), args.repeticiones),
+    }
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark del fan-out de alerta-realtime contra un stand-in local del
+API Gateway Management API (cada post_to_connection simula latencia de red).
+
+Para cada número de conexiones mide de verdad:
+
+- serial: el loop original, un post_to_connection detrás de otro.
+- fan_out con cada valor de --workers.
+
+Por cada corrida reporta el tiempo total de entrega, los ms por conexión
+(total / conexiones) y las conexiones por worker. Mientras las conexiones
+no pasen de los workers el total se queda plano (~1 latencia); por encima
+crece con ceil(conexiones / workers), no con las conexiones.
+
+Uso:
+    python benchmarks/bench_fanout.py [--latencia-ms 10] [--workers 8 32 64]
+        [--conexiones 8 32 64 128 256 512]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "alerta-realtime"))
+
+from fanout import FanoutStats, _enviar, fan_out  # noqa: E402
+
+
+class _GoneException(Exception):
+    pass
+
+
+class FakeApiGatewayManagement:
+    """Stand-in de apigatewaymanagementapi: duerme `latencia` por mensaje."""
+
+    class exceptions:
+        GoneException = _GoneException
+
+    def __init__(self, latencia_s, gone_cada=0):
+        self.latencia_s = latencia_s
+        self.gone_cada = gone_cada
+        self.enviados = 0
+
+    def post_to_connection(self, ConnectionId, Data):
+        time.sleep(self.latencia_s)
+        if self.gone_cada and int(ConnectionId.split("-")[1]) % self.gone_cada == 0:
+            raise _GoneException(ConnectionId)
+        self.enviados += 1
+
+
+def _serial(apigw, connection_ids, payload):
+    """El loop de antes del fan-out: una conexión detrás de otra."""
+    stats = FanoutStats()
+    for connection_id in connection_ids:
+        resultado, latencia_ms = _enviar(apigw, connection_id, payload)
+        stats.latencias_ms.append(latencia_ms)
+        if resultado == "sent":
+            stats.sent += 1
+        elif resultado == "gone":
+            stats.gone += 1
+        else:
+            stats.failed += 1
+    return stats
+
+
+def _medir(funcion, n):
+    inicio = time.perf_counter()
+    stats = funcion()
+    total_s = time.perf_counter() - inicio
+    return {
+        "totalMs": round(total_s * 1000, 1),
+        "msPorConexion": round(total_s * 1000 / n, 3),
+        "sent": stats.sent,
+        "gone": stats.gone,
+        "p50EnvioMs": stats.to_dict()["p50Ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latencia-ms", type=float, default=10)
+    parser.add_argument("--workers", type=int, nargs="*", default=[8, 32, 64])
+    parser.add_argument("--conexiones", type=int, nargs="*", default=[8, 32, 64, 128, 256, 512])
+    parser.add_argument("--sin-serial", action="store_true", help="no medir el loop serial")
+    args = parser.parse_args()
+
+    payload = b'{"eventName": "MODIFY"}'
+    latencia_s = args.latencia_ms / 1000
+    resultados = []
+
+    for n in args.conexiones:
+        ids = [f"conn-{i}" for i in range(n)]
+        fila = {"conexiones": n}
+        if not args.sin_serial:
+            apigw = FakeApiGatewayManagement(latencia_s, gone_cada=50)
+            fila["serial"] = _medir(lambda: _serial(apigw, ids, payload), n)
+        for workers in args.workers:
+            apigw = FakeApiGatewayManagement(latencia_s, gone_cada=50)
+            medida = _medir(lambda: fan_out(apigw, ids, payload, max_workers=workers), n)
+            medida["conexionesPorWorker"] = round(n / workers, 2)
+            if "serial" in fila:
+                medida["speedup"] = round(fila["serial"]["totalMs"] / medida["totalMs"], 1)
+            fila[f"workers{workers}"] = medida
+        resultados.append(fila)
+
+    print(json.dumps({"latenciaMs": args.latencia_ms, "resultados": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
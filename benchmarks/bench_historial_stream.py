@@ -0,0 +1,132 @@
+"""
+Cuánto tarda el sink de historial de incidentesStream en drenar una ráfaga de cambios de estado
+(p.ej. una reclasificación de Airflow) contra un stand-in de DynamoDB con
+latencia por request y throttling parcial (UnprocessedItems).
+
+Compara el loop original (un put_item por record, en serie) con el
+sink actual (BatchWriteItem de a 25, lotes concurrentes, reintentos
+con backoff) y comprueba que los ítems que nunca se escriben salen en
+batchItemFailures y solo ellos, y que reprocesar los mismos records no
+agrega filas.
+
+Uso:
+    python benchmarks/bench_historial_stream.py [--records 5000] [--batch 500]
+        [--latencia-ms 8] [--throttle 0.1]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+from alerta_common.historial import HistorialSink  # noqa: E402
+from alerta_common.stream_pipeline import Pipeline  # noqa: E402
+from boto3.dynamodb.types import TypeSerializer  # noqa: E402
+
+serializer = TypeSerializer()
+
+
+class FakeDynamoDBClient:
+    """
+    batch_write_item con latencia fija + un poco por ítem; cada ítem queda
+    sin procesar con probabilidad `throttle` y los de `rechazados` siempre.
+    """
+
+    def __init__(self, latencia_s, throttle, rechazados=()):
+        self.latencia_s = latencia_s
+        self.throttle = throttle
+        self.rechazados = set(rechazados)
+        self.requests = 0
+        self.escritos = {}
+
+    def batch_write_item(self, RequestItems):
+        self.requests += 1
+        (tabla, requests), = RequestItems.items()
+        time.sleep(self.latencia_s + 0.0002 * len(requests))
+        pendientes = []
+        for request in requests:
+            item = request["PutRequest"]["Item"]
+            incidente_id = item["incidenteId"]["S"]
+            if incidente_id in self.rechazados or random.random() < self.throttle:
+                pendientes.append(request)
+            else:
+                self.escritos[(incidente_id, item["changedAt"]["S"])] = item
+        return {"UnprocessedItems": {tabla: pendientes} if pendientes else {}}
+
+
+def _record(n):
+    old = {"id": f"inc-{n}", "estado": "Reportado"}
+    new = dict(old, estado="EN_ATENCION")
+    return {
+        "eventName": "MODIFY",
+        "dynamodb": {
+            "NewImage": {k: serializer.serialize(v) for k, v in new.items()},
+            "OldImage": {k: serializer.serialize(v) for k, v in old.items()},
+            "SequenceNumber": str(10_000 + n),
+            "ApproximateCreationDateTime": 1704067200 + n // 10,
+        },
+    }
+
+
+def _drenar(records, batch, client):
+    pipeline = Pipeline([HistorialSink(client, "t_historial")])
+    fallidos = []
+    inicio = time.perf_counter()
+    for i in range(0, len(records), batch):
+        with contextlib.redirect_stdout(io.StringIO()):
+            res = pipeline.procesar(records[i:i + batch])
+        fallidos += [f["itemIdentifier"] for f in res["batchItemFailures"]]
+    return time.perf_counter() - inicio, fallidos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500, help="batchSize del stream")
+    parser.add_argument("--latencia-ms", type=float, default=8)
+    parser.add_argument("--throttle", type=float, default=0.1, help="fracción de UnprocessedItems por request")
+    args = parser.parse_args()
+    random.seed(1)
+
+    records = [_record(n) for n in range(args.records)]
+
+    # El loop original: un PutItem por record, en serie
+    serial_s = args.records * args.latencia_ms / 1000
+
+    client = FakeDynamoDBClient(args.latencia_ms / 1000, args.throttle)
+    segundos, fallidos = _drenar(records, args.batch, client)
+    filas = len(client.escritos)
+
+    # Reprocesar (reintento del stream) reescribe las mismas filas
+    _drenar(records, args.batch, client)
+
+    # Ítems que nunca se escriben: tienen que volver exactamente esos records
+    rechazados = {f"inc-{n}" for n in range(0, args.records, 997)}
+    client_rechazos = FakeDynamoDBClient(args.latencia_ms / 1000, args.throttle, rechazados)
+    _, fallidos_rechazos = _drenar(records, args.batch, client_rechazos)
+    esperados = {str(10_000 + int(r.split("-")[1])) for r in rechazados}
+
+    print(json.dumps({
+        "records": args.records,
+        "batchSize": args.batch,
+        "latenciaMs": args.latencia_ms,
+        "throttle": args.throttle,
+        "serialPutItemS": round(serial_s, 2),
+        "batchWriteS": round(segundos, 2),
+        "speedup": round(serial_s / segundos, 1),
+        "requests": client.requests,
+        "filasEscritas": filas,
+        "reprocesarNoDuplica": len(client.escritos) == filas,
+        "batchItemFailures": len(fallidos),
+        "rechazosReportadosExactos": set(fallidos_rechazos) == esperados,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Scan secuencial (table.scan() siguiendo LastEvaluatedKey, como hacían
+resumen y los scripts) contra alerta_common.parallel_scan.escanear con
+varios segmentos, sobre una tabla Incidentes local con 100k+ ítems.
+
+moto tarda segundos por página de 1 MB y ese costo es CPU dentro del mismo
+proceso, así que no sirve para medir throughput de un scan paralelo. Para
+el throughput se usa FakeScanTable: la semántica de Scan de DynamoDB
+(segmentos, páginas de 1 MB medidas sobre el ítem completo antes de la
+proyección, ExclusiveStartKey, ConsumedCapacity) con una latencia por
+página que modela el round trip. moto se usa aparte, con una tabla chica,
+para comprobar que escanear() devuelve exactamente lo mismo que scan()
+contra la API real y que retomar desde un checkpoint no pierde ítems.
+
+Uso:
+    python benchmarks/bench_parallel_scan.py [--incidentes 100000]
+        [--segmentos 1 4 8 16] [--latencia-base-ms 5] [--latencia-mb-ms 60]
+        [--rcu-por-segundo N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from alerta_common.parallel_scan import Checkpoint, escanear  # noqa: E402
+
+AREAS = ["ti", "seguridad", "infraestructura", "limpieza", "laboratorios"]
+NIVELES = ["Baja", "Media", "Alta"]
+ESTADOS = ["Reportado", "EN_ATENCION", "Cerrado"]
+
+MB = 1024 * 1024
+
+
+def _incidente(i):
+    return {
+        "id": f"inc-{i:07d}",
+        "estado": ESTADOS[i % 3],
+        "nivelDeGravedad": NIVELES[i % 7 % 3],
+        "areaResponsable": AREAS[i % 5],
+        "descripcion": "descripción de prueba " * 8,
+        "ubicacion": f"Pabellón {i % 12}",
+        "createdAt": f"2024-01-01T{i % 24:02d}:00:00",
+    }
+
+
+def _tamano(item):
+    return sum(len(k) + len(str(v)) for k, v in item.items())
+
+
+class FakeScanTable:
+    """Lo justo de Table.scan para medir un scan paralelo sin moto."""
+
+    def __init__(self, items, latencia_base_s, latencia_mb_s):
+        self.items = sorted(items, key=lambda it: it["id"])
+        # Tamaños precalculados: lo que cuesta medirlos es trabajo del
+        # servidor, no del cliente que se está midiendo
+        self.tamanos = {it["id"]: _tamano(it) for it in self.items}
+        self._tamanos_proyectados = {}
+        self.latencia_base_s = latencia_base_s
+        self.latencia_mb_s = latencia_mb_s
+        self.paginas = 0
+        self._segmentos = {}
+
+    def _segmento(self, segmento, total):
+        if total not in self._segmentos:
+            partes = [[] for _ in range(total)]
+            for item in self.items:
+                partes[zlib.crc32(item["id"].encode()) % total].append(item)
+            posiciones = [{it["id"]: i for i, it in enumerate(p)} for p in partes]
+            self._segmentos[total] = (partes, posiciones)
+        partes, posiciones = self._segmentos[total]
+        return partes[segmento], posiciones[segmento]
+
+    def scan(self, Segment=0, TotalSegments=1, ExclusiveStartKey=None, Limit=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None, **_):
+        items, posiciones = self._segmento(Segment, TotalSegments)
+        i = posiciones[ExclusiveStartKey["id"]] + 1 if ExclusiveStartKey else 0
+
+        atributos = None
+        if ProjectionExpression:
+            nombres = ExpressionAttributeNames or {}
+            atributos = [nombres.get(p.strip(), p.strip()) for p in ProjectionExpression.split(",")]
+
+        pagina, leidos, enviados = [], 0, 0
+        while i < len(items) and leidos < MB and (Limit is None or len(pagina) < Limit):
+            item = items[i]
+            tamano = self.tamanos[item["id"]]
+            leidos += tamano  # el límite de 1 MB es sobre el ítem completo
+            if atributos:
+                item = {a: item[a] for a in atributos if a in item}
+                clave = (item["id"], tuple(atributos))
+                if clave not in self._tamanos_proyectados:
+                    self._tamanos_proyectados[clave] = _tamano(item)
+                tamano = self._tamanos_proyectados[clave]
+            enviados += tamano
+            pagina.append(item)
+            i += 1
+
+        self.paginas += 1
+        time.sleep(self.latencia_base_s + self.latencia_mb_s * enviados / MB)
+        resp = {
+            "Items": pagina,
+            "Count": len(pagina),
+            "ScannedCount": len(pagina),
+            "ConsumedCapacity": {"CapacityUnits": leidos / 4096 / 2},
+        }
+        if i < len(items):
+            resp["LastEvaluatedKey"] = {"id": pagina[-1]["id"]}
+        return resp
+
+
+def _scan_secuencial(table, proyeccion=None):
+    kwargs = {}
+    if proyeccion:
+        kwargs["ProjectionExpression"] = ", ".join(f"#p{i}" for i in range(len(proyeccion)))
+        kwargs["ExpressionAttributeNames"] = {f"#p{i}": a for i, a in enumerate(proyeccion)}
+    while True:
+        resp = table.scan(**kwargs)
+        yield from resp.get("Items", [])
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def _medir(nombre, table, items):
+    paginas_antes = table.paginas
+    inicio = time.perf_counter()
+    ids = set()
+    for item in items:
+        ids.add(item["id"])
+    segundos = time.perf_counter() - inicio
+    return {
+        "modo": nombre,
+        "items": len(ids),
+        "paginas": table.paginas - paginas_antes,
+        "segundos": round(segundos, 2),
+        "itemsPorSegundo": round(len(ids) / segundos),
+    }
+
+
+def _verificar_con_moto(n):
+    """escanear() contra la API real (moto): mismo resultado y checkpoint sin pérdidas."""
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        table = boto3.resource("dynamodb").create_table(
+            TableName="Incidentes",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        with table.batch_writer() as batch:
+            for i in range(n):
+                batch.put_item(Item=_incidente(i))
+
+        esperado = {it["id"] for it in _scan_secuencial(table)}
+        paralelo = {it["id"] for it in escanear(table, 4, proyeccion=["id"], limite_por_pagina=100)}
+
+        checkpoint = Checkpoint(4)
+        vistos = set()
+        for i, item in enumerate(
+            escanear(table, 4, proyeccion=["id"], checkpoint=checkpoint, limite_por_pagina=100)
+        ):
+            vistos.add(item["id"])
+            if i >= n // 2:
+                break
+        retomado = Checkpoint.from_json(checkpoint.to_json())
+        vistos.update(
+            it["id"] for it in escanear(table, 4, proyeccion=["id"], checkpoint=retomado, limite_por_pagina=100)
+        )
+
+    return {
+        "items": n,
+        "igualAlScanSecuencial": paralelo == esperado,
+        "checkpointSinPerdidas": vistos == esperado and retomado.completo,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--incidentes", type=int, default=100_000)
+    parser.add_argument("--segmentos", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latencia-base-ms", type=float, default=5)
+    parser.add_argument("--latencia-mb-ms", type=float, default=60)
+    parser.add_argument("--rcu-por-segundo", type=float, help="también medir con presupuesto de RCU")
+    parser.add_argument("--items-moto", type=int, default=2000)
+    args = parser.parse_args()
+
+    table = FakeScanTable(
+        (_incidente(i) for i in range(args.incidentes)),
+        args.latencia_base_ms / 1000,
+        args.latencia_mb_ms / 1000,
+    )
+
+    # Partir la tabla en segmentos es trabajo del "servidor": fuera de la medición
+    for segmentos in set(args.segmentos) | {1, 8}:
+        table._segmento(0, segmentos)
+
+    resultados = [_medir("secuencial", table, _scan_secuencial(table))]
+    for segmentos in args.segmentos:
+        resultados.append(
+            _medir(
+                f"paralelo-{segmentos}",
+                table,
+                # FakeScanTable no es un resource: todos los hilos usan la misma
+                escanear(table, segmentos, tabla_para_hilo=lambda: table),
+            )
+        )
+    if args.rcu_por_segundo:
+        resultados.append(
+            _medir(
+                f"paralelo-8+{args.rcu_por_segundo:g}rcu/s",
+                table,
+                escanear(table, 8, rcu_por_segundo=args.rcu_por_segundo, tabla_para_hilo=lambda: table),
+            )
+        )
+
+    base = resultados[0]["segundos"]
+    for r in resultados:
+        r["speedup"] = round(base / r["segundos"], 2)
+
+    print(json.dumps({
+        "incidentes": args.incidentes,
+        "latenciaBaseMs": args.latencia_base_ms,
+        "latenciaMbMs": args.latencia_mb_ms,
+        "resultados": resultados,
+        "moto": _verificar_con_moto(args.items_moto),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
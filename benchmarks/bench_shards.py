@@ -0,0 +1,101 @@
+"""
+Escalamiento del fan-out por shards: reparte N conexiones en W shards y
+atiende cada shard en su propio proceso (lo mismo que hace
+dynamo_stream_broadcast con SHARD_DISPATCH=local). Cada proceso usa un
+stand-in del API Gateway Management API con latencia fija.
+
+Uso:
+    python benchmarks/bench_shards.py [--conexiones 4000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-realtime"))
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fanout  # noqa: E402
+from bench_fanout import FakeApiGatewayManagement  # noqa: E402
+from coalescing import Evento  # noqa: E402
+from rate_limiter import ConnectionRateLimiter  # noqa: E402
+from shard_worker import ShardWorker  # noqa: E402
+
+
+class FakeRegistry:
+    """Todas las conexiones del shard están suscritas a todo."""
+
+    def __init__(self, connection_ids):
+        self.connections = {cid: "completo" for cid in connection_ids}
+
+    def subscribers(self, topics, shard=None):
+        return self.connections
+
+    def discard(self, connection_id):
+        self.connections.pop(connection_id, None)
+
+    def remove_many(self, connection_ids):
+        for connection_id in connection_ids:
+            self.discard(connection_id)
+
+
+def _atender_shard(args):
+    shard, shards, conexiones, eventos, latencia_s, hilos = args
+    ids = [f"conn-{i}" for i in range(conexiones) if i % shards == shard]
+    worker = ShardWorker(
+        FakeApiGatewayManagement(latencia_s),
+        FakeRegistry(ids),
+        ConnectionRateLimiter(rate=1e9, burst=1e9),
+    )
+    fanout.FANOUT_WORKERS = hilos
+    inicio = time.perf_counter()
+    stats = worker.procesar([Evento.from_dict(e) for e in eventos], shard=shard)
+    return stats.sent, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conexiones", type=int, default=4000)
+    parser.add_argument("--eventos", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--latencia-ms", type=float, default=10)
+    parser.add_argument("--hilos-por-worker", type=int, default=16)
+    args = parser.parse_args()
+
+    eventos = [
+        Evento(
+            "MODIFY",
+            {"id": f"inc-{i}", "estado": "EN_ATENCION"},
+            {"id": f"inc-{i}", "estado": "Reportado"},
+            str(i),
+        ).to_dict()
+        for i in range(args.eventos)
+    ]
+
+    print(
+        f"{args.conexiones} conexiones x {args.eventos} eventos, "
+        f"latencia {args.latencia_ms}ms, {args.hilos_por_worker} hilos por worker"
+    )
+    print(f"{'workers':>8} {'segundos':>9} {'msg/s':>9} {'escala':>7}")
+
+    base = None
+    for w in args.workers:
+        trabajos = [
+            (shard, w, args.conexiones, eventos, args.latencia_ms / 1000, args.hilos_por_worker)
+            for shard in range(w)
+        ]
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=w) as pool:
+            resultados = list(pool.map(_atender_shard, trabajos))
+        segundos = time.perf_counter() - inicio
+        enviados = sum(r[0] for r in resultados)
+        throughput = enviados / segundos
+        base = base or throughput
+        print(f"{w:>8} {segundos:>9.2f} {throughput:>9.0f} {throughput / base:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
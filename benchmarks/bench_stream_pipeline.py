@@ -0,0 +1,132 @@
+"""
+Tres lectores del stream (historial, agregados, broadcast), cada uno con su
+propia decodificación y, en el caso de broadcast, json.dumps(event) del
+batch entero al log, contra alerta_common.stream_pipeline: una sola
+decodificación y los sinks en paralelo.
+
+Los sinks son stand-ins que duermen una latencia fija (lo que tarda su I/O
+a DynamoDB / API Gateway), así que se mide solo el costo del pipeline y la
+concurrencia entre sinks. Para los lectores separados se suma la duración
+de las tres invocaciones, que es lo que se factura (corren en paralelo en
+funciones distintas, pero cada una paga su decode y su espera).
+
+Uso:
+    python benchmarks/bench_stream_pipeline.py [--records 500] [--batches 20]
+        [--latencias-ms 15 10 10 40]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+from alerta_common.stream_pipeline import Pipeline, Sink  # noqa: E402
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # noqa: E402
+
+serializer = TypeSerializer()
+
+
+class SinkConLatencia(Sink):
+    def __init__(self, nombre, latencia_s):
+        self.nombre = nombre
+        self.latencia_s = latencia_s
+
+    def procesar(self, cambios):
+        time.sleep(self.latencia_s)
+
+
+def _record(n):
+    old = {
+        "id": f"inc-{n}",
+        "estado": "Reportado",
+        "nivelDeGravedad": "Alta",
+        "areaResponsable": "ti",
+        "descripcion": "descripción de prueba " * 6,
+        "createdAt": "2025-11-16T21:00:00",
+    }
+    new = dict(old, estado="EN_ATENCION", updatedAt="2025-11-16T22:00:00")
+    return {
+        "eventName": "MODIFY",
+        "dynamodb": {
+            "NewImage": {k: serializer.serialize(v) for k, v in new.items()},
+            "OldImage": {k: serializer.serialize(v) for k, v in old.items()},
+            "SequenceNumber": str(10_000 + n),
+            "ApproximateCreationDateTime": 1763330400 + n,
+        },
+    }
+
+
+def _lector_separado(event, latencia_s, loggear_evento):
+    """Lo que hacía cada handler por su cuenta: su propio decode (y log)."""
+    deserializer = TypeDeserializer()
+    if loggear_evento:
+        print("Stream event:", json.dumps(event))
+    for record in event["Records"]:
+        for imagen in ("NewImage", "OldImage"):
+            datos = record["dynamodb"].get(imagen)
+            if datos:
+                {k: deserializer.deserialize(v) for k, v in datos.items()}
+    time.sleep(latencia_s)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument(
+        "--latencias-ms", type=float, nargs=4, default=[15, 10, 10, 40],
+        metavar=("HISTORIAL", "RESUMEN", "TENDENCIAS", "BROADCAST"),
+    )
+    args = parser.parse_args()
+
+    event = {"Records": [_record(n) for n in range(args.records)]}
+    nombres = ["historial", "resumen", "tendencias", "broadcast"]
+    latencias = [ms / 1000 for ms in args.latencias_ms]
+
+    # Antes: tres funciones (agregados hacía resumen + tendencias en serie)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.batches):
+            _lector_separado(event, latencias[0], loggear_evento=False)
+            _lector_separado(event, latencias[1] + latencias[2], loggear_evento=False)
+            _lector_separado(event, latencias[3], loggear_evento=True)
+    separados_s = (time.perf_counter() - inicio) / args.batches
+
+    pipeline = Pipeline([SinkConLatencia(n, l) for n, l in zip(nombres, latencias)])
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.batches):
+            pipeline.procesar(event["Records"])
+    pipeline_s = (time.perf_counter() - inicio) / args.batches
+
+    # Solo el costo de CPU de decodificar (sin latencias)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.batches):
+            for loggear in (False, False, True):
+                _lector_separado(event, 0, loggear)
+    decode_separados_ms = (time.perf_counter() - inicio) / args.batches * 1000
+    vacio = Pipeline([SinkConLatencia(n, 0) for n in nombres])
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.batches):
+            vacio.procesar(event["Records"])
+    decode_pipeline_ms = (time.perf_counter() - inicio) / args.batches * 1000
+
+    print(json.dumps({
+        "records": args.records,
+        "latenciasMs": dict(zip(nombres, args.latencias_ms)),
+        "lectoresSeparadosMsFacturadosPorBatch": round(separados_s * 1000, 1),
+        "pipelineMsPorBatch": round(pipeline_s * 1000, 1),
+        "cpuDecodeSeparadosMs": round(decode_separados_ms, 1),
+        "cpuDecodePipelineMs": round(decode_pipeline_ms, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Tamaño y throughput de los formatos de mensaje del WebSocket
+(completo / delta / lote) sobre incidentes realistas.
+
+Uso:
+    python benchmarks/bench_wire_format.py [--registros 100]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+RAIZ = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(RAIZ, "alerta-realtime"))
+sys.path.insert(0, os.path.join(RAIZ, "alerta-common", "python"))
+
+from wire_format import encode, encode_lote, mensaje_completo, mensaje_delta  # noqa: E402
+
+AREAS = ["laboratorios", "seguridad", "limpieza", "mantenimiento", "sistemas"]
+CATEGORIAS = ["infraestructura", "seguridad", "limpieza", "tecnologia"]
+ESTADOS = ["Reportado", "EN_ATENCION", "Resuelto", "Cerrado"]
+FRASES = [
+    "Se reporta fuga de agua en el baño del tercer piso, cerca de la escalera.",
+    "El proyector del aula no enciende y la clase empieza en 10 minutos.",
+    "Hay cables expuestos junto al tomacorriente del laboratorio de química.",
+    "Basura acumulada en el pasillo principal desde la mañana.",
+]
+
+
+def incidente(rng):
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "estado": "Reportado",
+        "nivelDeGravedad": rng.choice(["Alta", "Media", "Baja"]),
+        "descripcion": " ".join(rng.choice(FRASES) for _ in range(rng.randint(2, 6))),
+        "ubicacion": f"Pabellón {rng.choice('ABCDE')}, aula {rng.randint(100, 999)}",
+        "piso": str(rng.randint(1, 11)),
+        "categoria": rng.choice(CATEGORIAS),
+        "areaResponsable": rng.choice(AREAS),
+        "createdAt": "2025-11-16T21:43:18.423000",
+        "createdByEmail": f"alumno{rng.randint(1, 5000)}@utec.edu.pe",
+    }
+
+
+def generar_registros(n, rng):
+    registros = []
+    for i in range(n):
+        old = incidente(rng)
+        new = dict(old, estado=rng.choice(ESTADOS), updatedAt="2025-11-16T22:00:00")
+        registros.append(("MODIFY", new, old, str(10**20 + i)))
+    return registros
+
+
+def medir(nombre, fn, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        total = fn()
+    segundos = (time.perf_counter() - inicio) / repeticiones
+    return nombre, total, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--registros", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    registros = generar_registros(args.registros, random.Random(42))
+
+    def completo():
+        return sum(len(encode(mensaje_completo(e, n, o))) for e, n, o, _ in registros)
+
+    def delta():
+        return sum(len(encode(mensaje_delta(e, n, o, s))) for e, n, o, s in registros)
+
+    def lote():
+        return len(encode_lote([mensaje_delta(e, n, o, s) for e, n, o, s in registros]))
+
+    resultados = [
+        medir("completo", completo, args.repeticiones),
+        medir("delta", delta, args.repeticiones),
+        medir("lote (gzip)", lote, args.repeticiones),
+    ]
+
+    base = resultados[0][1]
+    print(f"{args.registros} registros MODIFY por batch")
+    print(f"{'formato':>12} {'bytes/batch':>12} {'vs completo':>12} {'encode ms':>10} {'registros/s':>12}")
+    for nombre, total, segundos in resultados:
+        print(
+            f"{nombre:>12} {total:>12} {total / base:>11.1%} "
+            f"{segundos * 1000:>10.2f} {args.registros / segundos:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
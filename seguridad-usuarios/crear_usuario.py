@@ -1,12 +1,14 @@
 import json
 import os
-import uuid
 import hashlib
-import boto3
 import traceback
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+from alerta_common.clients import table
+from alerta_common.dynamo_json import dumps
+from tokens import emitir_token
+
 VALID_ROLES = {"administrativo", "usuario"}
 
 
@@ -29,9 +31,8 @@ def lambda_handler(event, context):
                 f"TOKENS_TABLE={tokens_table_name}"
             )
 
-        dynamodb = boto3.resource("dynamodb")
-        usuarios_table = dynamodb.Table(usuarios_table_name)
-        tokens_table = dynamodb.Table(tokens_table_name)
+        usuarios_table = table(usuarios_table_name)
+        tokens_table = table(tokens_table_name)
 
         try:
             body = json.loads(event.get("body") or "{}")
@@ -86,16 +87,8 @@ def lambda_handler(event, context):
             return _response(500, {"message": "Error interno guardando usuario"})
 
         # Generar token inicial al crear usuario
-        token = str(uuid.uuid4())
-        token_item = {
-            "token": token,
-            "email": email,
-            "rol": rol,
-            "createdAt": now,
-        }
-
         try:
-            tokens_table.put_item(Item=token_item)
+            token = emitir_token(tokens_table, email, rol, area, now)
         except ClientError as e:
             print("Error guardando token:", e)
             return _response(500, {"message": "Error interno guardando token"})
@@ -137,5 +130,5 @@ def _response(status_code, body):
             "Access-Control-Allow-Headers": "*",
             "Access-Control-Allow-Methods": "OPTIONS,POST",
         },
-        "body": json.dumps(body),
+        "body": dumps(body),
     }
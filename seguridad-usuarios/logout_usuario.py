@@ -0,0 +1,79 @@
+import json
+import os
+import traceback
+from botocore.exceptions import ClientError
+
+from alerta_common.clients import table
+from alerta_common.dynamo_json import dumps
+from alerta_common.revocation import revocar
+from alerta_common.signed_tokens import (
+    es_token_firmado,
+    extract_token_from_headers,
+    verificar,
+)
+
+
+def lambda_handler(event, context):
+    print("Event logoutUsuario:", json.dumps(event))
+
+    try:
+        tokens_table_name = os.environ.get("TOKENS_TABLE")
+        revocados_table_name = os.environ.get("REVOKED_TOKENS_TABLE")
+
+        if not tokens_table_name or not revocados_table_name:
+            raise RuntimeError(
+                f"Faltan variables de entorno: "
+                f"TOKENS_TABLE={tokens_table_name}, "
+                f"REVOKED_TOKENS_TABLE={revocados_table_name}"
+            )
+
+        token = extract_token_from_headers(event.get("headers"))
+        if not token:
+            return _response(
+                400,
+                {"message": "Falta header Authorization con el token"},
+            )
+
+        try:
+            if es_token_firmado(token):
+                # Token firmado: no está en ninguna tabla, se agrega su jti
+                # a la lista de revocación hasta que expire
+                claims, error = verificar(token)
+                if error:
+                    return _response(401, {"message": error})
+                revocar(
+                    table(revocados_table_name),
+                    claims["jti"],
+                    claims["exp"],
+                )
+            else:
+                table(tokens_table_name).delete_item(Key={"token": token})
+        except ClientError as e:
+            print("Error revocando token:", e)
+            return _response(500, {"message": "Error interno revocando token"})
+
+        return _response(200, {"message": "Sesión cerrada"})
+
+    except Exception as e:
+        print("ERROR NO CONTROLADO en logoutUsuario:", str(e))
+        print(traceback.format_exc())
+        return _response(
+            500,
+            {
+                "message": "Error interno en logoutUsuario",
+                "detail": str(e),
+            },
+        )
+
+
+def _response(status_code, body):
+    return {
+        "statusCode": status_code,
+        "headers": {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "*",
+            "Access-Control-Allow-Methods": "OPTIONS,POST",
+        },
+        "body": dumps(body),
+    }
@@ -0,0 +1,29 @@
+import os
+import uuid
+
+from alerta_common.signed_tokens import firmar
+
+# "firmado": token HMAC que los demás servicios verifican sin leer DynamoDB
+# "uuid": token aleatorio guardado en tokens_acceso (formato original)
+TOKEN_FORMAT = os.environ.get("TOKEN_FORMAT", "uuid")
+
+
+def emitir_token(tokens_table, email, rol, area, now):
+    """
+    Genera un token de acceso para el usuario y lo devuelve. Solo los
+    tokens uuid se guardan en tokens_acceso; puede lanzar ClientError.
+    """
+    if TOKEN_FORMAT == "firmado":
+        token, _ = firmar(email, rol, area)
+        return token
+
+    token = str(uuid.uuid4())
+    tokens_table.put_item(
+        Item={
+            "token": token,
+            "email": email,
+            "rol": rol,
+            "createdAt": now,
+        }
+    )
+    return token